@@ -0,0 +1,102 @@
+"""Đo độ trễ phản hồi giao diện khi tải catalog lớn
+
+So sánh cách cũ (đọc file và dựng cache ngay trên luồng giao diện) với
+BulkLoader (luồng nền đọc/dựng chỉ mục, luồng giao diện nhận từng lô).
+Một "sự kiện nhập liệu" giả được lên lịch mỗi PROBE_MS; độ trễ là thời
+gian nó phải chờ so với lúc lẽ ra được xử lý.
+Chạy: python benchmarks/bench_bulk_load.py [số sản phẩm]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_loader import BulkLoader
+from product_repository import ProductRepository
+from storage import JsonStorage
+from bench_live_search import HeadlessLoop
+from bench_search import make_catalog
+
+PROBE_MS = 10
+BATCH = 5000
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def bench_sync(path):
+    repo = ProductRepository(JsonStorage(path, os.devnull))
+    start = time.perf_counter()
+    products = repo.all()
+    # The UI thread is blocked for the whole call
+    return len(products), (time.perf_counter() - start) * 1000
+
+
+def bench_pipeline(path):
+    repo = ProductRepository(JsonStorage(path, os.devnull))
+    loop = HeadlessLoop()
+    rows = []
+    lateness = []
+    finished = []
+
+    def work(emit, cancelled):
+        products = repo.preload()
+        for start in range(0, len(products), BATCH):
+            if cancelled():
+                return None
+            emit(products[start:start + BATCH])
+        return len(products)
+
+    def on_done(result, error, cancelled):
+        finished.append(time.perf_counter())
+        if error is not None:
+            raise error
+
+    def probe(due):
+        lateness.append((time.perf_counter() - due) * 1000)
+        if not finished:
+            loop.after(PROBE_MS, probe, time.perf_counter() + PROBE_MS / 1000)
+
+    start = time.perf_counter()
+    loader = BulkLoader(loop, work, rows.extend, on_done).start()
+    loop.after(PROBE_MS, probe, time.perf_counter() + PROBE_MS / 1000)
+    loop.run()
+    return (len(rows), (finished[0] - start) * 1000, loop.max_block_ms, lateness,
+            loader.max_drain_ms)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(1)
+    catalog = make_catalog(n)
+    for product in catalog:
+        product['price'] = random.randint(89000, 899000)
+        product['quantity'] = random.randint(0, 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "products.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(catalog, ensure_ascii=False, indent=2))
+        del catalog
+        gc.collect()
+
+        count, blocked = bench_sync(path)
+        print(f"{count} products")
+        print(f"  before: UI thread blocked {blocked:.0f} ms")
+        gc.collect()
+        count, total, max_block, lateness, max_drain = bench_pipeline(path)
+        print(f"  after:  loaded in {total:.0f} ms, {len(lateness)} input probes, "
+              f"latency p50 {percentile(lateness, 0.5):.1f} ms, "
+              f"p99 {percentile(lateness, 0.99):.1f} ms, max {max(lateness):.1f} ms; "
+              f"longest UI callback {max_block:.1f} ms (drain {max_drain:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
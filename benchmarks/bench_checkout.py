@@ -0,0 +1,169 @@
+"""Bán hàng đồng thời từ nhiều máy: số đơn mỗi giây và độ trễ thanh toán
+
+Mỗi máy bán hàng là một tiến trình riêng với ProductRepository của nó,
+dùng chung một thư mục dữ liệu; trong mỗi máy có vài quầy (luồng) thanh
+toán liên tục các giỏ 1-4 dòng. Vài sản phẩm "bán chạy" có ít hàng nên
+các máy tranh nhau bán chúng và một phần giỏ bị từ chối. Cuối cùng mở lại
+dữ liệu và kiểm tra: không sản phẩm nào âm kho, số bị trừ đúng bằng tổng
+các đơn đã ghi, mỗi lần bán thành công có đúng một đơn.
+Chạy: python benchmarks/bench_checkout.py [--terminals 4] [--clients 4] [--seconds 5]
+      [--products 10000] [--backend json|binary|sqlite]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from orders import CheckoutError
+from product_repository import ProductRepository
+from sample_data import make_products
+from storage import create_storage
+
+HOT = 20
+HOT_STOCK = 20
+START_DELAY = 2.0
+
+
+def open_storage(backend, tmp):
+    return create_storage(backend, os.path.join(tmp, "products.json"),
+                          os.path.join(tmp, "users.json"), os.path.join(tmp, "shop.db"),
+                          os.path.join(tmp, "products.snap"))
+
+
+def fill(backend, tmp, n):
+    products = make_products(n, seed=n)
+    random.seed(n)
+    for i, product in enumerate(products, 1):
+        product['id'] = i
+        product['sku'] = f"SKU{i:07d}"
+        product['quantity'] = HOT_STOCK if i <= HOT else random.randint(100, 1000)
+    storage = open_storage(backend, tmp)
+    try:
+        storage.init_users([])
+        if backend == "sqlite":
+            storage.write_products([{"op": "insert", "product": p} for p in products])
+        else:
+            storage.compact(products)
+    finally:
+        storage.close()
+    return {p['id']: p['quantity'] for p in products}
+
+
+def terminal(backend, tmp, clients, seconds, start, seed):
+    """Một máy bán hàng; in kết quả (JSON) ra stdout"""
+    repo = ProductRepository(open_storage(backend, tmp))
+    skus = [p['sku'] for p in repo.all()]
+    latencies = []
+    rejected = []
+    lock = threading.Lock()
+
+    def cashier(index):
+        rng = random.Random(seed * 100 + index)
+        mine = []
+        refused = 0
+        deadline = start + seconds
+        while time.time() < deadline:
+            cart = [(rng.choice(skus), rng.randint(1, 2)) for _ in range(rng.randint(1, 4))]
+            if rng.random() < 0.2:
+                cart.append((skus[rng.randrange(HOT)], 1))
+            started = time.perf_counter()
+            try:
+                repo.checkout(cart, created_by=f"terminal-{seed}")
+            except CheckoutError:
+                refused += 1
+            mine.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(mine)
+            rejected.append(refused)
+
+    threads = [threading.Thread(target=cashier, args=(i,)) for i in range(clients)]
+    time.sleep(max(0.0, start - time.time()))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    repo.flush()
+    stats = repo.stats()
+    repo.close()
+    print(json.dumps({"latencies": latencies, "rejected": sum(rejected),
+                      "commits": stats["commits"], "lock_waits": stats["lock_waits"]}))
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def verify(backend, tmp, initial):
+    storage = open_storage(backend, tmp)
+    try:
+        final = {p['id']: p['quantity'] for p in storage.load_products()}
+        orders = storage.load_orders()
+    finally:
+        storage.close()
+    sold = {}
+    for order in orders:
+        for line in order['lines']:
+            sold[line['id']] = sold.get(line['id'], 0) + line['quantity']
+    negative = sum(1 for quantity in final.values() if quantity < 0)
+    mismatched = sum(1 for pid, quantity in initial.items()
+                     if quantity - final[pid] != sold.get(pid, 0))
+    hot_left = sum(final[pid] for pid in range(1, HOT + 1))
+    return len(orders), negative, mismatched, hot_left
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terminals", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--backend", default="json", choices=("json", "binary", "sqlite"))
+    parser.add_argument("--terminal", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.terminal:
+        tmp, start, seed = args.terminal
+        terminal(args.backend, tmp, args.clients, args.seconds, float(start), int(seed))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        initial = fill(args.backend, tmp, args.products)
+        start = time.time() + START_DELAY
+        children = [subprocess.Popen([sys.executable, os.path.abspath(__file__),
+                                      "--backend", args.backend, "--clients", str(args.clients),
+                                      "--seconds", str(args.seconds),
+                                      "--terminal", tmp, str(start), str(seed)],
+                                     stdout=subprocess.PIPE)
+                    for seed in range(args.terminals)]
+        results = [json.loads(child.communicate()[0]) for child in children]
+        orders, negative, mismatched, hot_left = verify(args.backend, tmp, initial)
+
+    latencies = sorted(ms for result in results for ms in result["latencies"])
+    attempts = len(latencies)
+    rejected = sum(result["rejected"] for result in results)
+    sold = attempts - rejected
+    commits = sum(result["commits"] for result in results)
+    print(f"{args.backend}, {args.products:,} products, {args.terminals} terminals x "
+          f"{args.clients} cashiers, {args.seconds:.0f} s")
+    print(f"  checkouts {attempts:,} ({attempts / args.seconds:,.0f}/s), sold {sold:,} "
+          f"({sold / args.seconds:,.0f}/s), rejected for stock {rejected:,}")
+    if latencies:
+        print(f"  latency ms: p50 {percentile(latencies, 0.5):.1f}  "
+              f"p95 {percentile(latencies, 0.95):.1f}  p99 {percentile(latencies, 0.99):.1f}  "
+              f"max {latencies[-1]:.1f}")
+    print(f"  writes {commits:,} ({attempts / max(commits, 1):.1f} checkouts per write), "
+          f"lock waits {sum(result['lock_waits'] for result in results):,}")
+    print(f"  orders on disk {orders:,} (== sold: {orders == sold}), negative stock {negative}, "
+          f"stock != initial - sold: {mismatched}, hot items left {hot_left}")
+    sys.exit(0 if orders == sold and not negative and not mismatched else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Xuất catalog ra CSV / NDJSON (có và không nén gzip): số dòng mỗi giây
+
+Dựng catalog trong ProductTable (như ProductRepository giữ) rồi xuất bằng
+export_products ở cả bốn định dạng. Mốc so sánh là csv.DictWriter đọc
+từng ô qua ProductRow. Bộ nhớ đỉnh (RSS) trước và sau khi xuất cho thấy
+việc xuất không giữ cả file trong bộ nhớ.
+Chạy: python benchmarks/bench_export.py [số sản phẩm]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_export import EXPORT_COLUMNS, export_products
+from product_table import ProductTable
+from sample_data import make_products
+
+CHUNK = 100000
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def dict_writer(products, path):
+    """Cách làm thẳng: DictWriter, mỗi ô một lần get"""
+    started = time.perf_counter()
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, EXPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for product in products:
+            writer.writerow({column: product.get(column) for column in EXPORT_COLUMNS})
+    return time.perf_counter() - started
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    table = ProductTable()
+    rows = []
+    for start in range(0, n, CHUNK):
+        chunk = make_products(min(CHUNK, n - start), seed=start, prefix=f"S{start // CHUNK}")
+        for i, product in enumerate(chunk, start + 1):
+            product['id'] = i
+        rows.extend(table.extend(chunk))
+    print(f"{n:,} products, {len(EXPORT_COLUMNS)} columns; peak RSS {peak_rss_mb():.0f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seconds = dict_writer(rows, os.path.join(tmp, "baseline.csv"))
+        print(f"  DictWriter per cell   {n / seconds:10,.0f} rows/s")
+        os.remove(os.path.join(tmp, "baseline.csv"))
+        for name in ("catalog.csv", "catalog.csv.gz", "catalog.ndjson", "catalog.ndjson.gz"):
+            path = os.path.join(tmp, name)
+            report = export_products(rows, path, total=n)
+            print(f"  {name:21} {report['rows_per_sec']:10,.0f} rows/s  "
+                  f"{report['seconds']:6.1f} s  {report['bytes'] / 1e6:7.1f} MB")
+            os.remove(path)
+    print(f"peak RSS after exports {peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Bộ lọc nhiều mặt (facet): bitset theo giá trị so với duyệt toàn bộ catalog
+
+Mỗi kịch bản đo cả danh sách sản phẩm thỏa bộ lọc lẫn số đếm của mọi
+facet (như khi mở menu lọc), có và không kèm từ khóa tìm kiếm. Mốc so
+sánh là một vòng lặp Python trên danh sách dict làm cùng việc đó. Cuối
+cùng đo chi phí sửa sản phẩm (dồn lại) và lần đọc đầu tiên sau khi sửa.
+Chạy: python benchmarks/bench_facets.py [số sản phẩm]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from facet_index import FACETS, FacetIndex, facet_value, members, to_bits
+from sample_data import make_products
+from search_index import SearchIndex
+
+EDITS = 1000
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def scan(products, selections, within=None):
+    """Cách không có chỉ mục: một lượt qua catalog cho kết quả và mọi số đếm"""
+    result = []
+    counts = {facet: {} for facet in FACETS}
+    for product in products:
+        if within is not None and product['id'] not in within:
+            continue
+        values = {facet: facet_value(facet, product) for facet in FACETS}
+        failed = [facet for facet, chosen in selections.items()
+                  if chosen and values[facet] not in chosen]
+        if not failed:
+            result.append(product)
+        for facet in FACETS:
+            if not failed or failed == [facet]:
+                counts[facet][values[facet]] = counts[facet].get(values[facet], 0) + 1
+    return result, counts
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    random.seed(1)
+    products = make_products(n, seed=1)
+    for i, product in enumerate(products, 1):
+        product['id'] = i
+    by_id = {p['id']: p for p in products}
+
+    index = FacetIndex()
+    _, ms = timed(lambda: index.rebuild(products))
+    print(f"{n:,} products, facet index build {ms:.0f} ms")
+    search = SearchIndex()
+    search.rebuild(products)
+
+    colors = sorted(index.counts({})['color'], key=str)
+    scenarios = [
+        ("no filter", {}, None),
+        ("price band", {'price': {2}}, None),
+        ("2 colours + stock", {'color': set(colors[:2]), 'quantity': {2}}, None),
+        ("3 facets", {'price': {1, 2}, 'color': {colors[0]}, 'category': {products[0]['category']}},
+         None),
+        ("search 'ao' + price", {'price': {2}}, "ao"),
+        ("search 'xanh' + 2 facets", {'price': {2, 3}, 'quantity': {2}}, "xanh"),
+    ]
+    for label, selections, query in scenarios:
+        def indexed():
+            within = to_bits(search.search(query)) if query else None
+            rows = [by_id[pid] for pid in members(index.filter(selections, within))]
+            return rows, index.counts(selections, within)
+
+        (rows, _), ms = timed(indexed)
+        within = search.search(query) if query else None
+        (expected, _), scan_ms = timed(lambda: scan(products, selections, within))
+        assert len(rows) == len(expected)
+        print(f"  {label:26} {len(rows):9,} rows  bitsets {ms:7.1f} ms   scan {scan_ms:7.1f} ms")
+
+    started = time.perf_counter()
+    for _ in range(EDITS):
+        product = by_id[random.randint(1, n)]
+        index.remove(product)
+        product['price'] = random.randint(50, 900) * 1000
+        product['color'] = random.choice(colors)
+        index.add(product)
+    edit_us = (time.perf_counter() - started) * 1e6 / EDITS
+    _, ms = timed(lambda: index.counts({'price': {2}}))
+    print(f"  edit (queued)              {edit_us:7.1f} us each; "
+          f"first counts after {EDITS} edits {ms:.1f} ms")
+    _, ms = timed(lambda: index.counts({'price': {2}}))
+    print(f"  counts again               {ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
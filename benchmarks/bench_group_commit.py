@@ -0,0 +1,95 @@
+"""Đo thông lượng ghi khi nhiều luồng cùng sửa catalog (có fsync)
+
+So sánh ghi từng thao tác một (mỗi thao tác một lần fsync) với luồng ghi
+gom nhóm (group commit), rồi mở lại dữ liệu để kiểm tra không mất thao tác.
+Chạy: python benchmarks/bench_group_commit.py [số luồng] [thao tác mỗi luồng]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_repository import ProductRepository
+from sample_data import make_products
+from storage import JsonStorage, SQLiteStorage
+
+CATALOG = 10000
+
+
+def make_storage(backend, tmp, name):
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(tmp, f"{name}.db"))
+    # Compaction is amortized separately; keep it out of the figures
+    return JsonStorage(os.path.join(tmp, f"{name}.json"), os.devnull,
+                       compact_threshold=float('inf'))
+
+
+def run(storage, threads, per_thread, window_ms, max_entries):
+    repo = ProductRepository(storage, window_ms=window_ms)
+    repo.writer.max_entries = max_entries
+    repo.add_many(make_products(CATALOG, seed=1))
+    ids = [p['id'] for p in repo.all()]
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(t):
+        mine = []
+        for i in range(per_thread):
+            if i % 2:
+                product_id = ids[(t * per_thread + i) % len(ids)]
+                started = time.perf_counter()
+                repo.update(product_id, {"quantity": i})
+            else:
+                started = time.perf_counter()
+                repo.add({"sku": f"NEW-{t}-{i}", "name": f"Mới {t}-{i}", "category": "Áo",
+                          "price": 100000, "quantity": i})
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+
+    commits = repo.writer.commits
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    commits = repo.writer.commits - commits
+    expected = repo.count()
+    repo.close()
+    latencies.sort()
+    return (elapsed, commits, latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000, expected)
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:]]
+    threads = args[0] if args else 8
+    per_thread = args[1] if len(args) > 1 else 100
+    total = threads * per_thread
+    print(f"{threads} threads x {per_thread} mutations (half insert, half update), fsync on")
+    print(f"{'backend':>8} {'mode':>24} {'ops/s':>8} {'commits':>8} {'p50 ms':>7} "
+          f"{'p99 ms':>7} {'reopened':>9}")
+    modes = [("one write per op", 0, 1), ("group commit, no window", 0, 5000),
+             ("group commit, 2 ms", 2, 5000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("json", "sqlite"):
+            for n, (label, window_ms, max_entries) in enumerate(modes):
+                name = f"{backend}_{n}"
+                elapsed, commits, p50, p99, expected = run(
+                    make_storage(backend, tmp, name), threads, per_thread, window_ms, max_entries)
+                # Everything acknowledged must be there after reopening
+                reopened = ProductRepository(make_storage(backend, tmp, name))
+                count = reopened.count()
+                reopened.close()
+                status = "ok" if count == expected else f"LOST {expected - count}"
+                print(f"{backend:>8} {label:>24} {total / elapsed:>8.0f} {commits:>8} "
+                      f"{p50:>7.2f} {p99:>7.2f} {status:>9}")
+
+
+if __name__ == "__main__":
+    main()
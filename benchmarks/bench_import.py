@@ -0,0 +1,89 @@
+"""Đo bộ nhớ đỉnh (RSS) khi đọc file sản phẩm lớn
+
+So sánh json.load toàn bộ file với đọc theo luồng (product_import). Mỗi
+phép đo chạy trong một tiến trình riêng để RSS đỉnh không lẫn vào nhau.
+Chạy: python benchmarks/bench_import.py [số sản phẩm ...]
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = [50000, 200000, 500000]
+CATEGORIES = ['Áo', 'Quần', 'Váy', 'Phụ kiện', 'Đồ thể thao']
+
+# Runs in a child process: parse the file, print peak RSS (KiB) and seconds
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from product_import import iter_records, normalize_product
+mode, path = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+count = 0
+if mode == 'json.load':
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for record in json.load(f):
+            if normalize_product(record)[1] is None:
+                count += 1
+else:
+    with open(path, 'rb') as f:
+        for _, record, error, _ in iter_records(f):
+            if error is None and normalize_product(record)[1] is None:
+                count += 1
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, time.perf_counter() - start, count)
+"""
+
+
+def write_feed(path, n, ndjson):
+    with open(path, 'w', encoding='utf-8') as f:
+        if not ndjson:
+            f.write('[\n')
+        for i in range(n):
+            record = {
+                "sku": f"SUP-{i:07d}",
+                "name": f"Sản phẩm nhà cung cấp {i}",
+                "category": random.choice(CATEGORIES),
+                "price": random.randint(89000, 899000),
+                "quantity": random.randint(0, 50),
+                "description": "Chất liệu cotton cao cấp, thoáng mát. Size: S, M, L, XL",
+            }
+            line = json.dumps(record, ensure_ascii=False)
+            if ndjson:
+                f.write(line + '\n')
+            else:
+                f.write(line + (',\n' if i < n - 1 else '\n'))
+        if not ndjson:
+            f.write(']\n')
+
+
+def measure(mode, path):
+    out = subprocess.run([sys.executable, '-c', CHILD.format(root=ROOT), mode, path],
+                         check=True, capture_output=True, text=True).stdout.split()
+    return int(out[0]) / 1024, float(out[1]), int(out[2])
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    random.seed(1)
+    print(f"{'products':>9} {'file MB':>8} {'mode':>14} {'peak RSS MB':>12} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            for ndjson in (False, True):
+                path = os.path.join(tmp, f"feed_{n}.{'ndjson' if ndjson else 'json'}")
+                write_feed(path, n, ndjson)
+                size_mb = os.path.getsize(path) / 1024 / 1024
+                modes = ['stream ndjson'] if ndjson else ['json.load', 'stream array']
+                for mode in modes:
+                    rss, seconds, count = measure(mode, path)
+                    assert count == n, (mode, count)
+                    print(f"{n:>9} {size_mb:>8.1f} {mode:>14} {rss:>12.1f} {seconds:>8.2f}")
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Chi phí của lớp đo thời gian khi tắt và khi bật
+
+Đo một hàm rỗng gọi thẳng, qua @timed và trong metrics.span(), rồi tìm
+kiếm thật trên catalog với đo tắt/bật, để thấy phần thêm vào so với
+thời gian của chính thao tác.
+Chạy: python benchmarks/bench_instrumentation.py [số sản phẩm]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrumentation import metrics, timed
+from product_journal import write_json_atomic
+from product_repository import ProductRepository
+from sample_data import make_products
+from storage import JsonStorage
+
+CALLS = 200000
+QUERIES = ("áo", "quần jean", "xanh", "váy dài đỏ", "phụ kiện")
+
+
+def plain():
+    return None
+
+
+@timed("bench.timed")
+def decorated():
+    return None
+
+
+def spanned():
+    with metrics.span("bench.span"):
+        return None
+
+
+def per_call_ns(fn, calls=CALLS):
+    return min(timeit.repeat(fn, number=calls, repeat=3)) / calls * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "products.json")
+        products = make_products(n, seed=1)
+        for i, product in enumerate(products, 1):
+            product['id'] = i
+        write_json_atomic(path, products, fsync=False)
+        repo = ProductRepository(JsonStorage(path, os.devnull))
+        repo.count()
+
+        @timed("bench.search")
+        def search():
+            for query in QUERIES:
+                repo.search(query)
+
+        results = {}
+        for enabled in (False, True):
+            metrics.enable(enabled)
+            results[enabled] = {
+                "plain": per_call_ns(plain),
+                "@timed": per_call_ns(decorated),
+                "span()": per_call_ns(spanned),
+                "search": per_call_ns(search, 20) / 1e6,
+            }
+        metrics.enable(False)
+        repo.close()
+
+    print(f"{'':10} {'disabled':>12} {'enabled':>12}")
+    for name in ("plain", "@timed", "span()"):
+        print(f"{name:10} {results[False][name]:>9.0f} ns {results[True][name]:>9.0f} ns")
+    print(f"{'search':10} {results[False]['search']:>9.2f} ms {results[True]['search']:>9.2f} ms"
+          f"  ({len(QUERIES)} queries, {n} products)")
+
+
+if __name__ == "__main__":
+    main()
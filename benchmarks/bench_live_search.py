@@ -0,0 +1,200 @@
+"""Đo độ trễ từ lúc gõ phím đến lúc danh sách hiển thị xong khi tìm kiếm trực tiếp
+
+So sánh cách cũ (mỗi phím: quét toàn bộ + dựng lại toàn bộ bảng) với LiveSearch.
+Có màn hình (hoặc xvfb-run) thì dùng Treeview thật; nếu không thì dùng một
+bảng giả trong bộ nhớ, chỉ đo phần việc của Python.
+
+Chạy: python benchmarks/bench_live_search.py [số sản phẩm]
+"""
+import gc
+import heapq
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_search import LiveSearch
+from search_index import SearchIndex
+from bench_search import linear_search, make_catalog
+
+QUERY = "ao thun nam"
+# Fast typist (every key within the debounce window) and a slow one
+KEY_INTERVALS_MS = (80, 250)
+CHUNK = 500
+
+
+class HeadlessLoop:
+    """Vòng lặp sự kiện tối giản thay cho Tk khi không có màn hình"""
+
+    def __init__(self):
+        self._queue = []
+        self._seq = itertools.count()
+        self._cancelled = set()
+        # Longest single callback: how long the UI would be frozen
+        self.max_block_ms = 0.0
+
+    def after(self, ms, fn, *args):
+        handle = next(self._seq)
+        heapq.heappush(self._queue, (time.perf_counter() + ms / 1000, handle, fn, args))
+        return handle
+
+    def after_cancel(self, handle):
+        self._cancelled.add(handle)
+
+    def run(self):
+        while self._queue:
+            due, handle, fn, args = heapq.heappop(self._queue)
+            if handle in self._cancelled:
+                continue
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            started = time.perf_counter()
+            fn(*args)
+            self.max_block_ms = max(self.max_block_ms, (time.perf_counter() - started) * 1000)
+
+
+class HeadlessTree:
+    def __init__(self):
+        self.rows = {}
+        self._ids = itertools.count()
+
+    def get_children(self):
+        return tuple(self.rows)
+
+    def delete(self, *items):
+        for item in items:
+            del self.rows[item]
+
+    def insert(self, parent, index, values):
+        iid = f"I{next(self._ids)}"
+        self.rows[iid] = values
+        return iid
+
+
+class Entry:
+    def __init__(self):
+        self.text = ''
+
+    def get(self):
+        return self.text
+
+
+class Event:
+    def __init__(self, keysym):
+        self.keysym = keysym
+
+
+def row_values(i, product):
+    return (i, product['name'], product['category'], f"{product.get('price', 0):,} VNĐ",
+            product.get('quantity', 0), product['description'][:50])
+
+
+def make_ui():
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+        tree = ttk.Treeview(root, columns=('a', 'b', 'c', 'd', 'e', 'f'), show='headings')
+        tree.pack()
+        return root, tree, "tk", root.mainloop, root.quit
+    except tk.TclError:
+        loop = HeadlessLoop()
+        return loop, HeadlessTree(), "headless", loop.run, lambda: None
+
+
+def max_block(root):
+    return f"{root.max_block_ms:.1f} ms" if isinstance(root, HeadlessLoop) else "n/a"
+
+
+def type_query(root, entry, handler, stop, interval_ms):
+    """Lên lịch gõ từng ký tự của QUERY; trả về thời điểm dự kiến của mỗi phím"""
+    start = time.perf_counter()
+    key_times = [start + interval_ms * i / 1000 for i in range(len(QUERY))]
+    for i, ch in enumerate(QUERY):
+        def press(i=i, ch=ch):
+            entry.text = QUERY[:i + 1]
+            handler(Event(ch if ch != ' ' else 'space'))
+        root.after(interval_ms * i, press)
+    root.after(interval_ms * len(QUERY) + 3000, stop)
+    return key_times
+
+
+def bench_old(products, interval_ms):
+    root, tree, mode, mainloop, stop = make_ui()
+    entry = Entry()
+    renders = []
+
+    def on_key(event):
+        for item in tree.get_children():
+            tree.delete(item)
+        for i, product in enumerate(linear_search(products, entry.get()), 1):
+            tree.insert('', 'end', values=row_values(i, product))
+        renders.append(time.perf_counter())
+
+    key_times = type_query(root, entry, on_key, stop, interval_ms)
+    mainloop()
+    if mode == "tk":
+        root.destroy()
+    return mode, [(r - k) * 1000 for k, r in zip(key_times, renders)], max_block(root)
+
+
+def bench_live(products, interval_ms):
+    root, tree, mode, mainloop, stop = make_ui()
+    entry = Entry()
+    index = SearchIndex()
+    index.rebuild(products)
+    by_id = {p['id']: p for p in products}
+
+    def search(query, within):
+        ids = index.search(query, within)
+        return products if ids is None else [by_id[i] for i in sorted(ids)]
+
+    def render(result, cancelled, done):
+        tree.delete(*tree.get_children())
+
+        def chunk(start):
+            if cancelled():
+                return
+            end = min(start + CHUNK, len(result))
+            for i in range(start, end):
+                tree.insert('', 'end', values=row_values(i + 1, result[i]))
+            if end < len(result):
+                root.after(1, chunk, end)
+            else:
+                done()
+        chunk(0)
+
+    live = LiveSearch(root, entry, search, render)
+    # Don't charge the previous run's garbage to this one
+    gc.collect()
+    type_query(root, entry, live.on_key, stop, interval_ms)
+    mainloop()
+    if mode == "tk":
+        root.destroy()
+    return mode, live.stats(), max_block(root)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    random.seed(1)
+    products = make_catalog(n)
+    for product in products:
+        product.setdefault('price', random.randint(89000, 899000))
+
+    for interval_ms in KEY_INTERVALS_MS:
+        mode, old, old_block = bench_old(products, interval_ms)
+        print(f"[{mode}] {n} products, typing {QUERY!r} at {interval_ms} ms/key")
+        print(f"  before: {len(old)} renders, last key -> render {old[-1]:.1f} ms, "
+              f"worst {max(old):.1f} ms, longest UI block {old_block}")
+        _, live, live_block = bench_live(products, interval_ms)
+        print(f"  after:  {live['searches']} searches ({live['refinements']} refined, "
+              f"{live['abandoned']} abandoned), last key -> render {live['last_ms']:.1f} ms "
+              f"(incl. {LiveSearch.DEBOUNCE_MS} ms debounce), longest UI block {live_block}")
+
+
+if __name__ == "__main__":
+    main()
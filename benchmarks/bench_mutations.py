@@ -0,0 +1,86 @@
+"""Đo độ trễ mỗi thao tác thêm/sửa/xóa theo kích thước catalog
+
+So sánh cách cũ (đọc + ghi lại toàn bộ products.json) với nhật ký chỉ ghi nối.
+Chạy: python benchmarks/bench_mutations.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_repository import ProductRepository
+from storage import JsonStorage
+
+SIZES = [1000, 10000, 50000]
+MUTATIONS = 200
+# The full rewrite is O(catalog) per op; a few samples are enough
+REWRITE_MUTATIONS = 5
+
+
+def make_catalog(n):
+    return [{
+        "name": f"Sản phẩm {i}",
+        "category": random.choice(['Áo', 'Quần', 'Váy', 'Phụ kiện']),
+        "price": random.randint(89000, 899000),
+        "quantity": random.randint(0, 50),
+        "description": "Chất liệu cotton cao cấp, thoáng mát. Size: S, M, L, XL",
+        "created_at": "2025-05-25 16:45:00",
+        "created_by": "admin",
+    } for i in range(n)]
+
+
+def bench_full_rewrite(path, n):
+    """Cách cũ: mỗi thao tác đọc và ghi lại toàn bộ file"""
+    start = time.perf_counter()
+    for _ in range(REWRITE_MUTATIONS):
+        with open(path, 'r', encoding='utf-8') as f:
+            products = json.load(f)
+        products[random.randrange(n)]['quantity'] = random.randint(0, 50)
+        # json.dump straight into the file is far slower still on Vietnamese
+        # text (one small write per token), so this is a lower bound
+        text = json.dumps(products, ensure_ascii=False, indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return (time.perf_counter() - start) / REWRITE_MUTATIONS
+
+
+def bench_journal(path, n):
+    """Cách mới: mỗi thao tác chỉ ghi thêm một dòng nhật ký"""
+    # Compaction is amortized separately; keep it out of the per-op figure
+    storage = JsonStorage(path, os.devnull, compact_threshold=float('inf'))
+    repo = ProductRepository(storage)
+    ids = [p['id'] for p in repo.all()]
+    start = time.perf_counter()
+    for _ in range(MUTATIONS):
+        repo.update(random.choice(ids), {"quantity": random.randint(0, 50)})
+    per_op = (time.perf_counter() - start) / MUTATIONS
+
+    start = time.perf_counter()
+    repo.compact()
+    return per_op, time.perf_counter() - start
+
+
+def main():
+    print(f"{'products':>10} {'rewrite ms/op':>14} {'journal ms/op':>14} {'compact ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            catalog = make_catalog(n)
+            path = os.path.join(tmp, f"products_{n}.json")
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(catalog, ensure_ascii=False, indent=2))
+            rewrite = bench_full_rewrite(path, n)
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(catalog, ensure_ascii=False, indent=2))
+            journal, compact = bench_journal(path, n)
+
+            print(f"{n:>10} {rewrite * 1000:>14.2f} {journal * 1000:>14.3f} {compact * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Đọc catalog theo trang: thời gian tới trang đầu so với tải toàn bộ
+
+Với mỗi kích thước catalog và mỗi kiểu lưu trữ: trang đầu, một trang ở
+giữa và trang cuối bằng page_products (chỉ đọc phần cần thiết), trang
+theo con trỏ (keyset) trên tên, giá, ngày tạo bằng seek_products, rồi
+load_products đọc toàn bộ làm mốc so sánh. Catalog JSON có thêm một ít
+thay đổi trong nhật ký, như sau vài giờ bán hàng.
+Chạy: python benchmarks/bench_paging.py [kích thước ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sample_data import make_products
+from storage import JsonStorage, SQLiteStorage
+
+PAGE = 50
+EDITS = 200
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def make_storage(backend, tmp):
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(tmp, "shop.db"))
+    return JsonStorage(os.path.join(tmp, "products.json"), os.path.join(tmp, "users.json"))
+
+
+def fill(backend, tmp, n):
+    products = make_products(n, seed=n)
+    for i, product in enumerate(products, 1):
+        product['id'] = i
+    storage = make_storage(backend, tmp)
+    try:
+        if backend == "sqlite":
+            storage.write_products([{"op": "insert", "product": p} for p in products])
+        else:
+            storage.compact(products)
+        random.seed(n)
+        edits = [{"op": "update", "id": random.randint(1, n),
+                  "fields": {"price": random.randint(50, 900) * 1000}}
+                 for _ in range(EDITS)]
+        edits.append({"op": "delete", "id": 1})
+        storage.write_products(edits)
+    finally:
+        storage.close()
+
+
+def run(backend, n):
+    with tempfile.TemporaryDirectory() as tmp:
+        fill(backend, tmp, n)
+        storage = make_storage(backend, tmp)
+        try:
+            first, first_ms = timed(lambda: storage.page_products(0, PAGE))
+            _, middle_ms = timed(lambda: storage.page_products(n // 2, PAGE))
+            _, last_ms = timed(lambda: storage.page_products(n - PAGE, PAGE))
+            seeks = []
+            for field in ('name', 'price', 'created_at'):
+                page, ms = timed(lambda: storage.seek_products(field, None, PAGE))
+                cursor = (page[-1].get(field), page[-1]['id'])
+                _, next_ms = timed(lambda: storage.seek_products(field, cursor, PAGE))
+                seeks.append(f"{field} {ms:.1f}/{next_ms:.1f}")
+            products, full_ms = timed(storage.load_products)
+            assert first == products[:PAGE]
+        finally:
+            storage.close()
+    print(f"  {backend:6} {n:9,}  first page {first_ms:7.1f} ms  middle {middle_ms:7.1f} ms  "
+          f"last {last_ms:7.1f} ms  full load {full_ms:8.1f} ms")
+    print(f"  {'':6} {'':9}  seek first/next page (ms): {', '.join(seeks)}")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 300000]
+    print(f"pages of {PAGE} products")
+    for n in sizes:
+        for backend in ("json", "sqlite"):
+            run(backend, n)
+
+
+if __name__ == "__main__":
+    main()
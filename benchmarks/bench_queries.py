@@ -0,0 +1,86 @@
+"""So sánh truy vấn duyệt toàn bộ với chỉ mục catalog (id/SKU, loại, giá, tồn kho)
+
+Chạy: python benchmarks/bench_queries.py [số sản phẩm]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_index import CatalogIndex
+
+CATEGORIES = ['Áo', 'Quần', 'Váy', 'Phụ kiện', 'Đồ thể thao']
+UPDATES = 2000
+
+
+def make_catalog(n):
+    return [{
+        "id": i,
+        "sku": f"SKU-{i:07d}",
+        "name": f"Sản phẩm {i}",
+        "category": random.choice(CATEGORIES),
+        "price": random.randint(89000, 899000),
+        "quantity": random.randint(0, 200),
+    } for i in range(1, n + 1)]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    random.seed(1)
+    products = make_catalog(n)
+    by_id = {p['id']: p for p in products}
+
+    index = CatalogIndex()
+    start = time.perf_counter()
+    index.rebuild(products)
+    print(f"{n} products, index build {time.perf_counter() - start:.2f}s, {index.stats()}")
+
+    sku = products[n // 2]['sku']
+    queries = [
+        ("by_sku",
+         lambda: [p for p in products if p.get('sku') == sku],
+         lambda: [by_id[index.id_for_sku(sku)]]),
+        ("by_category",
+         lambda: [p for p in products if p.get('category') == 'Váy'],
+         lambda: [by_id[i] for i in index.category_ids('Váy')]),
+        ("price_narrow",
+         lambda: [p for p in products if 200000 <= p['price'] <= 201000],
+         lambda: [by_id[i] for i in index.price.between(200000, 201000)]),
+        ("price_wide",
+         lambda: [p for p in products if 200000 <= p['price'] <= 300000],
+         lambda: [by_id[i] for i in index.price.between(200000, 300000)]),
+        ("low_stock(2)",
+         lambda: [p for p in products if p['quantity'] <= 2],
+         lambda: [by_id[i] for i in index.quantity.between(None, 2)]),
+    ]
+
+    print(f"{'query':>14} {'scan ms':>9} {'index ms':>9} {'hits':>7}")
+    for name, scan, indexed in queries:
+        scan_ms, expected = timed(scan, 3)
+        index_ms, result = timed(indexed, 20)
+        assert len(result) == len(expected), name
+        print(f"{name:>14} {scan_ms:>9.2f} {index_ms:>9.3f} {len(result):>7}")
+
+    # Index maintenance cost of an update (remove before, add after)
+    start = time.perf_counter()
+    for _ in range(UPDATES):
+        product = by_id[random.randint(1, n)]
+        index.remove(product)
+        product['price'] = random.randint(89000, 899000)
+        product['quantity'] = random.randint(0, 200)
+        index.add(product)
+    elapsed = (time.perf_counter() - start) / UPDATES * 1000
+    print(f"index maintenance per update: {elapsed:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
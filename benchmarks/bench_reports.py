@@ -0,0 +1,95 @@
+"""Thời gian các báo cáo tồn kho: NumPy trên cột so với vòng lặp Python trên dict
+
+Dựng catalog trong ProductTable (như ProductRepository giữ), rồi đo từng
+báo cáo của InventoryReport, kể cả bước chép cột (snapshot). Cùng các phép
+tính viết bằng vòng lặp Python trên danh sách dict làm mốc so sánh.
+Chạy: python benchmarks/bench_reports.py [số sản phẩm]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_reports import (InventoryReport, LOW_STOCK, OVERSTOCK, PRICE_EDGES,
+                               REPORT_FIELDS)
+from product_table import ProductTable
+from sample_data import make_products
+
+CHUNK = 100000
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def python_reports(products):
+    """Các báo cáo tương tự bằng vòng lặp trên dict (cách làm không có NumPy)"""
+    from bisect import bisect_right
+    totals = {"units": 0, "value": 0}
+    groups = {}
+    buckets = [0] * (len(PRICE_EDGES) + 1)
+    low, over = [], []
+    for p in products:
+        value = p['price'] * p['quantity']
+        totals["units"] += p['quantity']
+        totals["value"] += value
+        for field in ('category', 'brand'):
+            group = groups.setdefault((field, p.get(field)), [0, 0, 0])
+            group[0] += 1
+            group[1] += p['quantity']
+            group[2] += value
+        buckets[bisect_right(PRICE_EDGES, p['price'])] += 1
+        if p['quantity'] <= LOW_STOCK:
+            low.append((p['quantity'], p['id']))
+        if p['quantity'] >= OVERSTOCK:
+            over.append((-value, p['id']))
+    low.sort()
+    over.sort()
+    return totals
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    table = ProductTable()
+    products = []
+    for start in range(0, n, CHUNK):
+        chunk = make_products(min(CHUNK, n - start), seed=start, prefix=f"S{start // CHUNK}")
+        for i, product in enumerate(chunk, start + 1):
+            product['id'] = i
+            # Some overstocked lines
+            if i % 97 == 0:
+                product['quantity'] *= 10
+        table.extend(list(chunk))
+        products.extend(chunk)
+
+    print(f"{n:,} products")
+    snapshot, ms = timed(lambda: table.snapshot(REPORT_FIELDS))
+    print(f"  snapshot (copy columns) {ms:8.1f} ms")
+    report, ms = timed(lambda: InventoryReport(snapshot))
+    print(f"  prepare arrays          {ms:8.1f} ms")
+    steps = [
+        ("totals", report.totals),
+        ("by category", lambda: report.by_group('category')),
+        ("by brand", lambda: report.by_group('brand')),
+        ("price buckets", report.price_buckets),
+        ("low stock", report.low_stock),
+        ("overstock", report.overstock),
+    ]
+    total_ms = 0.0
+    for label, fn in steps:
+        _, ms = timed(fn)
+        total_ms += ms
+        print(f"  {label:23} {ms:8.1f} ms")
+    print(f"  all reports (NumPy)     {total_ms:8.1f} ms")
+    totals, ms = timed(lambda: python_reports(products))
+    print(f"  same in a Python loop   {ms:8.1f} ms")
+    numpy_totals = report.totals()
+    assert totals["units"] == numpy_totals["units"]
+    assert abs(totals["value"] - numpy_totals["value"]) <= 1e-9 * totals["value"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""So sánh tìm kiếm tuần tự (cách cũ) với chỉ mục ngược trên catalog lớn
+
+Chạy: python benchmarks/bench_search.py [số sản phẩm]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex
+
+NAMES = ["Áo thun nam basic", "Áo sơ mi nữ công sở", "Quần jean nam slim fit",
+         "Váy midi hoa nhí", "Áo khoác bomber", "Quần short thể thao",
+         "Đầm maxi bohemian", "Áo polo nam", "Chân váy chữ A", "Áo hoodie unisex"]
+CATEGORIES = ['Áo', 'Quần', 'Váy', 'Phụ kiện', 'Đồ thể thao']
+COLORS = ['Đen', 'Trắng', 'Xanh', 'Đỏ', 'Vàng', 'Hồng', 'Xám', 'Nâu']
+BRANDS = ['Nike', 'Adidas', 'Zara', 'H&M', 'Uniqlo', 'Local Brand', 'Fashion House']
+DESCRIPTIONS = ["Chất liệu cotton cao cấp, thoáng mát", "Form dáng chuẩn, dễ phối đồ",
+                "Phong cách Hàn Quốc", "Thiết kế tối giản, thanh lịch"]
+QUERIES = ["ao", "áo thun", "jean", "bomber đen", "hoa nhí hồng", "polo 1234", "xyz"]
+
+
+def make_catalog(n):
+    products = []
+    for i in range(1, n + 1):
+        color = random.choice(COLORS)
+        brand = random.choice(BRANDS)
+        products.append({
+            "id": i,
+            "name": f"{random.choice(NAMES)} {color} - {brand} {i}",
+            "category": random.choice(CATEGORIES),
+            "description": f"{random.choice(DESCRIPTIONS)}. Size: S, M, L, XL",
+            "brand": brand,
+            "color": color,
+        })
+    return products
+
+
+def linear_search(products, term):
+    """Cách cũ: duyệt toàn bộ, .lower() và tìm chuỗi con từng trường"""
+    term = term.lower().strip()
+    return [p for p in products
+            if term in p.get('name', '').lower()
+            or term in p.get('category', '').lower()
+            or term in p.get('description', '').lower()]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(1)
+    products = make_catalog(n)
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.rebuild(products)
+    print(f"{n} products, index build {time.perf_counter() - start:.2f}s, {index.stats()}")
+
+    print(f"{'query':>14} {'linear ms':>10} {'hits':>7} {'cold ms':>8} {'warm ms':>8} {'hits':>7}")
+    for query in QUERIES:
+        linear_ms, linear = timed(lambda: linear_search(products, query), 3)
+        cold_ms, _ = timed(lambda: index.search(query), 1)
+        warm_ms, ids = timed(lambda: index.search(query), 20)
+        print(f"{query:>14} {linear_ms:>10.2f} {len(linear):>7} {cold_ms:>8.3f} "
+              f"{warm_ms:>8.3f} {len(ids):>7}")
+
+
+if __name__ == "__main__":
+    main()
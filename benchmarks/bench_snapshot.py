@@ -0,0 +1,82 @@
+"""Snapshot catalog nhị phân (mmap) so với products.json: kích thước và thời gian tải
+
+Với mỗi kích thước: kích thước file và thời gian ghi (nén nhật ký); thời
+gian mở file và đọc trang đầu, đọc một cột (giá), đọc toàn bộ catalog
+qua tầng lưu trữ; rồi khởi động lạnh của ProductRepository (đọc, dựng
+chỉ mục và bảng theo cột) với từng định dạng.
+Chạy: python benchmarks/bench_snapshot.py [kích thước ...]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_snapshot import BinarySnapshot
+from product_repository import ProductRepository
+from sample_data import make_products
+from storage import BinaryStorage, JsonStorage
+
+PAGE = 50
+
+
+def timed(fn):
+    gc.collect()
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run(n):
+    products = make_products(n, seed=n)
+    for i, product in enumerate(products, 1):
+        product['id'] = i
+    with tempfile.TemporaryDirectory() as tmp:
+        users = os.path.join(tmp, "users.json")
+        storages = {"json": JsonStorage(os.path.join(tmp, "products.json"), users, fsync=False),
+                    "binary": BinaryStorage(os.path.join(tmp, "products.snap"), users,
+                                            fsync=False)}
+        print(f"{n:,} products")
+        for name, storage in storages.items():
+            _, ms = timed(lambda: storage.compact(products))
+            size = os.path.getsize(storage.products_file) / 1e6
+            print(f"  {name:6} file {size:8.1f} MB   write {ms:8.0f} ms")
+        del products
+
+        path = storages["json"].products_file
+        _, ms = timed(lambda: json.load(open(path, encoding='utf-8')))
+        print(f"  json.load (one call, blocks the UI)  {ms:8.0f} ms")
+        snapshot, ms = timed(lambda: BinarySnapshot(storages["binary"].products_file))
+        print(f"  binary open (directory only)         {ms:8.2f} ms")
+        _, ms = timed(lambda: snapshot.column('price'))
+        print(f"  binary price column                  {ms:8.1f} ms")
+        _, ms = timed(snapshot.table)
+        print(f"  binary whole catalog as ProductTable {ms:8.0f} ms")
+        snapshot.close()
+
+        for name, storage in storages.items():
+            _, page_ms = timed(lambda: storage.page_products(0, PAGE))
+            _, middle_ms = timed(lambda: storage.page_products(n // 2, PAGE))
+            loaded, load_ms = timed(storage.load_products)
+            print(f"  {name:6} first page {page_ms:7.1f} ms  middle page {middle_ms:7.1f} ms  "
+                  f"load_products {load_ms:8.0f} ms")
+            del loaded
+
+        for name, storage in storages.items():
+            repo = ProductRepository(storage)
+            _, ms = timed(repo.count)
+            print(f"  {name:6} repository cold start {ms:8.0f} ms")
+            repo.close()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    for n in sizes:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Sắp xếp bảng sản phẩm theo cột: thứ tự dựng sẵn trong SortIndex so với
+sắp xếp lại từ chuỗi hiển thị
+
+Cách cũ (mốc so sánh): đọc lại giá trị từ chuỗi đã định dạng ("150,000
+VNĐ") rồi sắp xếp toàn bộ mỗi lần bấm. Cách mới: lần đầu dựng thứ tự của
+cột từ giá trị gốc, các lần sau chỉ chép thứ tự có sẵn; sau mỗi lần sửa
+sản phẩm thứ tự được cập nhật tại chỗ chứ không sắp xếp lại.
+Chạy: python benchmarks/bench_sort.py [số sản phẩm]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_journal import write_json_atomic
+from product_repository import ProductRepository
+from sample_data import make_products
+from storage import JsonStorage
+
+EDITS = 200
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def display_sort(products, column, descending=False):
+    """Cách cũ: sắp xếp theo giá trị đọc lại từ cột hiển thị"""
+    rows = [(p.get('id'), p.get('name', ''), p.get('category', ''),
+             f"{p.get('price', 0):,} VNĐ", p.get('quantity', 0), p.get('created_at', ''))
+            for p in products]
+    if column == 3:
+        key = lambda row: float(row[3].replace(' VNĐ', '').replace(',', ''))
+    else:
+        key = lambda row: row[column]
+    return sorted(rows, key=key, reverse=descending)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        products = make_products(n, seed=1)
+        for i, product in enumerate(products, 1):
+            product['id'] = i
+        filename = os.path.join(tmp, "products.json")
+        write_json_atomic(filename, products, fsync=False)
+        del products
+
+        repo = ProductRepository(JsonStorage(filename, os.path.join(tmp, "users.json")))
+        try:
+            catalog = repo.all()
+            print(f"{n:,} products")
+            _, ms = timed(lambda: display_sort(catalog, 3))
+            print(f"  display strings, price           {ms:8.1f} ms per click")
+            _, ms = timed(lambda: display_sort(catalog, 1))
+            print(f"  display strings, name            {ms:8.1f} ms per click")
+
+            for field in ('price', 'name', 'category', 'quantity', 'created_at'):
+                _, ms = timed(lambda: repo.sort(repo.all(), [(field, False)]))
+                print(f"  build order, {field:19} {ms:8.1f} ms (first click only)")
+            _, ms = timed(lambda: repo.sort(repo.all(), [('price', True)]))
+            print(f"  cached order, price desc         {ms:8.1f} ms")
+            keys = [('category', False), ('price', True)]
+            _, ms = timed(lambda: repo.sort(repo.all(), keys))
+            print(f"  category, price desc             {ms:8.1f} ms")
+            _, ms = timed(lambda: repo.sort(repo.all(), keys))
+            print(f"  same again (ranks cached)        {ms:8.1f} ms")
+
+            ids = [p['id'] for p in repo.all()]
+            started = time.perf_counter()
+            for _ in range(EDITS):
+                repo.update(random.choice(ids), {'price': random.randint(50, 900) * 1000},
+                            wait=False)
+            edit_ms = (time.perf_counter() - started) * 1000 / EDITS
+            _, ms = timed(lambda: repo.sort(repo.all(), [('price', False)]))
+            print(f"  update (5 orders maintained)     {edit_ms:8.3f} ms per edit")
+            print(f"  re-sort by price after edits     {ms:8.1f} ms")
+            _, ms = timed(lambda: repo.sort(repo.all(), keys))
+            print(f"  category, price desc after edits {ms:8.1f} ms")
+
+            for query in ("ao", "xanh"):
+                view = repo.search(query)
+                _, ms = timed(lambda: repo.sort(view, keys))
+                print(f"  search {query!r:8} ({len(view):7,} rows)   {ms:8.1f} ms")
+            repo.flush()
+        finally:
+            repo.close()
+
+
+if __name__ == "__main__":
+    main()
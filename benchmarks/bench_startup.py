@@ -0,0 +1,121 @@
+"""Thời gian khởi động lạnh: tới lúc nạp xong module, hiện màn hình đăng nhập
+và hiện catalog sau khi đăng nhập
+
+Mỗi lần đo chạy một tiến trình mới trong thư mục tạm có sẵn dữ liệu mẫu.
+So sánh cách khởi động hiện tại (nạp trễ, đọc trước catalog trong lúc gõ
+mật khẩu) với cách cũ (nạp requests ngay, chỉ đọc catalog sau khi đăng
+nhập). Các bước cần giao diện chỉ chạy khi có màn hình hoặc Xvfb.
+Chạy: python benchmarks/bench_startup.py [số sản phẩm] [số lần chạy] [thời gian gõ ms]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from product_journal import write_json_atomic
+from sample_data import make_products
+from suite import start_virtual_display
+
+STAGES = ("imported", "login_screen", "catalog_shown")
+
+# Runs in the child, in the data directory; prints each stage as it is reached
+CHILD = r"""
+import sys, time
+sys.path.insert(0, {root!r})
+eager, gui, typing_ms = {eager!r}, {gui!r}, {typing_ms!r}
+if eager:
+    import catalog_sync
+import main
+print("imported", flush=True)
+if gui:
+    from ql_shop_quan_ao import ClothingShopManager
+    if eager:
+        ClothingShopManager.start_prefetch = lambda self: None
+    app = ClothingShopManager()
+    app.root.update()
+    print("login_screen", flush=True)
+    deadline = time.perf_counter() + typing_ms / 1000
+    while time.perf_counter() < deadline:
+        app.root.update()
+        time.sleep(0.005)
+    app.username_entry.insert(0, "admin")
+    app.password_entry.insert(0, "admin123")
+    clicked = time.perf_counter()
+    app.login()
+    while app.loader is not None and app.loader.running():
+        app.root.update()
+        time.sleep(0.001)
+    app.root.update()
+    print("catalog_shown %.1f %d" % ((time.perf_counter() - clicked) * 1000,
+                                     len(app.product_view.rows)), flush=True)
+    app.root.destroy()
+    if app.watcher is not None:
+        app.watcher.stop()
+    app.product_repo.close()
+"""
+
+
+def run_once(directory, eager, gui, typing_ms):
+    """Các mốc (ms kể từ lúc tạo tiến trình) và thời gian từ bấm đăng nhập tới lúc hiện catalog"""
+    code = CHILD.format(root=ROOT, eager=eager, gui=gui, typing_ms=typing_ms)
+    env = dict(os.environ, SHOP_STORAGE="json")
+    started = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-c", code], cwd=directory, env=env,
+                             stdout=subprocess.PIPE, universal_newlines=True)
+    stages = {}
+    after_login = None
+    for line in child.stdout:
+        parts = line.split()
+        if parts and parts[0] in STAGES:
+            stages[parts[0]] = (time.perf_counter() - started) * 1000
+            if parts[0] == "catalog_shown":
+                after_login = float(parts[1])
+    child.wait()
+    return stages, after_login
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:]]
+    n = args[0] if args else 100000
+    runs = args[1] if len(args) > 1 else 5
+    typing_ms = args[2] if len(args) > 2 else 2000
+
+    xvfb = start_virtual_display()
+    gui = bool(os.environ.get('DISPLAY')) or sys.platform in ('win32', 'darwin')
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            products = make_products(n, seed=1)
+            for i, product in enumerate(products, 1):
+                product['id'] = i
+            write_json_atomic(os.path.join(tmp, "products.json"), products, fsync=False)
+            del products
+
+            print(f"{n} products, {runs} runs each, "
+                  f"{'time to type the password ' + str(typing_ms) + ' ms' if gui else 'no display: import only'}")
+            for label, eager in (("eager (old)", True), ("lazy + prefetch", False)):
+                results = [run_once(tmp, eager, gui, typing_ms) for _ in range(runs)]
+                line = f"  {label:16}"
+                for stage in STAGES[:2]:
+                    value = median([stages[stage] for stages, _ in results if stage in stages])
+                    if value is not None:
+                        line += f" {stage} {value:6.0f} ms"
+                shown = median([after for _, after in results if after is not None])
+                if shown is not None:
+                    line += f"  login -> catalog {shown:6.0f} ms"
+                print(line)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+
+if __name__ == "__main__":
+    main()
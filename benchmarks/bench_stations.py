@@ -0,0 +1,123 @@
+"""Hai máy bán hàng dùng chung một products.json: đo độ trễ thấy thay đổi
+
+Tiến trình con (máy B) sửa và thêm sản phẩm theo nhịp; máy A theo dõi file
+bằng ChangeWatcher và chỉ áp dụng các bản ghi bị đổi. In ra độ trễ từ lúc
+B ghi xong tới lúc A thấy, thời gian refresh so với tải lại toàn bộ, và
+kiểm tra id thêm đồng thời từ hai máy không bị trùng.
+Chạy: python benchmarks/bench_stations.py [số sản phẩm] [số lần sửa]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from change_watcher import ChangeWatcher
+from product_journal import write_json_atomic
+from product_repository import ProductRepository
+from sample_data import make_products
+from storage import JsonStorage
+
+INTERVAL_MS = 50
+
+
+def open_repo(path):
+    return ProductRepository(JsonStorage(path, os.devnull))
+
+
+def station_b(path, edits):
+    """Máy B: sửa giá một sản phẩm, ghi thời điểm ghi xong vào trường 'stamp'"""
+    repo = open_repo(path)
+    ids = [p['id'] for p in repo.all()]
+    for i in range(edits):
+        if i % 5 == 4:
+            repo.add({"name": f"B mới {i}", "category": "Áo", "price": 1, "quantity": 1,
+                      "stamp": time.time()})
+        else:
+            repo.update(ids[i * 7919 % len(ids)], {"price": i, "stamp": time.time()})
+        time.sleep(INTERVAL_MS / 1000)
+    repo.close()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--station-b':
+        station_b(sys.argv[2], int(sys.argv[3]))
+        return
+    args = [int(arg) for arg in sys.argv[1:]]
+    n = args[0] if args else 100000
+    edits = args[1] if len(args) > 1 else 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "products.json")
+        products = make_products(n, seed=1)
+        for i, product in enumerate(products, 1):
+            product['id'] = i
+        write_json_atomic(path, products, fsync=False)
+
+        repo = open_repo(path)
+        repo.count()
+        latencies = []
+        refresh_ms = []
+        lock = threading.Lock()
+
+        def on_change():
+            started = time.perf_counter()
+            changed = repo.refresh()
+            if changed is None:
+                return False
+            elapsed = (time.perf_counter() - started) * 1000
+            now = time.time()
+            with lock:
+                refresh_ms.append(elapsed)
+                for product_id in changed:
+                    product = repo.get(product_id)
+                    if product is not None and 'stamp' in product:
+                        latencies.append((now - product['stamp']) * 1000)
+            return True
+
+        watcher = ChangeWatcher(repo.storage.watch_paths(), on_change).start()
+        child = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--station-b',
+                                  path, str(edits)])
+        # Station A inserts too, at the same time, so ids are contended
+        for i in range(edits // 5):
+            repo.add({"name": f"A mới {i}", "category": "Quần", "price": 1, "quantity": 1})
+            time.sleep(INTERVAL_MS * 5 / 1000)
+        child.wait()
+        time.sleep(1)
+        watcher.stop()
+        repo.close()
+
+        started = time.perf_counter()
+        fresh = open_repo(path)
+        reopened = sorted((p['id'], p['name']) for p in fresh.all())
+        full_ms = (time.perf_counter() - started) * 1000
+        fresh.close()
+        ids = [pid for pid, _ in reopened]
+
+        latencies.sort()
+        refresh_ms.sort()
+        print(f"{n} products, station B: {edits} edits every {INTERVAL_MS} ms, "
+              f"watcher mode: {watcher.mode}")
+        if latencies:
+            print(f"  visible on A after: p50 {latencies[len(latencies) // 2]:.0f} ms, "
+                  f"max {latencies[-1]:.0f} ms ({len(latencies)} changes seen)")
+        if refresh_ms:
+            print(f"  incremental refresh: p50 {refresh_ms[len(refresh_ms) // 2]:.2f} ms, "
+                  f"max {refresh_ms[-1]:.2f} ms")
+        print(f"  full reload instead: {full_ms:.0f} ms")
+        with open(path + '.journal', encoding='utf-8') as f:
+            journal = [json.loads(line) for line in f if line.strip()]
+        inserted = sum(1 for entry in journal if entry['op'] == 'insert')
+        # A reused id would overwrite a product on replay, so count them
+        print(f"  {inserted} concurrent inserts, none lost: {len(ids) == n + inserted}, "
+              f"catalog on disk == catalog in A: "
+              f"{reopened == sorted((p['id'], p['name']) for p in repo.all())}")
+
+
+if __name__ == "__main__":
+    main()
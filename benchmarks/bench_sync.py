@@ -0,0 +1,169 @@
+"""Đo tốc độ đồng bộ catalog với một máy chủ API giả lập chạy tại chỗ
+
+Máy chủ trả về các trang JSON có ETag/Last-Modified, trả 304 khi trang
+không đổi, chậm LATENCY_MS mỗi yêu cầu và thỉnh thoảng trả 503 để thử
+cơ chế thử lại.
+Chạy: python benchmarks/bench_sync.py [số sản phẩm]
+      python benchmarks/bench_sync.py --serve [số sản phẩm]   (chỉ chạy máy chủ)
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_sync import CatalogSync
+from product_repository import ProductRepository
+from sample_data import make_products
+from storage import JsonStorage
+
+PER_PAGE = 100
+LATENCY_MS = 20
+FAILURE_RATE = 0.03
+LAST_MODIFIED = "Sun, 25 May 2025 09:45:00 GMT"
+
+
+class StubSupplierServer:
+    """Máy chủ HTTP giả lập API phân trang của nhà cung cấp"""
+
+    def __init__(self, products, latency_ms=LATENCY_MS, failure_rate=FAILURE_RATE, port=0):
+        self.products = products
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.not_modified = 0
+        self.failures = 0
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(7)
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the client's connection pool is exercised
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/products"
+        self._thread = threading.Thread(target=self.httpd.serve_forever)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def page(self, page, per_page):
+        key = (page, per_page)
+        with self._lock:
+            cached = self._pages.get(key)
+        if cached is None:
+            total_pages = max(1, -(-len(self.products) // per_page))
+            items = self.products[(page - 1) * per_page:page * per_page]
+            body = json.dumps({"items": items, "page": page, "total_pages": total_pages},
+                              ensure_ascii=False).encode('utf-8')
+            cached = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+            with self._lock:
+                self._pages[key] = cached
+        return cached
+
+    def handle(self, request):
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(self.latency_ms / 1000)
+        if fail:
+            with self._lock:
+                self.failures += 1
+            self._send(request, 503, b'', {'Retry-After': '0'})
+            return
+
+        query = parse_qs(urlparse(request.path).query)
+        page = int(query.get('page', ['1'])[0])
+        per_page = int(query.get('per_page', [str(PER_PAGE)])[0])
+        body, etag = self.page(page, per_page)
+        if request.headers.get('If-None-Match') == etag:
+            with self._lock:
+                self.not_modified += 1
+            self._send(request, 304, b'', {'ETag': etag})
+            return
+        self._send(request, 200, body, {'ETag': etag, 'Last-Modified': LAST_MODIFIED,
+                                        'Content-Type': 'application/json; charset=utf-8'})
+
+    @staticmethod
+    def _send(request, status, body, headers):
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        if body:
+            request.wfile.write(body)
+
+
+def run_sync(url, path, cache_file, parallelism):
+    repo = ProductRepository(JsonStorage(path, os.devnull, fsync=False))
+    sync = CatalogSync(url, repo, parallelism=parallelism, per_page=PER_PAGE,
+                       cache_file=cache_file, backoff_base=0.05)
+    try:
+        report = sync.run(defaults={"source": "API"})
+    finally:
+        sync.close()
+    return report, repo.count()
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    n = int(args[0]) if args else 20000
+    products = make_products(n, seed=1)
+
+    if '--serve' in sys.argv:
+        server = StubSupplierServer(products, port=8765).start()
+        print(f"Serving {n} products at {server.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    server = StubSupplierServer(products).start()
+    print(f"{n} products, {PER_PAGE}/page, {LATENCY_MS} ms latency, "
+          f"{FAILURE_RATE:.0%} injected 503s")
+    print(f"{'run':>22} {'pages':>6} {'304':>5} {'retries':>8} {'failed':>7} "
+          f"{'seconds':>8} {'pages/s':>8} {'records/s':>10} {'catalog':>8}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = [("sequential, cold", 1, "seq"), ("parallel 8, cold", 8, "par"),
+                    ("parallel 8, unchanged", 8, "par")]
+            for label, parallelism, name in runs:
+                path = os.path.join(tmp, f"products_{name}.json")
+                cache_file = os.path.join(tmp, f"sync_cache_{name}.json")
+                report, count = run_sync(server.url, path, cache_file, parallelism)
+                print(f"{label:>22} {report['pages']:>6} {report['not_modified']:>5} "
+                      f"{report['retries']:>8} {report['failed']:>7} {report['seconds']:>8.2f} "
+                      f"{report['pages_per_sec']:>8.1f} {report['records_per_sec']:>10.0f} "
+                      f"{count:>8}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
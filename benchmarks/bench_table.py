@@ -0,0 +1,91 @@
+"""Bộ nhớ mỗi sản phẩm: mỗi sản phẩm một dict so với ProductTable theo cột
+
+Sinh catalog theo từng lô, cho mỗi lô đi qua json.dumps/json.loads như
+khi đọc products.json, đo kích thước thật của các dict (dict, giá trị,
+không tính khóa vì json dùng chung), rồi chuyển lô vào ProductTable và bỏ
+dict đi, nên không lúc nào phải giữ cả catalog dạng dict. Cả hai cách đều
+có thêm danh sách sản phẩm và dict id -> sản phẩm của ProductRepository;
+phần đó như nhau nên không tính, trừ đối tượng ProductRow.
+Đo hai lần: dữ liệu mẫu (tên/mô tả lặp lại nhiều) và khi mọi tên, mô tả
+đều khác nhau.
+Chạy: python benchmarks/bench_table.py [số sản phẩm]
+"""
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_table import ProductTable
+from sample_data import make_products
+
+CHUNK = 100000
+FIELDS = ('name', 'category', 'price', 'quantity', 'brand')
+
+
+def dict_bytes(products):
+    """Dict và các giá trị của chúng (mỗi đối tượng tính một lần)"""
+    seen = set()
+    total = 0
+    for product in products:
+        total += sys.getsizeof(product)
+        for value in product.values():
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+    return total
+
+
+def measure(n, unique):
+    table = ProductTable()
+    rows = []
+    dict_total = 0
+    convert_s = 0.0
+    sample = None
+    for start in range(0, n, CHUNK):
+        chunk = make_products(min(CHUNK, n - start), seed=start, prefix=f"S{start // CHUNK}")
+        for i, product in enumerate(chunk, start + 1):
+            product['id'] = i
+            if unique:
+                product['name'] += f" #{i}"
+                product['description'] += f" Lô {i}."
+        chunk = json.loads(json.dumps(chunk, ensure_ascii=False))
+        dict_total += dict_bytes(chunk)
+        if sample is None:
+            sample = chunk[:1000]
+        started = time.perf_counter()
+        rows.extend(table.extend(chunk))
+        convert_s += time.perf_counter() - started
+        del chunk
+
+    usage = table.memory_usage()
+    table_total = sum(usage.values())
+    row_total = sys.getsizeof(rows[0]) * len(rows)
+    print(f"{n:,} products, {'all names and descriptions distinct' if unique else 'sample data'}")
+    print(f"  dict per product:     {dict_total / n:7.0f} B  ({dict_total / 2 ** 20:,.0f} MB)")
+    print(f"  columnar per product: {(table_total + row_total) / n:7.0f} B  "
+          f"({(table_total + row_total) / 2 ** 20:,.0f} MB: table {table_total / n:.0f} B "
+          f"+ ProductRow {row_total / n:.0f} B)")
+    print("  by column (B/product): " + ", ".join(
+        f"{field} {size / n:.1f}" for field, size in sorted(usage.items(), key=lambda kv: -kv[1])))
+    print(f"  dict -> table: {convert_s / n * 1e6:.2f} us/product")
+
+    products = sample
+    views = rows[:len(products)]
+    for label, items in (("dict", products), ("ProductRow", views)):
+        per_get = timeit.timeit(lambda: [p.get(f) for p in items for f in FIELDS],
+                                number=20) / (20 * len(items) * len(FIELDS))
+        print(f"  {label:10} get(): {per_get * 1e9:5.0f} ns")
+    assert [dict(row) for row in views] == products
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for unique in (False, True):
+        measure(n, unique)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Đo thời gian đăng nhập/đăng ký theo số tài khoản
+
+So sánh cách cũ (đọc users.json, duyệt từng tài khoản, ghi lại toàn bộ
+file khi đăng ký) với UserStore (dict theo username, đăng ký ghi nối).
+Chạy: python benchmarks/bench_users.py [số tài khoản ...]
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import JsonStorage
+from user_store import UserStore
+
+SIZES = [100000, 1000000]
+LOGINS = 1000
+REGISTRATIONS = 200
+# The old path is O(users) per call; a few samples are enough
+OLD_SAMPLES = 3
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def make_users(n):
+    password = hash_password("user123")
+    return [{
+        "username": f"member{i:07d}",
+        "password": password,
+        "role": "user",
+        "created_at": "2025-05-25 16:45:00",
+    } for i in range(n)]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def old_login(path, username, password_hash):
+    with open(path, 'r', encoding='utf-8') as f:
+        users = json.load(f)
+    for user in users:
+        if user['username'] == username:
+            return user['password'] == password_hash
+    return False
+
+
+def old_register(path, user):
+    with open(path, 'r', encoding='utf-8') as f:
+        users = json.load(f)
+    if any(u['username'] == user['username'] for u in users):
+        return False
+    users.append(user)
+    text = json.dumps(users, ensure_ascii=False, indent=2)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return True
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    password_hash = hash_password("user123")
+    print(f"{'users':>9} {'old login ms':>13} {'old reg ms':>11} {'cold load ms':>13} "
+          f"{'login us':>9} {'register ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"users_{n}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(make_users(n), ensure_ascii=False, indent=2))
+            last = f"member{n - 1:07d}"
+
+            old_login_ms = timed(lambda: old_login(path, last, password_hash), OLD_SAMPLES)
+            counter = iter(range(OLD_SAMPLES))
+            old_register_ms = timed(lambda: old_register(path, {
+                "username": f"old{next(counter)}", "password": password_hash, "role": "user",
+            }), 1)
+
+            store = UserStore(JsonStorage(os.devnull, path, compact_threshold=float('inf')))
+            cold_ms = timed(lambda: store.authenticate(last, password_hash), 1)
+            names = [f"member{random.randrange(n):07d}" for _ in range(LOGINS)]
+            start = time.perf_counter()
+            for name in names:
+                assert store.authenticate(name, password_hash) is not None
+            login_us = (time.perf_counter() - start) / LOGINS * 1e6
+
+            counter = iter(range(REGISTRATIONS))
+            register_ms = timed(lambda: store.register({
+                "username": f"new{next(counter)}", "password": password_hash, "role": "user",
+            }), REGISTRATIONS)
+            # A fresh store sees the appended accounts
+            assert UserStore(JsonStorage(os.devnull, path)).get("new0") is not None
+
+            print(f"{n:>9} {old_login_ms:>13.1f} {old_register_ms:>11.1f} {cold_ms:>13.1f} "
+                  f"{login_us:>9.2f} {register_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
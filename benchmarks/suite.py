@@ -0,0 +1,374 @@
+"""Bộ benchmark không cần giao diện, xuất kết quả JSON để so sánh giữa các phiên bản
+
+Với mỗi kích thước catalog (mặc định 1k, 10k, 100k, 1M sản phẩm, mỗi kích
+thước chạy trong một tiến trình riêng) đo: sinh dữ liệu, lưu, tải, thêm/sửa/
+xóa, tìm kiếm lần đầu và lặp lại, hiển thị Treeview (khi có màn hình hoặc
+Xvfb). Với 100k tài khoản đo: tải, đăng nhập, đăng ký.
+
+Chạy: python benchmarks/suite.py [--sizes 1000,10000] [--users 100000]
+          [--backend json|binary|sqlite] [--ops 200] [--output results.json]
+          [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from product_journal import write_json_atomic
+from sample_data import make_products, make_users
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+SIZES = [1000, 10000, 100000, 1000000]
+USERS = 100000
+OPS = 200
+LOGINS = 1000
+QUERIES = ["áo thun", "quan jean", "nike", "đỏ", "vay midi hoa"]
+TREE_PAGES = 50
+# A metric this much worse than the baseline is reported as a regression,
+# unless the difference is within timer noise
+REGRESSION_RATIO = 1.2
+NOISE_MS = 0.1
+
+
+def ms_since(started):
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(samples):
+    """Trung bình và p95 (ms) của các lần đo"""
+    ordered = sorted(samples)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_storage(backend, tmp):
+    from storage import BinaryStorage, JsonStorage, SQLiteStorage
+
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(tmp, "shop.db"))
+    if backend == "binary":
+        return BinaryStorage(os.path.join(tmp, "products.snap"), os.path.join(tmp, "users.json"))
+    return JsonStorage(os.path.join(tmp, "products.json"), os.path.join(tmp, "users.json"))
+
+
+def bench_treeview(products):
+    """Thời gian đưa catalog lên bảng ảo và cuộn qua TREE_PAGES trang"""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+
+        root = tk.Tk()
+    except Exception as e:
+        return {"skipped": f"no display ({str(e).splitlines()[0]})"}
+    from virtual_list import VirtualTreeview
+
+    try:
+        columns = ('ID', 'Tên sản phẩm', 'Loại', 'Giá', 'Số lượng', 'Mô tả')
+        tree = ttk.Treeview(root, columns=columns, show='headings', height=25)
+        scrollbar = ttk.Scrollbar(root, orient='vertical')
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        root.update()
+
+        def format_row(position, product):
+            return (product['id'], product['name'], product['category'],
+                    f"{product['price']:,} VNĐ", product['quantity'], product['description'][:50])
+
+        view = VirtualTreeview(tree, scrollbar, format_row, key=lambda p: p['id'])
+        started = time.perf_counter()
+        view.set_rows(products)
+        root.update()
+        populate = ms_since(started)
+
+        samples = []
+        for _ in range(TREE_PAGES):
+            started = time.perf_counter()
+            view._scroll_by(view.visible)
+            root.update()
+            samples.append(ms_since(started))
+        return {"populate_ms": populate, "page_ms": summary(samples)}
+    finally:
+        root.destroy()
+
+
+def bench_catalog(size, backend, ops):
+    """Đo một kích thước catalog; chạy trong tiến trình riêng"""
+    from product_repository import ProductRepository
+
+    result = {"size": size, "backend": backend}
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        products = make_products(size, seed=size)
+        for product_id, product in enumerate(products, 1):
+            product['id'] = product_id
+        result["generate_ms"] = ms_since(started)
+
+        storage = make_storage(backend, tmp)
+        started = time.perf_counter()
+        if backend == "sqlite":
+            storage.write_products([{"op": "insert", "product": p} for p in products])
+        else:
+            storage.compact(products)
+        result["save_ms"] = ms_since(started)
+        del products
+        storage.close()
+
+        storage = make_storage(backend, tmp)
+        repo = ProductRepository(storage)
+        started = time.perf_counter()
+        repo.count()
+        result["load_ms"] = ms_since(started)
+
+        samples = []
+        for i in range(ops):
+            started = time.perf_counter()
+            repo.add({"name": f"Sản phẩm thử {i}", "category": "Áo", "price": 100000,
+                      "quantity": 10, "description": "Hàng mới về"})
+            samples.append(ms_since(started))
+        result["add_ms"] = summary(samples)
+
+        samples = []
+        for i in range(ops):
+            product_id = 1 + (i * 7919) % size
+            started = time.perf_counter()
+            repo.update(product_id, {"price": 100000 + i, "quantity": i})
+            samples.append(ms_since(started))
+        result["update_ms"] = summary(samples)
+
+        samples = []
+        for i in range(ops):
+            product_id = 1 + (i * 104729) % size
+            started = time.perf_counter()
+            repo.delete(product_id)
+            samples.append(ms_since(started))
+        result["delete_ms"] = summary(samples)
+
+        # Cold: a freshly loaded catalog, each query run for the first
+        # time; warm: the same queries again
+        repo.close()
+        storage.close()
+        repo = ProductRepository(make_storage(backend, tmp))
+        repo.count()
+        for label in ("search_cold_ms", "search_warm_ms"):
+            samples = []
+            for query in QUERIES:
+                started = time.perf_counter()
+                repo.search(query)
+                samples.append(ms_since(started))
+            result[label] = summary(samples)
+
+        result["treeview"] = bench_treeview(repo.all())
+        repo.close()
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def bench_users(count, backend, ops):
+    """Đăng nhập/đăng ký với count tài khoản"""
+    from user_store import UserStore
+
+    result = {"users": count, "backend": backend}
+    users = make_users(count, seed=count)
+    password_hash = users[0]["password"]
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = make_storage(backend, tmp)
+        started = time.perf_counter()
+        if backend == "sqlite":
+            storage.init_users(users)
+        else:
+            write_json_atomic(storage.users_file, users, fsync=False)
+        result["save_ms"] = ms_since(started)
+
+        store = UserStore(storage)
+        started = time.perf_counter()
+        store.authenticate(users[-1]["username"], password_hash)
+        result["login_cold_ms"] = ms_since(started)
+
+        samples = []
+        for i in range(LOGINS):
+            username = users[(i * 7919) % count]["username"]
+            started = time.perf_counter()
+            store.authenticate(username, password_hash)
+            samples.append(ms_since(started))
+        result["login_warm_ms"] = summary(samples)
+
+        samples = []
+        for i in range(ops):
+            started = time.perf_counter()
+            store.register({"username": f"new{i:05d}", "password": password_hash,
+                            "role": "user", "created_at": "2025-05-25 16:45:00"})
+            samples.append(ms_since(started))
+        result["register_ms"] = summary(samples)
+        storage.close()
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_child(args):
+    """Chạy một phép đo trong tiến trình con, trả về kết quả JSON của nó"""
+    command = [sys.executable, os.path.abspath(__file__)] + args
+    completed = subprocess.run(command, stdout=subprocess.PIPE, universal_newlines=True)
+    if completed.returncode != 0:
+        return {"error": f"exit code {completed.returncode}", "args": args}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def start_virtual_display():
+    """Chạy Xvfb nếu không có màn hình mà máy có cài; trả về tiến trình hoặc None"""
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin') or not shutil.which('Xvfb'):
+        return None
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen(['Xvfb', display, '-nolisten', 'tcp', '-screen', '0', '1280x800x24'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    if process.poll() is not None:
+        return None
+    os.environ['DISPLAY'] = display
+    return process
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              universal_newlines=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def flatten(result, prefix=""):
+    """{"add_ms": {"mean": ..}} -> {"add_ms.mean": ..}, chỉ giữ số"""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(results, baseline):
+    """In (ra stderr) so sánh với baseline; trả về số chỉ số bị chậm đi"""
+    def keyed(report):
+        rows = {}
+        for row in report.get("catalog", []):
+            rows[f"catalog {row.get('backend')} {row.get('size')}"] = flatten(row)
+        for row in report.get("users", []):
+            rows[f"users {row.get('backend')} {row.get('users')}"] = flatten(row)
+        return rows
+
+    old_rows = keyed(baseline)
+    regressions = 0
+    print(f"Compared with {baseline.get('meta', {}).get('revision') or 'baseline'}:",
+          file=sys.stderr)
+    for name, metrics in keyed(results).items():
+        old = old_rows.get(name)
+        if old is None:
+            continue
+        for metric, value in metrics.items():
+            before = old.get(metric)
+            if not metric.endswith(('_ms', '.mean', '.p95', 'rss_mb')) or not before:
+                continue
+            ratio = value / before
+            flag = ""
+            if not metric.endswith('rss_mb') and abs(value - before) < NOISE_MS:
+                pass
+            elif ratio > REGRESSION_RATIO:
+                flag = "  <-- slower"
+                regressions += 1
+            elif ratio < 1 / REGRESSION_RATIO:
+                flag = "  faster"
+            print(f"  {name:<24} {metric:<22} {before:>10.2f} -> {value:>10.2f} ({ratio:.2f}x){flag}",
+                  file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite")
+    parser.add_argument('--sizes', default=",".join(map(str, SIZES)))
+    parser.add_argument('--users', type=int, default=USERS)
+    parser.add_argument('--backend', default="json", choices=("json", "binary", "sqlite"))
+    parser.add_argument('--ops', type=int, default=OPS)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None)
+    parser.add_argument('--one-catalog', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--one-users', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one_catalog is not None:
+        print(json.dumps(bench_catalog(args.one_catalog, args.backend, args.ops)))
+        return
+    if args.one_users is not None:
+        print(json.dumps(bench_users(args.one_users, args.backend, args.ops)))
+        return
+
+    display = start_virtual_display()
+    results = {
+        "suite": 1,
+        "meta": {
+            "revision": git_revision(),
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "backend": args.backend,
+            "ops": args.ops,
+            "display": "xvfb" if display else ("yes" if os.environ.get('DISPLAY') else "none"),
+        },
+        "catalog": [],
+        "users": [],
+    }
+    try:
+        for size in [int(s) for s in args.sizes.split(",") if s]:
+            print(f"catalog {size:,} ({args.backend})...", file=sys.stderr)
+            results["catalog"].append(run_child(['--one-catalog', str(size), '--backend',
+                                                 args.backend, '--ops', str(args.ops)]))
+        if args.users:
+            print(f"users {args.users:,} ({args.backend})...", file=sys.stderr)
+            results["users"].append(run_child(['--one-users', str(args.users), '--backend',
+                                               args.backend, '--ops', str(args.ops)]))
+    finally:
+        if display is not None:
+            display.terminate()
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""Snapshot catalog nhị phân, đọc qua mmap
+
+Mỗi trường một cột: id, giá, số lượng là mảng số 8 byte (int64, hoặc
+float64 khi có giá lẻ); các trường chữ là mảng mã (1/2/4 byte mỗi dòng)
+trỏ vào bảng chuỗi của trường đó, mỗi giá trị khác nhau lưu một lần
+(cùng cách ProductTable giữ trong bộ nhớ). Giá trị không vừa cột (giá là
+chuỗi, ...) và trường lạ nằm riêng trong một khối JSON nhỏ.
+
+File được mmap, nên đọc một trang hay một cột chỉ chạm tới các byte đó;
+đọc cả catalog là chép từng cột một lượt thay vì phân tích JSON từng ký
+tự. JSON vẫn là định dạng nhập/xuất: xem lệnh bên dưới.
+
+Chạy: python binary_snapshot.py from-json <products.json> <products.snap>
+      python binary_snapshot.py to-json <products.snap> <products.json>
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate, chain, repeat
+
+from product_table import ProductTable, columns_of
+
+MAGIC = b'SHOPSNP1'
+# Magic, then the offset of the directory (JSON, at the end of the file)
+_HEADER = struct.Struct('<8sQ')
+# Field order of the products read back, as in the usual product dict
+FIELDS = ('id', 'sku', 'name', 'category', 'price', 'quantity', 'description',
+          'brand', 'color', 'size', 'source', 'created_at', 'created_by', 'updated_at',
+          'updated_by')
+NUMBER_FIELDS = ProductTable.NUMBER_FIELDS
+# Codes 0 and 1 are "no value" and None; strings start at 2
+_FIRST_STRING = 2
+_CODE_TYPES = (('B', 2 ** 8), ('H', 2 ** 16), ('I', 2 ** 32))
+_INT_MIN = -2 ** 63
+_INT_MAX = 2 ** 63 - 1
+_FLOAT_INT_MAX = 2 ** 53
+# Reading fewer rows than the strings of a field / this decodes only the
+# strings those rows use; more decodes the whole string table once
+_LAZY_STRINGS = 4
+
+_MISSING = object()
+
+
+class SnapshotError(ValueError):
+    """File không phải snapshot nhị phân hợp lệ"""
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _encode_numbers(field, values, extras):
+    kinds = set(map(type, values))
+    if values and kinds <= {int} and _INT_MIN < min(values) and max(values) <= _INT_MAX:
+        return array('q', values)
+    # Same rules as ProductTable: whole floats stay integers, a fraction
+    # turns the column into doubles, anything else goes to the extras
+    floats = any(type(value) is float and value == value and not value.is_integer()
+                 for value in values)
+    out = array('d' if floats else 'q')
+    missing = float('nan') if floats else _INT_MIN
+    append = out.append
+    for row, value in enumerate(values):
+        kind = type(value)
+        if kind is int or (kind is float and value == value):
+            if floats and (kind is float or -_FLOAT_INT_MAX <= value <= _FLOAT_INT_MAX):
+                append(float(value))
+                continue
+            if not floats and _INT_MIN < value <= _INT_MAX:
+                append(int(value))
+                continue
+        if value is not _MISSING:
+            extras.setdefault(row, {})[field] = value
+        append(missing)
+    return out
+
+
+def _encode_text(field, values, extras):
+    if not set(map(type, values)) <= {str, type(None), object}:
+        # Numbers, lists, ... in a text field: kept as they are in the extras
+        for row, value in enumerate(values):
+            if value is not _MISSING and value is not None and type(value) is not str:
+                extras.setdefault(row, {})[field] = value
+                values[row] = _MISSING
+    strings = [value for value in dict.fromkeys(values)
+               if value is not _MISSING and value is not None]
+    lookup = dict(zip(strings, range(_FIRST_STRING, _FIRST_STRING + len(strings))))
+    lookup[_MISSING] = 0
+    lookup[None] = 1
+    for typecode, limit in _CODE_TYPES:
+        if len(lookup) <= limit:
+            break
+    codes = array(typecode, map(lookup.__getitem__, values))
+    text = ''.join(strings)
+    chars = array('Q', chain((0,), accumulate(map(len, strings))))
+    if text.isascii():
+        blob = text.encode('ascii')
+        offsets = chars
+    else:
+        blob = text.encode('utf-8')
+        offsets = array('Q', chain((0,), accumulate(len(s.encode('utf-8')) for s in strings)))
+    return codes, chars, offsets, blob, len(strings)
+
+
+def write_snapshot(path, products, fsync=True):
+    """Ghi products (danh sách dict hoặc ProductRow) ra path (file tạm rồi đổi tên)"""
+    products = products if isinstance(products, list) else list(products)
+    extras = {}
+    directory = {"rows": len(products), "columns": {}}
+    tmp_name = f"{path}.tmp"
+    with open(tmp_name, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, 0))
+
+        def section(data):
+            offset = f.tell()
+            f.write(data)
+            # Keep every array 8-byte aligned
+            f.write(b'\0' * (-f.tell() % 8))
+            return offset
+
+        for field in FIELDS:
+            values = columns_of(products, (field,), _MISSING)[0]
+            if field in NUMBER_FIELDS:
+                numbers = _encode_numbers(field, values, extras)
+                directory["columns"][field] = {
+                    "kind": "number", "type": numbers.typecode,
+                    "offset": section(_little_endian(numbers).tobytes())}
+                continue
+            codes, chars, offsets, blob, count = _encode_text(field, values, extras)
+            directory["columns"][field] = {
+                "kind": "text", "type": codes.typecode, "strings": count,
+                "offset": section(_little_endian(codes).tobytes()),
+                "chars": section(_little_endian(chars).tobytes()),
+                "bytes": section(_little_endian(offsets).tobytes()),
+                "blob": section(blob), "blob_size": len(blob)}
+        # Fields outside the columns
+        known = set(FIELDS)
+        for row, product in enumerate(products):
+            if len(product) > len(known) or not known.issuperset(product):
+                for field, value in product.items():
+                    if field not in known:
+                        extras.setdefault(row, {})[field] = value
+        data = json.dumps({str(row): fields for row, fields in extras.items()},
+                          ensure_ascii=False).encode('utf-8')
+        directory["extras"] = [section(data), len(data)]
+
+        directory_at = f.tell()
+        f.write(json.dumps(directory).encode('utf-8'))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, directory_at))
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp_name, path)
+
+
+def is_snapshot(path):
+    """True nếu path là snapshot nhị phân"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class BinarySnapshot:
+    """Snapshot nhị phân mở bằng mmap; đọc theo dòng hoặc theo cột
+
+    Mở file chỉ đọc phần mục lục ở cuối file; các cột và bảng chuỗi được
+    đọc khi cần (bảng chuỗi của một trường được giải mã một lần rồi giữ lại).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise SnapshotError(f"{path}: không phải snapshot nhị phân")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, directory_at = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise SnapshotError(f"{path}: không phải snapshot nhị phân")
+            directory = json.loads(self._map[directory_at:].decode('utf-8'))
+            self.rows = directory["rows"]
+            self._columns = directory["columns"]
+            self._extras_at = directory["extras"]
+        except (struct.error, ValueError, KeyError, TypeError) as e:
+            self.close()
+            if isinstance(e, SnapshotError):
+                raise
+            raise SnapshotError(f"{path}: snapshot hỏng ({e})")
+        self._strings = {}
+        self._extras = None
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def _range(self, start, stop):
+        stop = self.rows if stop is None else min(stop, self.rows)
+        return min(max(0, start), stop), stop
+
+    def _array(self, typecode, offset, start, stop):
+        values = array(typecode)
+        size = values.itemsize
+        values.frombytes(self._map[offset + start * size:offset + stop * size])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def _string_table(self, field):
+        table = self._strings.get(field)
+        if table is None:
+            info = self._columns[field]
+            text = self._map[info["blob"]:info["blob"] + info["blob_size"]].decode('utf-8')
+            chars = self._array('Q', info["chars"], 0, info["strings"] + 1)
+            table = [_MISSING, None]
+            table.extend([text[a:b] for a, b in zip(chars, chars[1:])])
+            self._strings[field] = table
+        return table
+
+    def _string(self, field, code):
+        if code < _FIRST_STRING:
+            return (_MISSING, None)[code]
+        info = self._columns[field]
+        index = code - _FIRST_STRING
+        a, b = self._array('Q', info["bytes"], index, index + 2)
+        return self._map[info["blob"] + a:info["blob"] + b].decode('utf-8')
+
+    def _column(self, field, start, stop):
+        info = self._columns.get(field)
+        if info is None:
+            return [_MISSING] * (stop - start)
+        values = self._array(info["type"], info["offset"], start, stop)
+        if info["kind"] == "number":
+            if info["type"] == 'q':
+                values = values.tolist()
+                if _INT_MIN in values:
+                    values = [_MISSING if value == _INT_MIN else value for value in values]
+                return values
+            return [_MISSING if value != value else int(value) if value.is_integer() else value
+                    for value in values]
+        if field in self._strings or len(values) * _LAZY_STRINGS >= info["strings"]:
+            table = self._string_table(field)
+        else:
+            # A page: decode just the strings its rows use
+            table = {code: self._string(field, code) for code in set(values)}
+        return list(map(table.__getitem__, values))
+
+    def _extras_map(self):
+        if self._extras is None:
+            offset, size = self._extras_at
+            data = json.loads(self._map[offset:offset + size].decode('utf-8'))
+            self._extras = {int(row): fields for row, fields in data.items()}
+        return self._extras
+
+    def column(self, field, start=0, stop=None, default=None):
+        """Giá trị của field ở các dòng start tới stop - 1; default nếu dòng không có"""
+        start, stop = self._range(start, stop)
+        values = self._column(field, start, stop)
+        extras = self._extras_map()
+        if _MISSING in values or extras:
+            values = [extras[row].get(field, default) if row in extras and field in extras[row]
+                      else default if value is _MISSING else value
+                      for row, value in zip(range(start, stop), values)]
+        return values
+
+    def products(self, start=0, stop=None):
+        """Các sản phẩm (dict) ở dòng start tới stop - 1, mặc định cả catalog"""
+        start, stop = self._range(start, stop)
+        names = []
+        columns = []
+        for field in FIELDS:
+            values = self._column(field, start, stop)
+            if values.count(_MISSING) < len(values):
+                names.append(field)
+                columns.append(values)
+        if columns:
+            products = list(map(dict, map(zip, repeat(names), zip(*columns))))
+        else:
+            products = [{} for _ in range(stop - start)]
+        for name, values in zip(names, columns):
+            if _MISSING in values:
+                for product, value in zip(products, values):
+                    if value is _MISSING:
+                        del product[name]
+        for row, fields in self._extras_map().items():
+            if start <= row < stop:
+                products[row - start].update(fields)
+        return products
+
+    def table(self):
+        """Cả catalog dưới dạng (ProductTable, danh sách ProductRow), chép thẳng từng cột"""
+        columns = {}
+        for field, info in self._columns.items():
+            values = self._array(info["type"], info["offset"], 0, self.rows)
+            if info["kind"] == "number":
+                columns[field] = ("number", values)
+            else:
+                columns[field] = ("coded", values, self._string_table(field))
+        extras = {row: dict(fields) for row, fields in self._extras_map().items()}
+        return ProductTable.from_columns(self.rows, columns, extras)
+
+    def iter_products(self, batch_size=1000):
+        """Sinh lần lượt các sản phẩm, đọc từng lô batch_size dòng"""
+        for start in range(0, self.rows, batch_size):
+            yield from self.products(start, start + batch_size)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "from-json":
+        from product_import import iter_records
+
+        with open(sys.argv[2], 'rb') as f:
+            products = [record for _, record, error, _ in iter_records(f)
+                        if error is None and isinstance(record, dict)]
+        write_snapshot(sys.argv[3], products)
+        print(f"{len(products)} sản phẩm -> {sys.argv[3]}")
+    elif len(sys.argv) == 4 and sys.argv[1] == "to-json":
+        from product_journal import write_json_atomic
+
+        with BinarySnapshot(sys.argv[2]) as snapshot:
+            products = snapshot.products()
+        write_json_atomic(sys.argv[3], products)
+        print(f"{len(products)} sản phẩm -> {sys.argv[3]}")
+    else:
+        print("Usage: python binary_snapshot.py from-json <products.json> <products.snap>\n"
+              "       python binary_snapshot.py to-json <products.snap> <products.json>")
+        sys.exit(1)
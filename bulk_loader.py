@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+
+
+class _Finished:
+    """Đánh dấu luồng nền đã xong (đi sau mọi lô trong hàng đợi)"""
+
+    __slots__ = ('result', 'error')
+
+    def __init__(self, result, error):
+        self.result = result
+        self.error = error
+
+
+class BulkLoader:
+    """Nạp dữ liệu lớn theo mô hình producer/consumer
+
+    Luồng nền chạy work(emit, cancelled): đọc, phân tích, lọc dữ liệu rồi
+    gọi emit(item) cho từng lô. Luồng giao diện lấy các lô ra qua
+    root.after, mỗi lần chỉ xử lý trong một khoảng thời gian ngắn
+    (budget_ms) để cửa sổ vẫn phản hồi.
+    """
+
+    BUDGET_MS = 12
+    POLL_MS = 15
+
+    def __init__(self, root, work, on_item, on_done, budget_ms=None, poll_ms=None):
+        """
+        on_item(item) được gọi trên luồng giao diện cho từng lô
+        on_done(result, error, cancelled) được gọi một lần khi kết thúc
+        """
+        self.root = root
+        self.work = work
+        self.on_item = on_item
+        self.on_done = on_done
+        self.budget_ms = self.BUDGET_MS if budget_ms is None else budget_ms
+        self.poll_ms = self.POLL_MS if poll_ms is None else poll_ms
+
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._finished = False
+        self._thread = None
+
+        # Items handed to on_item, and the longest single drain in ms
+        self.items = 0
+        self.max_drain_ms = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        self.root.after(self.poll_ms, self._drain)
+        return self
+
+    def cancel(self):
+        """Dừng nạp; các lô chưa xử lý bị bỏ qua
+
+        Loader vẫn đang chạy (running()) cho tới khi luồng nền thoát hẳn;
+        on_done được gọi lúc đó, với cancelled=True.
+        """
+        self._cancel.set()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def running(self):
+        return not self._finished
+
+    def _run(self):
+        result = error = None
+        try:
+            result = self.work(self._queue.put, self._cancel.is_set)
+        except Exception as e:
+            error = e
+        self._queue.put(_Finished(result, error))
+
+    def _drain(self):
+        started = time.perf_counter()
+        deadline = started + self.budget_ms / 1000
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Finished):
+                if self._cancel.is_set():
+                    self._finish(None, None)
+                else:
+                    self._finish(item.result, item.error)
+                return
+            if self._cancel.is_set():
+                # Drop the batch, but stay running until the worker exits
+                continue
+            self.on_item(item)
+            self.items += 1
+            if time.perf_counter() >= deadline:
+                break
+        self.max_drain_ms = max(self.max_drain_ms, (time.perf_counter() - started) * 1000)
+
+        # Out of budget with batches still waiting: come back right after
+        # Tk has handled pending input, not a whole poll interval later
+        delay = 1 if not self._queue.empty() else self.poll_ms
+        self.root.after(delay, self._drain)
+
+    def _finish(self, result, error):
+        if self._finished:
+            return
+        self._finished = True
+        self.on_done(result, error, self._cancel.is_set())
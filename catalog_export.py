@@ -0,0 +1,204 @@
+"""Xuất catalog (hoặc kết quả tìm kiếm) ra CSV hoặc NDJSON theo luồng
+
+Các dòng đi qua một generator, mỗi lần một lô được định dạng rồi ghi
+ngay ra file (nén gzip nếu muốn), nên bộ nhớ dùng cho việc xuất không
+tăng theo số sản phẩm. File được ghi qua file tạm rồi đổi tên, nên khi
+hủy hay lỗi giữa chừng file cũ (nếu có) vẫn còn nguyên.
+
+Chạy: python catalog_export.py <file.csv|file.ndjson[.gz]> [--columns id,name,...]
+      [--query <từ khóa>] [--backend json|binary|sqlite]
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from product_table import columns_of
+
+EXPORT_COLUMNS = ('id', 'sku', 'name', 'category', 'brand', 'color', 'price', 'quantity',
+                  'description', 'created_at', 'created_by', 'updated_at', 'updated_by')
+FORMATS = ('csv', 'ndjson')
+# Rows formatted and written per batch (and per progress report)
+BATCH_SIZE = 5000
+# Gzip at level 9 is several times slower for a few percent smaller dumps
+GZIP_LEVEL = 6
+
+_MISSING = object()
+
+
+class ExportError(ValueError):
+    """Định dạng hoặc danh sách cột không hợp lệ"""
+
+
+def parse_columns(text):
+    """Chuỗi "id, name, price" -> ('id', 'name', 'price'); rỗng là các cột mặc định"""
+    columns = tuple(column.strip() for column in (text or '').split(',') if column.strip())
+    return columns or EXPORT_COLUMNS
+
+
+def detect_format(path):
+    """(định dạng, có nén gzip) theo đuôi file: .csv, .ndjson/.jsonl, thêm .gz"""
+    name = path.lower()
+    compress = name.endswith('.gz')
+    if compress:
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return 'csv', compress
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson', compress
+    raise ExportError(f"Không nhận ra định dạng từ tên file: {path} (dùng .csv hoặc .ndjson)")
+
+
+def _batches(products, fields, batch_size):
+    """Sinh từng lô sản phẩm dưới dạng cột (xem columns_of) kèm số sản phẩm của lô"""
+    products = iter(products)
+    while True:
+        batch = list(islice(products, batch_size))
+        if not batch:
+            return
+        yield columns_of(batch, fields, _MISSING), len(batch)
+
+
+def iter_csv(products, columns, batch_size=BATCH_SIZE):
+    """Sinh văn bản CSV (dòng tiêu đề rồi từng lô dòng) và số dòng của mỗi lô"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for values, count in _batches(products, columns, batch_size):
+        # Missing fields become empty cells
+        values = [[None if value is _MISSING else value for value in column]
+                  if _MISSING in column else column for column in values]
+        writer.writerows(zip(*values))
+        yield buf.getvalue(), count
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        # Only the heading: an empty catalog
+        yield buf.getvalue(), 0
+
+
+def iter_ndjson(products, columns, batch_size=BATCH_SIZE):
+    """Sinh văn bản NDJSON (mỗi sản phẩm một dòng, bỏ trường không có) theo lô"""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    for values, count in _batches(products, columns, batch_size):
+        if any(_MISSING in column for column in values):
+            records = ({column: value for column, value in zip(columns, row)
+                        if value is not _MISSING} for row in zip(*values))
+        else:
+            records = (dict(zip(columns, row)) for row in zip(*values))
+        yield '\n'.join(map(dumps, records)) + '\n', count
+
+
+def _open(path, fmt, compress):
+    # Excel only reads Vietnamese CSV correctly with a BOM
+    encoding = 'utf-8-sig' if fmt == 'csv' else 'utf-8'
+    if compress:
+        return gzip.open(path, 'wt', compresslevel=GZIP_LEVEL, encoding=encoding, newline='')
+    return open(path, 'w', encoding=encoding, newline='')
+
+
+def export_products(products, path, columns=None, fmt=None, compress=None, total=None,
+                    progress=None, cancelled=None):
+    """Ghi products (iterable, có thể là generator) ra path theo luồng
+
+    fmt 'csv' / 'ndjson' và compress mặc định theo đuôi file (xem
+    detect_format). total là số dòng dự kiến, chỉ để báo tiến độ.
+    progress(report) được gọi sau mỗi lô; cancelled() trả về True để
+    dừng (không tạo file). Trả về báo cáo dạng dict.
+    """
+    columns = tuple(columns) if columns else EXPORT_COLUMNS
+    if fmt is None or compress is None:
+        detected, gz = detect_format(path)
+        fmt = detected if fmt is None else fmt
+        compress = gz if compress is None else compress
+    if fmt not in FORMATS:
+        raise ExportError(f"Định dạng không hỗ trợ: {fmt}")
+    if len(set(columns)) != len(columns):
+        raise ExportError("Danh sách cột bị trùng")
+
+    report = {
+        "file": path,
+        "format": fmt + (".gz" if compress else ""),
+        "columns": columns,
+        "rows": 0,
+        "total": total,
+        "bytes": 0,
+        "seconds": 0.0,
+        "rows_per_sec": 0.0,
+        "cancelled": False,
+        "error": None,
+    }
+    chunks = (iter_csv if fmt == 'csv' else iter_ndjson)(products, columns)
+    tmp_name = f"{path}.tmp"
+    started = time.perf_counter()
+    completed = False
+    try:
+        with _open(tmp_name, fmt, compress) as f:
+            for text, count in chunks:
+                f.write(text)
+                report["rows"] += count
+                if progress is not None:
+                    progress(report)
+                if cancelled is not None and cancelled():
+                    report["cancelled"] = True
+                    break
+        if not report["cancelled"]:
+            os.replace(tmp_name, path)
+            completed = True
+            report["bytes"] = os.path.getsize(path)
+    except Exception as e:
+        # Not only OSError: csv.Error, or a TypeError for a value JSON cannot encode
+        report["error"] = str(e) or type(e).__name__
+    finally:
+        if not completed:
+            try:
+                os.remove(tmp_name)
+            except OSError:
+                pass
+    report["seconds"] = time.perf_counter() - started
+    report["rows_per_sec"] = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+    return report
+
+
+def format_report(report):
+    """Tóm tắt báo cáo xuất dữ liệu để hiển thị"""
+    if report["error"]:
+        return f"Lỗi: {report['error']}"
+    if report["cancelled"]:
+        return f"Đã hủy sau {report['rows']:,} dòng (không tạo file)"
+    return (f"Đã xuất {report['rows']:,} sản phẩm ({report['format']}, "
+            f"{len(report['columns'])} cột) ra {report['file']}\n"
+            f"{report['bytes'] / 1e6:.1f} MB trong {report['seconds']:.1f}s "
+            f"({report['rows_per_sec']:,.0f} dòng/giây)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    from product_repository import ProductRepository
+    from storage import create_storage
+
+    def option(name, default=None):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    if len(sys.argv) < 2 or sys.argv[1].startswith('--'):
+        print("Usage: python catalog_export.py <file.csv|file.ndjson[.gz]> "
+              "[--columns id,name,...] [--query <từ khóa>] [--backend json|binary|sqlite]")
+        sys.exit(1)
+    repo = ProductRepository(create_storage(option("--backend", "json")))
+    try:
+        query = option("--query")
+        products = repo.search(query) if query else repo.all()
+        try:
+            result = export_products(products, sys.argv[1], parse_columns(option("--columns")),
+                                     total=len(products))
+        except ExportError as e:
+            print(e)
+            sys.exit(1)
+    finally:
+        repo.close()
+    print(format_report(result))
+    sys.exit(1 if result["error"] else 0)
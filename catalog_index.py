@@ -0,0 +1,153 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+
+_MAX_ID = float('inf')
+
+
+def as_number(value):
+    """value nếu là số (giá, số lượng), ngược lại None"""
+    # bool is an int subclass but never a price or a quantity
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+class SortedIndex:
+    """Chỉ mục có thứ tự trên một trường số: mảng (giá trị, id) đã sắp xếp
+
+    Truy vấn khoảng dùng bisect nên tốn O(log n + k); thêm/xóa là một lần
+    bisect cộng một lần dịch mảng (memmove trong C).
+    """
+
+    # Sort this many entries per C-level call when rebuilding, then merge
+    SORT_CHUNK = 20000
+
+    def __init__(self, field):
+        self.field = field
+        self._entries = []
+        # Ids in the same order as _entries, so a range is a single list slice
+        self._ids = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, products):
+        entries = []
+        for product in products:
+            value = as_number(product.get(self.field))
+            if value is not None:
+                entries.append((value, product['id']))
+        if len(entries) > self.SORT_CHUNK:
+            # One big sort holds the GIL for its whole run, which stalls the
+            # UI thread while a worker thread rebuilds the catalog
+            chunks = [sorted(entries[i:i + self.SORT_CHUNK])
+                      for i in range(0, len(entries), self.SORT_CHUNK)]
+            entries = list(heapq.merge(*chunks))
+        else:
+            entries.sort()
+        self._entries = entries
+        self._ids = [product_id for _, product_id in entries]
+
+    def add(self, product):
+        value = as_number(product.get(self.field))
+        if value is None:
+            return
+        entry = (value, product['id'])
+        i = bisect_right(self._entries, entry)
+        self._entries.insert(i, entry)
+        self._ids.insert(i, product['id'])
+
+    def remove(self, product):
+        value = as_number(product.get(self.field))
+        if value is None:
+            return
+        entry = (value, product['id'])
+        i = bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            del self._entries[i]
+            del self._ids[i]
+
+    def between(self, low=None, high=None):
+        """Id có giá trị trong [low, high], theo thứ tự giá trị tăng dần"""
+        start = 0 if low is None else bisect_left(self._entries, (low,))
+        end = len(self._entries) if high is None else bisect_right(self._entries, (high, _MAX_ID))
+        return self._ids[start:end]
+
+
+class CatalogIndex:
+    """Chỉ mục khóa chính và chỉ mục phụ cho catalog
+
+    - sku -> id (băm)
+    - loại -> danh sách id đã sắp xếp (theo thứ tự catalog)
+    - giá, số lượng -> SortedIndex
+    """
+
+    def __init__(self):
+        self._by_sku = {}
+        self._by_category = {}
+        self.price = SortedIndex('price')
+        self.quantity = SortedIndex('quantity')
+
+    def rebuild(self, products):
+        """Xây lại toàn bộ chỉ mục"""
+        self._by_sku = {}
+        by_category = {}
+        for product in products:
+            sku = product.get('sku')
+            if sku:
+                self._by_sku[sku] = product['id']
+            by_category.setdefault(product.get('category', ''), []).append(product['id'])
+        for ids in by_category.values():
+            ids.sort()
+        self._by_category = by_category
+        self.price.rebuild(products)
+        self.quantity.rebuild(products)
+
+    def add(self, product):
+        """Thêm một sản phẩm vào chỉ mục"""
+        sku = product.get('sku')
+        if sku:
+            self._by_sku[sku] = product['id']
+        ids = self._by_category.setdefault(product.get('category', ''), [])
+        if not ids or ids[-1] < product['id']:
+            # New products get the largest id so far
+            ids.append(product['id'])
+        else:
+            insort(ids, product['id'])
+        self.price.add(product)
+        self.quantity.add(product)
+
+    def remove(self, product):
+        """Xóa một sản phẩm khỏi chỉ mục"""
+        sku = product.get('sku')
+        if sku and self._by_sku.get(sku) == product['id']:
+            del self._by_sku[sku]
+        category = product.get('category', '')
+        ids = self._by_category.get(category)
+        if ids:
+            i = bisect_left(ids, product['id'])
+            if i < len(ids) and ids[i] == product['id']:
+                del ids[i]
+            if not ids:
+                del self._by_category[category]
+        self.price.remove(product)
+        self.quantity.remove(product)
+
+    def id_for_sku(self, sku):
+        return self._by_sku.get(sku)
+
+    def category_ids(self, category):
+        return self._by_category.get(category, [])
+
+    def categories(self):
+        """Số sản phẩm theo từng loại"""
+        return {category: len(ids) for category, ids in self._by_category.items()}
+
+    def stats(self):
+        """Thống kê chỉ mục"""
+        return {
+            "skus": len(self._by_sku),
+            "categories": len(self._by_category),
+            "priced": len(self.price),
+            "stocked": len(self.quantity),
+        }
@@ -0,0 +1,340 @@
+"""Đồng bộ catalog từ API phân trang của nhà cung cấp
+
+API trả về JSON theo trang: GET <url>?page=N&per_page=M, nội dung là
+{"items": [...], "total_pages": T} (hoặc "products"/"data" thay cho
+"items"), hoặc chỉ là một mảng. Các trang được tải song song trên một
+requests.Session có pool kết nối; trang không đổi (ETag/Last-Modified)
+trả về 304 và không phải xử lý lại. Sản phẩm được gộp vào catalog theo SKU.
+
+Chạy: python catalog_sync.py <url> [--parallel N] [--backend json|binary|sqlite]
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from product_import import normalize_product
+from product_journal import write_json_atomic
+
+DEFAULT_PARALLELISM = 8
+DEFAULT_PER_PAGE = 100
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 10.0
+TIMEOUT = (5, 30)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Records upserted per repository write
+BULK_SIZE = 1000
+ITEM_KEYS = ('items', 'products', 'data')
+
+logger = logging.getLogger(__name__)
+
+
+class SyncError(Exception):
+    """Lỗi không thể tiếp tục đồng bộ (ví dụ trang đầu không tải được)"""
+
+
+class ValidatorCache:
+    """ETag/Last-Modified của từng trang, lưu vào file JSON giữa các lần chạy"""
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._entries = {}
+        self._lock = threading.Lock()
+        if filename and os.path.exists(filename):
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring sync cache %s: %s", filename, e)
+
+    def get(self, url):
+        with self._lock:
+            return self._entries.get(url)
+
+    def put(self, url, entry):
+        with self._lock:
+            self._entries[url] = entry
+
+    def save(self):
+        if not self.filename:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            write_json_atomic(self.filename, entries)
+        except OSError as e:
+            logger.error("Error saving sync cache %s: %s", self.filename, e)
+
+
+class CatalogSync:
+    """Tải các trang song song (giới hạn số luồng), thử lại có backoff"""
+
+    def __init__(self, base_url, repo, parallelism=DEFAULT_PARALLELISM, per_page=DEFAULT_PER_PAGE,
+                 cache_file=None, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE,
+                 timeout=TIMEOUT, headers=None):
+        self.base_url = base_url
+        self.repo = repo
+        self.parallelism = max(1, int(parallelism))
+        self.per_page = per_page
+        self.cache = ValidatorCache(cache_file)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        # One pooled keep-alive connection per worker; retries are ours
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.parallelism, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept': 'application/json'})
+        if headers:
+            self.session.headers.update(headers)
+
+    def close(self):
+        self.session.close()
+
+    def page_url(self, page):
+        separator = '&' if '?' in self.base_url else '?'
+        return f"{self.base_url}{separator}page={page}&per_page={self.per_page}"
+
+    def _backoff(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAX)
+        # Full jitter keeps retrying workers from hitting the server in step
+        return random.uniform(0, min(BACKOFF_MAX, self.backoff_base * (2 ** attempt)))
+
+    def fetch_page(self, page, cancelled=None):
+        """Tải một trang
+
+        Trả về dict: page, url, status ("ok" / "not_modified"), items,
+        total_pages, bytes, retries, validators. Lỗi sau khi đã thử lại hết
+        được báo bằng SyncError.
+        """
+        url = self.page_url(page)
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        attempt = 0
+        while True:
+            if cancelled is not None and cancelled():
+                raise SyncError("Đã hủy")
+            response = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    break
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt >= self.max_retries:
+                raise SyncError(f"Trang {page}: {error}")
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+        if response.status_code == 304 and cached:
+            return {"page": page, "url": url, "status": "not_modified", "items": [],
+                    "total_pages": cached.get('total_pages'), "bytes": 0, "retries": attempt,
+                    "validators": None}
+        if response.status_code != 200:
+            raise SyncError(f"Trang {page}: HTTP {response.status_code}")
+
+        try:
+            body = response.json()
+        except ValueError as e:
+            raise SyncError(f"Trang {page}: JSON không hợp lệ ({str(e)})")
+        total_pages = None
+        if isinstance(body, dict):
+            total_pages = body.get('total_pages')
+            items = next((body[k] for k in ITEM_KEYS if isinstance(body.get(k), list)), [])
+        elif isinstance(body, list):
+            items = body
+        else:
+            items = []
+
+        validators = None
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            validators = {'etag': etag, 'last_modified': last_modified, 'total_pages': total_pages}
+        return {"page": page, "url": url, "status": "ok", "items": items,
+                "total_pages": total_pages, "bytes": len(response.content), "retries": attempt,
+                "validators": validators}
+
+    def run(self, progress=None, cancelled=None, defaults=None):
+        """Đồng bộ toàn bộ catalog, trả về báo cáo dạng dict
+
+        progress(report) được gọi sau mỗi trang; cancelled() trả về True để
+        dừng. Trang 1 cho biết tổng số trang; nếu API không cho biết thì tải
+        từng đợt cho tới khi gặp trang rỗng hoặc thiếu.
+        """
+        report = {
+            "url": self.base_url,
+            "pages": 0,
+            "total_pages": None,
+            "not_modified": 0,
+            "failed": 0,
+            "retries": 0,
+            "records": 0,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "rejected": 0,
+            "bytes": 0,
+            "errors": [],
+            "cancelled": False,
+            "seconds": 0.0,
+            "pages_per_sec": 0.0,
+            "records_per_sec": 0.0,
+        }
+        started = time.perf_counter()
+        pending = []
+        pending_validators = []
+
+        def flush():
+            if pending:
+                upserted = self.repo.upsert_many(pending)
+                if upserted is None:
+                    raise SyncError("Không thể lưu dữ liệu")
+                inserted, updated = upserted
+                report["inserted"] += inserted
+                report["updated"] += updated
+                report["unchanged"] += len(pending) - inserted - updated
+                del pending[:]
+            # Only once the pages are stored: a later 304 means "already have it"
+            for url, validators in pending_validators:
+                self.cache.put(url, validators)
+            del pending_validators[:]
+
+        def merge(result):
+            report["pages"] += 1
+            report["retries"] += result["retries"]
+            report["bytes"] += result["bytes"]
+            if result["status"] == "not_modified":
+                report["not_modified"] += 1
+            for record in result["items"]:
+                product, error = normalize_product(record)
+                if error is not None or not product.get('sku'):
+                    report["rejected"] += 1
+                    continue
+                if defaults:
+                    for key, value in defaults.items():
+                        product.setdefault(key, value)
+                pending.append(product)
+            report["records"] += len(result["items"])
+            if result["validators"]:
+                pending_validators.append((result["url"], result["validators"]))
+            if len(pending) >= BULK_SIZE:
+                flush()
+            if progress is not None:
+                progress(report)
+            return len(result["items"])
+
+        def is_cancelled():
+            if cancelled is not None and cancelled():
+                report["cancelled"] = True
+                return True
+            return False
+
+        def fetch_all(pool, pages):
+            """Tải một nhóm trang song song; trả về False nếu gặp trang thiếu"""
+            futures = [pool.submit(self.fetch_page, page, cancelled) for page in pages]
+            full = True
+            for future in as_completed(futures):
+                if is_cancelled():
+                    for other in futures:
+                        other.cancel()
+                    return False
+                try:
+                    result = future.result()
+                except SyncError as e:
+                    report["failed"] += 1
+                    report["errors"].append(str(e))
+                    continue
+                count = merge(result)
+                # A 304 page is unchanged, so it was full last time too
+                if result["status"] == "ok" and count < self.per_page:
+                    full = False
+            return full
+
+        try:
+            first = self.fetch_page(1, cancelled)
+            total_pages = first["total_pages"]
+            report["total_pages"] = total_pages
+            full = merge(first) >= self.per_page or first["status"] == "not_modified"
+
+            with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+                if total_pages is not None:
+                    # The pool's worker count is the parallelism limit
+                    fetch_all(pool, range(2, int(total_pages) + 1))
+                else:
+                    # Unknown length: fetch a wave of pages at a time and
+                    # stop after the first short one
+                    next_page = 2
+                    while full and not is_cancelled():
+                        full = fetch_all(pool, range(next_page, next_page + self.parallelism))
+                        next_page += self.parallelism
+            flush()
+        except SyncError as e:
+            report["failed"] += 1
+            report["errors"].append(str(e))
+        finally:
+            self.cache.save()
+
+        elapsed = time.perf_counter() - started
+        report["seconds"] = elapsed
+        if elapsed > 0:
+            report["pages_per_sec"] = report["pages"] / elapsed
+            report["records_per_sec"] = report["records"] / elapsed
+        return report
+
+
+def format_report(report):
+    """Tóm tắt báo cáo đồng bộ để hiển thị"""
+    lines = [
+        f"Đã tải {report['pages']} trang ({report['not_modified']} không đổi, "
+        f"{report['failed']} lỗi, {report['retries']} lần thử lại)",
+        f"{report['records']} bản ghi: thêm mới {report['inserted']}, cập nhật {report['updated']}, "
+        f"không đổi {report['unchanged']}, bị loại {report['rejected']}",
+        f"{report['seconds']:.1f}s - {report['pages_per_sec']:.1f} trang/s, "
+        f"{report['records_per_sec']:.0f} bản ghi/s",
+    ]
+    for error in report["errors"][:5]:
+        lines.append(f"  {error}")
+    if report["cancelled"]:
+        lines.append("Đã hủy giữa chừng (các trang đã tải vẫn được lưu)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from product_repository import ProductRepository
+    from storage import create_storage
+
+    if len(sys.argv) < 2:
+        print("Usage: python catalog_sync.py <url> [--parallel N] [--backend json|binary|sqlite]")
+        sys.exit(1)
+    args = sys.argv[2:]
+    parallel = int(args[args.index("--parallel") + 1]) if "--parallel" in args else DEFAULT_PARALLELISM
+    backend = args[args.index("--backend") + 1] if "--backend" in args else "json"
+
+    sync = CatalogSync(sys.argv[1], ProductRepository(create_storage(backend)),
+                       parallelism=parallel, cache_file="sync_cache.json")
+    try:
+        print(format_report(sync.run(defaults={"source": "API"})))
+    finally:
+        sync.close()
@@ -0,0 +1,123 @@
+import logging
+import os
+import select
+import sys
+import threading
+
+# inotify(7) event bits
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+logger = logging.getLogger(__name__)
+
+
+def _open_inotify(directories):
+    """fd inotify theo dõi các thư mục, None nếu hệ thống không hỗ trợ"""
+    if not sys.platform.startswith('linux'):
+        return None
+    # ctypes.util pulls in subprocess; keep it off the startup path
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    for directory in directories:
+        if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+    return fd
+
+
+class ChangeWatcher:
+    """Theo dõi các file dữ liệu, gọi on_change() khi chúng bị sửa
+
+    Trên Linux dùng inotify (qua ctypes) để biết ngay khi file trong máy bị
+    ghi; dù vậy vẫn so sánh mtime/kích thước mỗi poll_ms, vì inotify không
+    thấy thay đổi do máy khác ghi lên thư mục mạng dùng chung. Nơi không có
+    inotify thì chỉ dùng cách so sánh này.
+
+    on_change() chạy trên luồng của watcher; trả về False để được gọi lại
+    ở lần kiểm tra sau dù file không đổi thêm.
+    """
+
+    POLL_MS = 500
+
+    def __init__(self, paths, on_change, poll_ms=None):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.on_change = on_change
+        self.poll_ms = self.POLL_MS if poll_ms is None else poll_ms
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+        self.mode = None
+
+        # Times on_change was called
+        self.changes = 0
+
+    def start(self):
+        directories = sorted({os.path.dirname(path) for path in self.paths})
+        self._fd = _open_inotify(directories)
+        self.mode = "inotify" if self._fd is not None else "polling"
+        self._thread = threading.Thread(target=self._run, name="change-watcher")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _stats(self):
+        stats = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                stats.append(None)
+        return stats
+
+    def _wait(self):
+        timeout = self.poll_ms / 1000
+        if self._fd is None:
+            self._stop.wait(timeout)
+            return
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if ready:
+            # The events only wake us up; the stat comparison decides
+            try:
+                while os.read(self._fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def _run(self):
+        last = self._stats()
+        while not self._stop.is_set():
+            self._wait()
+            if self._stop.is_set():
+                return
+            current = self._stats()
+            if current == last:
+                continue
+            self.changes += 1
+            try:
+                done = self.on_change()
+            except Exception:
+                logger.exception("Error applying external changes")
+                done = True
+            if done is not False:
+                last = current
@@ -0,0 +1,139 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from orders import CheckoutError, in_stock
+
+
+def _money(value):
+    return f"{value:,.0f}".replace(',', '.')
+
+
+class CheckoutPanel:
+    """Cửa sổ bán hàng: quét/nhập SKU vào giỏ rồi thanh toán cả giỏ một lần
+
+    Thanh toán trừ kho và ghi đơn hàng trong một thao tác
+    (ProductRepository.checkout); thiếu hàng thì không dòng nào bị bán.
+    on_sold(order) được gọi sau mỗi lần bán thành công.
+    """
+
+    COLUMNS = ('SKU', 'Tên sản phẩm', 'Đơn giá', 'Số lượng', 'Thành tiền')
+
+    def __init__(self, root, repository, user, on_sold=None):
+        self.repository = repository
+        self.user = user
+        self.on_sold = on_sold
+        # sku -> quantity, in the order scanned
+        self.cart = {}
+        self.window = tk.Toplevel(root)
+        self.window.title("Bán hàng")
+        self.window.geometry("760x480")
+
+        top = tk.Frame(self.window)
+        top.pack(fill='x', padx=10, pady=10)
+        tk.Label(top, text="SKU:").pack(side='left')
+        self.sku_entry = tk.Entry(top, width=20, font=('Arial', 11))
+        self.sku_entry.pack(side='left', padx=5)
+        self.sku_entry.bind('<Return>', lambda e: self.add_line())
+        tk.Label(top, text="Số lượng:").pack(side='left', padx=(10, 0))
+        self.quantity_var = tk.IntVar(value=1)
+        tk.Spinbox(top, from_=1, to=9999, textvariable=self.quantity_var, width=6).pack(
+            side='left', padx=5)
+        tk.Button(top, text="Thêm", command=self.add_line, width=8).pack(side='left', padx=5)
+        self.status_label = tk.Label(top, text="", fg='#7f8c8d')
+        self.status_label.pack(side='left', padx=10)
+
+        frame = tk.Frame(self.window)
+        frame.pack(fill='both', expand=True, padx=10)
+        self.tree = ttk.Treeview(frame, columns=self.COLUMNS, show='headings', height=12)
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col)
+            text = col in ('SKU', 'Tên sản phẩm')
+            self.tree.column(col, width=200 if col == 'Tên sản phẩm' else 110,
+                             anchor='w' if text else 'e')
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        bottom = tk.Frame(self.window)
+        bottom.pack(fill='x', padx=10, pady=10)
+        tk.Button(bottom, text="Bỏ dòng", command=self.remove_line, width=10).pack(side='left')
+        tk.Button(bottom, text="Xóa giỏ", command=self.clear_cart, width=10).pack(
+            side='left', padx=5)
+        tk.Button(bottom, text="Thanh toán", command=self.checkout, bg='#2ecc71', fg='white',
+                  font=('Arial', 11, 'bold'), width=12).pack(side='right')
+        self.total_label = tk.Label(bottom, text="", font=('Arial', 12, 'bold'))
+        self.total_label.pack(side='right', padx=15)
+
+        self.render()
+        self.sku_entry.focus_set()
+
+    def add_line(self):
+        sku = self.sku_entry.get().strip()
+        if not sku:
+            return
+        try:
+            quantity = int(self.quantity_var.get())
+        except (tk.TclError, ValueError):
+            quantity = 0
+        if quantity <= 0:
+            messagebox.showerror("Lỗi", "Số lượng phải là số nguyên dương!", parent=self.window)
+            return
+        product = self.repository.by_sku(sku)
+        if product is None:
+            messagebox.showerror("Lỗi", f"Không có sản phẩm với SKU {sku}", parent=self.window)
+            return
+        wanted = self.cart.get(sku, 0) + quantity
+        if wanted > in_stock(product):
+            # Only a hint: the stock is checked again when paying
+            messagebox.showwarning("Không đủ hàng", f"{sku}: còn {in_stock(product)} cái",
+                                   parent=self.window)
+            return
+        self.cart[sku] = wanted
+        self.sku_entry.delete(0, tk.END)
+        self.quantity_var.set(1)
+        self.render()
+
+    def remove_line(self):
+        for item in self.tree.selection():
+            self.cart.pop(self.tree.item(item, 'values')[0], None)
+        self.render()
+
+    def clear_cart(self):
+        self.cart.clear()
+        self.render()
+
+    def render(self):
+        self.tree.delete(*self.tree.get_children())
+        total = 0
+        for sku, quantity in self.cart.items():
+            product = self.repository.by_sku(sku)
+            price = product.get('price') if product is not None else None
+            amount = price * quantity if isinstance(price, (int, float)) else 0
+            total += amount
+            self.tree.insert('', 'end', values=(
+                sku, product.get('name', '') if product is not None else '',
+                _money(price) if isinstance(price, (int, float)) else '',
+                quantity, _money(amount)))
+        self.total_label.config(text=f"Tổng: {_money(total)} VNĐ")
+
+    def checkout(self):
+        if not self.cart:
+            messagebox.showerror("Lỗi", "Giỏ hàng trống!", parent=self.window)
+            return
+        try:
+            order = self.repository.checkout(list(self.cart.items()), created_by=self.user)
+        except CheckoutError as e:
+            messagebox.showerror("Không bán được", "\n".join(e.problems), parent=self.window)
+            self.render()
+            return
+        if order is None:
+            messagebox.showerror("Lỗi", "Không thể ghi đơn hàng!", parent=self.window)
+            return
+        self.cart.clear()
+        self.render()
+        self.status_label.config(
+            text=f"Đã bán đơn {order['id'][:8]}: {_money(order['total'])} VNĐ")
+        if self.on_sold is not None:
+            self.on_sold(order)
+        self.sku_entry.focus_set()
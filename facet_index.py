@@ -0,0 +1,274 @@
+from bisect import bisect_right
+from itertools import compress, repeat
+
+from catalog_index import as_number
+
+FACETS = ('category', 'brand', 'color', 'price', 'quantity', 'created_by')
+FACET_LABELS = {
+    'category': 'Loại',
+    'brand': 'Thương hiệu',
+    'color': 'Màu',
+    'price': 'Giá',
+    'quantity': 'Tồn kho',
+    'created_by': 'Người tạo',
+}
+# Upper bounds (VNĐ) of the price bands; the last band is open-ended
+PRICE_EDGES = (100000, 200000, 300000, 500000, 1000000, 2000000)
+# Stock bands: out of stock, 1-5 (low stock), 6-99, 100 and up (overstock)
+STOCK_EDGES = (1, 6, 100)
+BANDS = {'price': PRICE_EDGES, 'quantity': STOCK_EDGES}
+NO_VALUE = "(không có)"
+
+# bin() digits -> one 0/1 byte per bit, and back
+_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+try:
+    _popcount = int.bit_count
+except AttributeError:
+    # Python < 3.10
+    def _popcount(bits):
+        return bin(bits).count('1')
+
+
+def to_bits(ids):
+    """Tập id -> bitset (số nguyên Python, bit i là id i)"""
+    ids = list(ids)
+    if len(ids) < 64:
+        # A few edits: shifting is cheaper than a flag per possible id
+        bits = 0
+        for product_id in ids:
+            bits |= 1 << product_id
+        return bits
+    flags = bytearray(max(ids) + 1)
+    for product_id in ids:
+        flags[product_id] = 1
+    return int(flags.translate(_DIGITS)[::-1], 2)
+
+
+def members(bits):
+    """Các id trong bitset, tăng dần"""
+    if not bits:
+        return []
+    flags = bin(bits)[:1:-1].encode('ascii').translate(_FLAGS)
+    return list(compress(range(len(flags)), flags))
+
+
+def _format(number):
+    return f"{number:,}".replace(',', '.')
+
+
+def _normalize(facet, value):
+    edges = BANDS.get(facet)
+    if edges is None:
+        if not value:
+            return None
+        return value if isinstance(value, str) else str(value)
+    value = as_number(value)
+    return None if value is None else bisect_right(edges, value)
+
+
+def facet_value(facet, product):
+    """Giá trị của sản phẩm trong một facet: chuỗi, số thứ tự khoảng (giá, tồn kho) hoặc None"""
+    return _normalize(facet, product.get(facet))
+
+
+def value_label(facet, value):
+    """Nhãn hiển thị của một giá trị facet"""
+    if value is None:
+        return NO_VALUE
+    edges = BANDS.get(facet)
+    if edges is None:
+        return str(value)
+    if value == len(edges):
+        return f"Từ {_format(edges[-1])}"
+    if facet == 'quantity':
+        # Whole units: the upper edge itself belongs to the next band
+        if value == 0:
+            return "Hết hàng"
+        return f"{_format(edges[value - 1])} - {_format(edges[value] - 1)}"
+    if value == 0:
+        return f"Dưới {_format(edges[0])}"
+    return f"{_format(edges[value - 1])} - {_format(edges[value])}"
+
+
+class _BitSets:
+    """Bitset theo giá trị; thêm/xóa được dồn lại và áp dụng một lần khi đọc
+
+    Mỗi lần đổi một bit tạo lại cả số nguyên (O(số id)), nên một lần nhập
+    hàng nghìn sản phẩm chỉ nên trả giá đó một lần cho mỗi giá trị.
+    """
+
+    __slots__ = ('bits', 'pending')
+
+    def __init__(self, bits=None):
+        self.bits = bits or {}
+        # value -> {id: True (add) / False (remove)}; the last change wins
+        self.pending = {}
+
+    def add(self, value, product_id):
+        self.pending.setdefault(value, {})[product_id] = True
+
+    def discard(self, value, product_id):
+        self.pending.setdefault(value, {})[product_id] = False
+
+    def _flush(self):
+        for value, changes in self.pending.items():
+            added = to_bits(pid for pid, present in changes.items() if present)
+            removed = to_bits(pid for pid, present in changes.items() if not present)
+            bits = (self.bits.get(value, 0) & ~removed) | added
+            if bits:
+                self.bits[value] = bits
+            else:
+                self.bits.pop(value, None)
+        self.pending = {}
+
+    def get(self, value):
+        if self.pending:
+            self._flush()
+        return self.bits.get(value, 0)
+
+    def items(self):
+        if self.pending:
+            self._flush()
+        return self.bits.items()
+
+
+class FacetIndex:
+    """Chỉ mục cho bộ lọc nhiều mặt (facet): mỗi giá trị một bitset id
+
+    Bitset là số nguyên Python (bit i là sản phẩm id i), nên kết hợp bộ
+    lọc là phép & / | chạy trong C trên cả tập id, và đếm là popcount.
+    Trong một facet các giá trị được chọn là "hoặc", giữa các facet là "và".
+    """
+
+    def __init__(self):
+        self._live = _BitSets()
+        self._facets = {facet: _BitSets() for facet in FACETS}
+
+    def rebuild(self, products):
+        ids = [product['id'] for product in products]
+        if not ids:
+            self._live = _BitSets()
+            self._facets = {facet: _BitSets() for facet in FACETS}
+            return
+        if ids[-1] - ids[0] + 1 == len(ids) and ids == list(range(ids[0], ids[-1] + 1)):
+            # The usual catalog: consecutive ids in order, so bit = position + first id
+            layout = ids[0]
+            live = ((1 << len(ids)) - 1) << ids[0]
+        else:
+            layout = ids
+            live = to_bits(ids)
+        self._live = _BitSets({True: live})
+        self._facets = {facet: _BitSets(self._column_bits(facet, products, layout))
+                        for facet in FACETS}
+
+    @staticmethod
+    def _column_bits(facet, products, layout):
+        """{giá trị: bitset} của một facet, tính theo cột thay vì từng sản phẩm"""
+        raw = [product.get(facet) for product in products]
+        edges = BANDS.get(facet)
+        column = None
+        if edges is not None and set(map(type, raw)) <= {int, float}:
+            # Every value a number (the usual case): the band is the code
+            column = bytes(map(bisect_right, repeat(edges), raw))
+        if column is not None:
+            codes = {band: band for band in set(column)}
+            labels = None
+        else:
+            try:
+                distinct = set(raw)
+            except TypeError:
+                # An unhashable value (a list, say): normalize every value
+                # up front, once, and key by the result
+                raw = [_normalize(facet, value) for value in raw]
+                labels = {value: value for value in set(raw)}
+            else:
+                labels = {value: _normalize(facet, value) for value in distinct}
+            codes = {label: code for code, label in enumerate(set(labels.values()))}
+        if len(codes) > 255:
+            # Too many values for one byte each: group product by product
+            groups = {}
+            ids = range(layout, layout + len(products)) if isinstance(layout, int) else layout
+            for product_id, value in zip(ids, raw):
+                groups.setdefault(labels[value], []).append(product_id)
+            return {label: to_bits(group) for label, group in groups.items()}
+        # One byte per product, then one byte per id: bytes.translate turns a
+        # code into '0'/'1' digits and int(..., 2) reads them as a bitset
+        if column is None:
+            by_value = {value: codes[label] for value, label in labels.items()}
+            column = bytes(map(by_value.__getitem__, raw))
+        if isinstance(layout, int):
+            column = b'\xff' * layout + column
+        else:
+            scattered = bytearray(b'\xff') * (max(layout) + 1)
+            for product_id, code in zip(layout, column):
+                scattered[product_id] = code
+            column = bytes(scattered)
+        bits = {}
+        for label, code in codes.items():
+            digits = column.translate(bytes(49 if i == code else 48 for i in range(256)))
+            bits[label] = int(digits[::-1], 2)
+        return bits
+
+    def add(self, product):
+        product_id = product['id']
+        self._live.add(True, product_id)
+        for facet, sets in self._facets.items():
+            sets.add(facet_value(facet, product), product_id)
+
+    def remove(self, product):
+        product_id = product['id']
+        self._live.discard(True, product_id)
+        for facet, sets in self._facets.items():
+            sets.discard(facet_value(facet, product), product_id)
+
+    def _chosen(self, selections):
+        """facet -> hợp các bitset của những giá trị được chọn"""
+        chosen = {}
+        for facet, values in selections.items():
+            if values:
+                bits = 0
+                for value in values:
+                    bits |= self._facets[facet].get(value)
+                chosen[facet] = bits
+        return chosen
+
+    def filter(self, selections, within=None):
+        """Bitset các sản phẩm thỏa mọi bộ lọc
+
+        selections: {facet: các giá trị được chọn}; within: bitset giới
+        hạn thêm (ví dụ kết quả tìm kiếm), None là không giới hạn.
+        """
+        bits = self._live.get(True)
+        if within is not None:
+            bits &= within
+        for chosen in self._chosen(selections).values():
+            bits &= chosen
+        return bits
+
+    def counts(self, selections, within=None):
+        """{facet: {giá trị: số sản phẩm}} nếu chọn thêm giá trị đó
+
+        Số của một facet tính theo bộ lọc của các facet khác (và within),
+        để thấy được mỗi lựa chọn khác trong cùng facet sẽ cho bao nhiêu
+        sản phẩm. Giá trị không còn sản phẩm nào thì bỏ qua.
+        """
+        base = self._live.get(True)
+        if within is not None:
+            base &= within
+        chosen = self._chosen(selections)
+        counts = {}
+        for facet, sets in self._facets.items():
+            others = base
+            for other, bits in chosen.items():
+                if other != facet:
+                    others &= bits
+            counts[facet] = {value: count for value, count in
+                             ((value, _popcount(bits & others)) for value, bits in sets.items())
+                             if count}
+        return counts
+
+    def stats(self):
+        """Thống kê chỉ mục"""
+        return {"facet_values": sum(len(sets.bits) for sets in self._facets.values())}
@@ -0,0 +1,83 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Khóa tư vấn (advisory) giữa các tiến trình, dựa trên một file .lock
+
+    Dùng fcntl.flock trên Linux/macOS và msvcrt.locking trên Windows; các
+    luồng trong cùng tiến trình xếp hàng qua một RLock, nên khóa lồng nhau
+    trong cùng luồng không bị treo. Chỉ các tiến trình cũng dùng khóa này
+    mới bị chặn - file dữ liệu vẫn đọc được bình thường.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+        # Times another process held the lock when we asked for it
+        self.waits = 0
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._lock_file()
+            except OSError:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _lock_file(self):
+        if self._fd is None:
+            self._fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o666)
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.waits += 1
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            while True:
+                try:
+                    # LK_LOCK itself gives up after 10 one-second retries
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    return
+                except OSError:
+                    self.waits += 1
+
+    def _unlock_file(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def close(self):
+        with self._thread_lock:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
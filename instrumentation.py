@@ -0,0 +1,198 @@
+"""Ghi log theo mức và đo thời gian các đường nóng
+
+Log dùng module logging chuẩn (logging.getLogger(__name__) ở từng module);
+configure_logging() đặt mức và nơi ghi, mặc định theo biến môi trường
+SHOP_LOG_LEVEL (WARNING) và SHOP_LOG_FILE (không có thì ghi ra stderr).
+
+Số đo (metrics) gồm bộ đếm và histogram độ trễ theo tên. Khi tắt
+(mặc định, bật bằng SHOP_METRICS=1 hoặc trong bảng thống kê ẩn), span()
+trả về một context manager rỗng dùng chung và @timed chỉ thêm một phép
+kiểm tra cờ, nên gần như không tốn gì.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(threadName)s]: %(message)s"
+
+# Histogram bucket upper bounds in ms; the last bucket is open-ended
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+_BUCKET_LABELS = [f"<={bound}" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+
+
+def configure_logging(level=None, filename=None):
+    """Đặt mức log và nơi ghi cho toàn bộ ứng dụng (gọi một lần khi khởi động)"""
+    level = level or os.environ.get("SHOP_LOG_LEVEL", "WARNING")
+    filename = filename or os.environ.get("SHOP_LOG_FILE") or None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.FileHandler(filename, encoding='utf-8') if filename else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+class Histogram:
+    """Số lần, tổng, min/max và phân bố theo BUCKETS_MS của một loại thao tác"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def record(self, ms):
+        self.count += 1
+        self.total += ms
+        if self.min is None or ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, fraction):
+        """Cận trên của bucket chứa phân vị fraction (ms)"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "min_ms": self.min or 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max,
+            "buckets": {label: n for label, n in zip(_BUCKET_LABELS, self.buckets) if n},
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class Metrics:
+    """Bộ đếm và histogram độ trễ, dùng chung giữa các luồng"""
+
+    # Spans slower than this are also logged at WARNING
+    SLOW_MS = 500
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._started = time.time()
+        self._log = logging.getLogger(__name__)
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, name):
+        """with metrics.span("tên"): ... - đo thời gian khối lệnh"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, ms):
+        """Ghi một lần đo (ms) vào histogram name"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.record(ms)
+        if ms >= self.SLOW_MS:
+            self._log.warning("Slow %s: %.0f ms", name, ms)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+    def snapshot(self):
+        """Toàn bộ số đo hiện tại dạng dict"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "since": datetime.fromtimestamp(self._started).strftime("%Y-%m-%d %H:%M:%S"),
+                "taken": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "spans": {name: h.summary() for name, h in sorted(self._histograms.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def dump(self, filename, extra=None):
+        """Ghi số đo (và extra, ví dụ thống kê cache) ra file JSON"""
+        data = self.snapshot()
+        if extra:
+            data.update(extra)
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+
+metrics = Metrics(enabled=os.environ.get("SHOP_METRICS", "") not in ("", "0"))
+
+
+def timed(name):
+    """Decorator đo thời gian mỗi lần gọi hàm vào histogram name"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(name, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorate
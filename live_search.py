@@ -0,0 +1,126 @@
+import time
+from collections import deque
+
+from search_index import fold_text
+
+
+class LiveSearch:
+    """Tìm kiếm trực tiếp khi gõ phím
+
+    - gom các phím gõ liên tiếp (debounce) rồi mới tìm
+    - bỏ qua các phím không làm đổi nội dung (mũi tên, Shift, ...)
+    - khi từ khóa mới chỉ gõ thêm vào từ khóa cũ, chỉ lọc lại kết quả cũ
+    - bỏ dở lần tìm/hiển thị cũ khi có phím gõ mới
+    """
+
+    DEBOUNCE_MS = 150
+    NON_EDITING_KEYS = {
+        'Left', 'Right', 'Up', 'Down', 'Home', 'End', 'Prior', 'Next',
+        'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R',
+        'Meta_L', 'Meta_R', 'Super_L', 'Super_R', 'Caps_Lock', 'Num_Lock',
+        'Tab', 'ISO_Left_Tab', 'Escape', 'Return', 'KP_Enter', 'Insert',
+        'Menu', 'Print', 'Pause', 'Scroll_Lock',
+    }
+
+    def __init__(self, root, entry, search_fn, render_fn, delay_ms=None):
+        """
+        search_fn(query, within) -> danh sách sản phẩm
+        render_fn(products, cancelled, done) hiển thị kết quả; gọi cancelled()
+        để biết có nên dừng giữa chừng, gọi done() khi hiển thị xong
+        """
+        self.root = root
+        self.entry = entry
+        self.search_fn = search_fn
+        self.render_fn = render_fn
+        self.delay_ms = self.DEBOUNCE_MS if delay_ms is None else delay_ms
+
+        self._after_id = None
+        self._generation = 0
+        self._keystroke_at = None
+        self._last_query = None
+        self._last_ids = None
+
+        # Keystroke-to-render latencies in milliseconds
+        self.latencies = deque(maxlen=200)
+        self.searches = 0
+        self.refinements = 0
+        self.abandoned = 0
+
+    def on_key(self, event):
+        """Xử lý <KeyRelease> của ô tìm kiếm"""
+        if event is not None and event.keysym in self.NON_EDITING_KEYS:
+            return
+        self._keystroke_at = time.perf_counter()
+        self._generation += 1
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self._run, self._generation)
+
+    def run_now(self):
+        """Tìm ngay, không chờ debounce"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._keystroke_at = time.perf_counter()
+        self._last_query = None
+        self._generation += 1
+        self._run(self._generation)
+
+    def reset(self):
+        """Quên kết quả trước (sau khi dữ liệu thay đổi)"""
+        self._last_query = None
+        self._last_ids = None
+
+    def _run(self, generation):
+        self._after_id = None
+        if generation != self._generation:
+            return
+
+        query = self.entry.get().strip()
+        folded = fold_text(query)
+        if folded == self._last_query:
+            self._keystroke_at = None
+            return
+
+        within = None
+        if self._last_query and self._last_ids is not None and folded.startswith(self._last_query):
+            # Every match of the longer query also matched the shorter one
+            within = self._last_ids
+            self.refinements += 1
+
+        products = self.search_fn(query, within)
+        self.searches += 1
+        self._last_query = folded
+        self._last_ids = {p['id'] for p in products} if folded else None
+
+        started_at = self._keystroke_at
+
+        def cancelled():
+            if generation != self._generation:
+                self.abandoned += 1
+                return True
+            return False
+
+        def done():
+            if started_at is not None:
+                self.latencies.append((time.perf_counter() - started_at) * 1000)
+            if generation == self._generation:
+                self._keystroke_at = None
+
+        self.render_fn(products, cancelled, done)
+
+    def stats(self):
+        """Thống kê độ trễ từ lúc gõ phím đến lúc hiển thị xong (ms)"""
+        values = sorted(self.latencies)
+        if not values:
+            return {"searches": self.searches, "refinements": self.refinements,
+                    "abandoned": self.abandoned}
+        return {
+            "searches": self.searches,
+            "refinements": self.refinements,
+            "abandoned": self.abandoned,
+            "last_ms": self.latencies[-1],
+            "avg_ms": sum(values) / len(values),
+            "p50_ms": values[len(values) // 2],
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+        }
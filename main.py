@@ -0,0 +1,17 @@
+"""Điểm khởi động ứng dụng Quản lý Shop Quần Áo (file được cx_Freeze đóng gói)
+
+Không ghi file nào ngoài dữ liệu; chỉ nạp những module cần để hiện màn
+hình đăng nhập, còn catalog được đọc trước ở luồng nền trong lúc chờ
+đăng nhập. Module nặng (requests cho đồng bộ API) chỉ nạp khi dùng tới.
+Chạy: python main.py
+"""
+from ql_shop_quan_ao import ClothingShopManager
+
+
+def main():
+    app = ClothingShopManager()
+    app.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+
+
+class CheckoutError(ValueError):
+    """Giỏ hàng không bán được: SKU lạ, số lượng sai hoặc không đủ hàng
+
+    problems liệt kê từng lỗi, mỗi dòng giỏ hàng một lỗi.
+    """
+
+    def __init__(self, problems):
+        super().__init__("; ".join(problems))
+        self.problems = list(problems)
+
+
+def parse_cart(lines):
+    """[(sku, số lượng), ...] -> danh sách (sku, số lượng), gộp các dòng trùng SKU
+
+    Ném CheckoutError nếu giỏ rỗng hoặc có số lượng không phải số nguyên dương.
+    """
+    cart = {}
+    problems = []
+    for sku, quantity in lines:
+        sku = str(sku).strip()
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+            problems.append(f"{sku}: số lượng không hợp lệ ({quantity!r})")
+            continue
+        cart[sku] = cart.get(sku, 0) + quantity
+    if problems:
+        raise CheckoutError(problems)
+    if not cart:
+        raise CheckoutError(["Giỏ hàng trống"])
+    return list(cart.items())
+
+
+def in_stock(product):
+    """Số lượng còn bán được; số lượng không phải số nguyên coi như hết hàng"""
+    quantity = product.get('quantity')
+    if isinstance(quantity, bool) or not isinstance(quantity, int):
+        return 0
+    return max(quantity, 0)
+
+
+def new_order(created_by=None):
+    """Đơn hàng rỗng; id ngẫu nhiên nên các máy bán hàng không cần hỏi nhau"""
+    return {
+        "id": uuid.uuid4().hex,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "created_by": created_by,
+        "lines": [],
+        "total": 0,
+    }
+
+
+def order_line(product, quantity):
+    """Một dòng đơn hàng, chép giá và tên lúc bán"""
+    price = product.get('price')
+    return {"id": product['id'], "sku": product.get('sku'), "name": product.get('name'),
+            "price": price, "quantity": quantity,
+            "amount": price * quantity if isinstance(price, (int, float)) else 0}
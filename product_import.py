@@ -0,0 +1,281 @@
+"""Nhập sản phẩm từ file lớn (mảng JSON hoặc NDJSON) theo luồng
+
+File được đọc từng khối, mỗi bản ghi được kiểm tra/chuẩn hóa rồi gộp vào
+catalog theo lô, nên bộ nhớ dùng cho việc đọc không tăng theo kích thước
+file.
+
+Chạy: python product_import.py <file> [--backend json|binary|sqlite]
+"""
+import codecs
+import json
+import math
+import os
+
+READ_SIZE = 64 * 1024
+# A single record larger than this means the file is broken, not that we
+# need to read further
+MAX_RECORD_BYTES = 1024 * 1024
+CHUNK_SIZE = 1000
+# Rejected records kept for the report; the rest are only counted
+MAX_REJECTS_KEPT = 100
+
+TEXT_FIELDS = ('name', 'category', 'description')
+
+
+class ImportFormatError(ValueError):
+    """File không phải mảng JSON/NDJSON hợp lệ"""
+
+
+def _read_text(f):
+    """Đọc file nhị phân thành các khối văn bản, kèm số byte đã đọc"""
+    # Supplier feeds exported on Windows often start with a BOM
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    while True:
+        block = f.read(READ_SIZE)
+        if not block:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail, 0
+            return
+        yield decoder.decode(block), len(block)
+
+
+def iter_records(f):
+    """Sinh (số thứ tự, bản ghi hoặc None, lỗi hoặc None, số byte đã đọc)
+
+    f là file mở ở chế độ nhị phân. Tự nhận dạng mảng JSON ("[...]") hay
+    NDJSON (mỗi dòng một object). Với NDJSON, dòng lỗi được báo rồi bỏ qua;
+    với mảng JSON, lỗi cú pháp làm dừng việc đọc (ImportFormatError).
+    """
+    decoder = json.JSONDecoder()
+    blocks = _read_text(f)
+    buf = ''
+    pos = 0
+    bytes_read = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, bytes_read, eof
+        for text, size in blocks:
+            bytes_read += size
+            # Drop what has been consumed so the buffer stays small
+            buf = buf[pos:] + text
+            pos = 0
+            if text:
+                return True
+        eof = True
+        return False
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf) or eof or not fill():
+                return
+
+    skip_ws()
+    if pos >= len(buf):
+        return
+    is_array = buf[pos] == '['
+    if is_array:
+        pos += 1
+
+    number = 0
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            if is_array:
+                raise ImportFormatError("Thiếu dấu ']' ở cuối file")
+            return
+        if is_array and buf[pos] == ']':
+            return
+        if is_array and number and buf[pos] == ',':
+            pos += 1
+            skip_ws()
+
+        number += 1
+        while True:
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except ValueError as e:
+                # An NDJSON record never spans lines, so a failure before the
+                # next newline is final; otherwise the record may just be cut
+                # off at the end of the buffer
+                final = not is_array and buf.find('\n', pos) >= 0
+                if not final and not eof and len(buf) - pos < MAX_RECORD_BYTES and fill():
+                    continue
+                if is_array:
+                    raise ImportFormatError(f"Bản ghi {number}: {str(e)}")
+                # NDJSON: skip to the next line and carry on
+                newline = buf.find('\n', pos)
+                while newline < 0 and not eof and fill():
+                    newline = buf.find('\n', pos)
+                pos = len(buf) if newline < 0 else newline + 1
+                yield number, None, f"JSON không hợp lệ: {e.msg}", bytes_read
+                break
+            pos = end
+            yield number, record, None, bytes_read
+            break
+
+
+def _parse_number(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        # "199,000" as typed in spreadsheets
+        value = value.strip().replace(',', '').replace(' ', '')
+    return float(value)
+
+
+def normalize_product(record):
+    """Kiểm tra và chuẩn hóa một bản ghi, trả về (sản phẩm, None) hoặc (None, lý do)"""
+    if not isinstance(record, dict):
+        return None, "Không phải object"
+    product = dict(record)
+    # Ids belong to the catalog the file is imported into
+    product.pop('id', None)
+
+    # Fields the feed leaves out stay out, so a partial record updating an
+    # existing SKU does not blank them
+    for field in TEXT_FIELDS:
+        if field in product:
+            value = product[field]
+            product[field] = '' if value is None else str(value).strip()
+    if not product.get('name'):
+        return None, "Thiếu tên sản phẩm"
+    if not product.get('category'):
+        return None, "Thiếu loại sản phẩm"
+
+    try:
+        price = _parse_number(product.get('price'))
+        quantity = _parse_number(product['quantity']) if 'quantity' in product else 0
+    except (TypeError, ValueError):
+        return None, "Giá hoặc số lượng không phải là số"
+    if not math.isfinite(price) or not math.isfinite(quantity):
+        return None, "Giá hoặc số lượng không phải là số"
+    if price < 0 or quantity < 0:
+        return None, "Giá và số lượng phải là số dương"
+    if quantity != int(quantity):
+        return None, "Số lượng phải là số nguyên"
+    product['price'] = int(price) if price == int(price) else price
+    if 'quantity' in product:
+        product['quantity'] = int(quantity)
+
+    sku = product.get('sku')
+    if sku is not None:
+        sku = str(sku).strip()
+        if sku:
+            product['sku'] = sku
+        else:
+            del product['sku']
+    return product, None
+
+
+def import_products(path, repo, chunk_size=CHUNK_SIZE, progress=None, cancelled=None,
+                    defaults=None):
+    """Đọc file theo luồng và gộp vào repo (thêm mới hoặc cập nhật theo SKU)
+
+    progress(report) được gọi sau mỗi lô; cancelled() trả về True để dừng
+    giữa chừng (các lô đã ghi vẫn được giữ). defaults là giá trị cho các
+    trường bản ghi không có (ví dụ created_by). Trả về báo cáo dạng dict.
+    """
+    report = {
+        "file": path,
+        "total_bytes": os.path.getsize(path),
+        "bytes_read": 0,
+        "records": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "rejected": 0,
+        "rejects": [],
+        "cancelled": False,
+        "error": None,
+    }
+    chunk = []
+
+    def flush():
+        result = repo.upsert_many(chunk)
+        if result is None:
+            raise OSError("Không thể lưu dữ liệu")
+        inserted, updated = result
+        report["inserted"] += inserted
+        report["updated"] += updated
+        report["unchanged"] += len(chunk) - inserted - updated
+        del chunk[:]
+        if progress is not None:
+            progress(report)
+
+    try:
+        with open(path, 'rb') as f:
+            for number, record, error, bytes_read in iter_records(f):
+                report["records"] = number
+                report["bytes_read"] = bytes_read
+                if error is None:
+                    product, error = normalize_product(record)
+                if error is not None:
+                    report["rejected"] += 1
+                    if len(report["rejects"]) < MAX_REJECTS_KEPT:
+                        report["rejects"].append((number, error))
+                    continue
+                if defaults:
+                    for key, value in defaults.items():
+                        product.setdefault(key, value)
+                chunk.append(product)
+                if len(chunk) >= chunk_size:
+                    flush()
+                    if cancelled is not None and cancelled():
+                        report["cancelled"] = True
+                        return report
+            if chunk:
+                flush()
+            report["bytes_read"] = report["total_bytes"]
+    except (OSError, ImportFormatError) as e:
+        report["error"] = str(e)
+    if progress is not None:
+        progress(report)
+    return report
+
+
+def format_report(report):
+    """Tóm tắt báo cáo nhập dữ liệu để hiển thị"""
+    lines = [
+        f"Đã đọc {report['records']} bản ghi",
+        f"Thêm mới: {report['inserted']}, cập nhật: {report['updated']}, "
+        f"không đổi: {report['unchanged']}, bị loại: {report['rejected']}",
+    ]
+    for number, reason in report["rejects"][:10]:
+        lines.append(f"  #{number}: {reason}")
+    if report["rejected"] > 10:
+        lines.append(f"  ... và {report['rejected'] - 10} bản ghi khác")
+    if report["cancelled"]:
+        lines.append("Đã hủy giữa chừng (các lô đã nhập vẫn được lưu)")
+    if report["error"]:
+        lines.append(f"Lỗi: {report['error']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from product_repository import ProductRepository
+    from storage import create_storage
+
+    if len(sys.argv) < 2:
+        print("Usage: python product_import.py <file> [--backend json|binary|sqlite]")
+        sys.exit(1)
+    backend = sys.argv[sys.argv.index("--backend") + 1] if "--backend" in sys.argv else "json"
+    started = time.perf_counter()
+
+    def show_progress(report):
+        percent = 100 * report["bytes_read"] / (report["total_bytes"] or 1)
+        print(f"\r{percent:5.1f}%  {report['records']} bản ghi, {report['rejected']} bị loại",
+              end='', flush=True)
+
+    result = import_products(sys.argv[1], ProductRepository(create_storage(backend)),
+                             progress=show_progress, defaults={"source": "import"})
+    print()
+    print(format_report(result))
+    print(f"{time.perf_counter() - started:.1f}s")
@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+
+def _plain(value):
+    # Catalog rows (ProductRow) are mappings, not dicts
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ProductJournal:
+    """Nhật ký thay đổi chỉ ghi nối (mỗi dòng một thao tác insert/update/delete/checkout)"""
+
+    def __init__(self, filename, fsync=True):
+        self.filename = filename
+        self.fsync = fsync
+
+    def size(self):
+        """Kích thước file nhật ký (byte)"""
+        try:
+            return os.path.getsize(self.filename)
+        except OSError:
+            return 0
+
+    def append(self, entries):
+        """Ghi nối các thao tác vào cuối nhật ký"""
+        if not entries:
+            return
+        lines = ''.join(json.dumps(entry, ensure_ascii=False, default=_plain) + '\n' for entry in entries)
+        with open(self.filename, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def read(self):
+        """Đọc toàn bộ các thao tác trong nhật ký"""
+        entries = []
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # A torn write at the tail after a crash; everything
+                        # before it is still valid
+                        logger.warning("Skipping corrupt journal line in %s", self.filename)
+        except OSError:
+            pass
+        return entries
+
+    def read_from(self, offset):
+        """Đọc các thao tác ghi sau vị trí offset (byte)
+
+        Trả về (entries, vị trí kết thúc, os.stat_result), chỉ tính tới dòng
+        hoàn chỉnh cuối cùng; None nếu file đã ngắn hơn offset (bị nén lại).
+        """
+        try:
+            with open(self.filename, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if st.st_size < offset:
+                    return None
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return ([], 0, None) if offset == 0 else None
+        # A line still being written by another process is left for next time
+        end = data.rfind(b'\n') + 1
+        entries = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping corrupt journal line in %s", self.filename)
+        return entries, offset + end, st
+
+    def truncate(self):
+        """Xóa nội dung nhật ký sau khi đã gộp vào snapshot"""
+        try:
+            with open(self.filename, 'w', encoding='utf-8') as f:
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        except OSError:
+            pass
+
+    @staticmethod
+    def expand(entries):
+        """Các thao tác nhật ký, mỗi lần bán (checkout) thay bằng các update số lượng
+
+        Một lần bán ghi số lượng còn lại của từng sản phẩm (không ghi phần
+        bị trừ), nên phát lại nó nhiều lần vẫn cho cùng kết quả.
+        """
+        for entry in entries:
+            if entry.get('op') != 'checkout':
+                yield entry
+                continue
+            for product_id, quantity in entry.get('stock') or ():
+                yield {"op": "update", "id": product_id, "fields": {"quantity": quantity}}
+
+    @staticmethod
+    def replay(products, entries):
+        """Áp dụng nhật ký lên danh sách sản phẩm của snapshot
+
+        Mọi thao tác đều lũy đẳng theo id, nên phát lại một nhật ký đã
+        được gộp vào snapshot (ví dụ khi mất điện giữa lúc nén) vẫn an toàn.
+        """
+        by_id = {}
+        for product in products:
+            by_id[product['id']] = product
+        for entry in ProductJournal.expand(entries):
+            op = entry.get('op')
+            if op == 'insert':
+                product = entry.get('product') or {}
+                if 'id' in product:
+                    by_id[product['id']] = product
+            elif op == 'update':
+                product = by_id.get(entry.get('id'))
+                if product is not None:
+                    product.update(entry.get('fields') or {})
+            elif op == 'delete':
+                by_id.pop(entry.get('id'), None)
+        return list(by_id.values())
+
+    @staticmethod
+    def replay_slice(records, entries, start, stop):
+        """Như replay(list(records), entries)[start:stop], nhưng chỉ đọc
+        records (iterator trên snapshot) tới khi đủ dòng
+
+        Sản phẩm được chèn mới (hoặc xóa rồi chèn lại) nằm sau snapshot,
+        nên chỉ trang chạm tới cuối snapshot mới phải đọc hết nó.
+        """
+        ops = {}
+        for entry in ProductJournal.expand(entries):
+            if entry.get('op') == 'insert':
+                product_id = (entry.get('product') or {}).get('id')
+            else:
+                product_id = entry.get('id')
+            if product_id is not None:
+                ops.setdefault(product_id, []).append(entry)
+        result = []
+        position = 0
+        seen = []
+        kept = set()
+        for product in records:
+            seen.append(product['id'])
+            moved = False
+            for entry in ops.get(product['id'], ()):
+                op = entry.get('op')
+                if op == 'insert':
+                    # Back after a delete: it now sits after the snapshot
+                    moved = moved or product is None
+                    product = entry['product']
+                elif op == 'update':
+                    if product is not None:
+                        product.update(entry.get('fields') or {})
+                elif op == 'delete':
+                    product = None
+            if product is None or moved:
+                continue
+            kept.add(product['id'])
+            if position >= start:
+                result.append(product)
+            position += 1
+            if position >= stop:
+                return result
+        # Past the end of the snapshot: the rest of the catalog comes from
+        # the journal, ordered as replay orders it
+        for product in ProductJournal.replay([{'id': product_id} for product_id in seen], entries):
+            if product['id'] in kept:
+                continue
+            if position >= start:
+                result.append(product)
+            position += 1
+            if position >= stop:
+                break
+        return result
+
+
+def write_json_atomic(filename, data, fsync=True):
+    """Ghi file JSON qua file tạm rồi đổi tên, tránh hỏng file khi mất điện"""
+    tmp_name = f"{filename}.tmp"
+    # json.dumps builds the text in one go; json.dump issues one write per token
+    text = json.dumps(data, ensure_ascii=False, indent=2, default=_plain)
+    with open(tmp_name, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp_name, filename)
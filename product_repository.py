@@ -0,0 +1,780 @@
+import gc
+import logging
+import operator
+import threading
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+from itertools import repeat
+
+from catalog_index import CatalogIndex
+from facet_index import FacetIndex, members, to_bits
+from instrumentation import metrics
+from orders import CheckoutError, in_stock, new_order, order_line, parse_cart
+from product_journal import ProductJournal
+from product_table import ProductTable
+from search_index import SearchIndex
+from sort_index import SortIndex
+from storage import StorageError
+from write_queue import GroupCommitWriter
+
+logger = logging.getLogger(__name__)
+
+
+class ProductRepository:
+    """Kho sản phẩm trong bộ nhớ, chỉ đọc lại khi tầng lưu trữ thay đổi
+
+    Mọi thao tác đọc phục vụ từ cache; thao tác thêm/sửa/xóa cập nhật cache
+    ngay dưới khóa rồi gửi sang một luồng ghi duy nhất (GroupCommitWriter),
+    luồng này gom các thao tác đến gần nhau thành một lần ghi xuống tầng lưu
+    trữ (nhật ký JSON hoặc SQLite). Mỗi thao tác nhận tham số wait: mặc định
+    chờ ghi xong và trả về kết quả, wait=False trả về Future.
+
+    Các chỉ mục trong self.indexes (có rebuild/add/remove) được cập nhật
+    cùng với cache; khi sửa, remove được gọi trước và add sau khi sửa.
+
+    Sản phẩm được giữ theo cột trong một ProductTable; all(), get(),
+    search(), ... trả về ProductRow, đọc và sửa được như dict.
+
+    Khi tiến trình khác (máy bán hàng khác) ghi vào cùng dữ liệu, chỉ các
+    bản ghi bị đổi được áp dụng vào cache (refresh), không tải lại toàn bộ.
+
+    Bán hàng (checkout) thì ngược lại: tồn kho chỉ bị trừ trên luồng ghi,
+    lúc đang giữ khóa giữa các tiến trình và đã đọc thay đổi của máy khác.
+    """
+
+    # Views smaller than this share of the catalog are sorted directly
+    # instead of being filtered out of the cached whole-catalog order
+    SORT_DIRECT_RATIO = 0.05
+    # Set once the first preload() has frozen the startup heap (gc.freeze)
+    _startup_frozen = False
+
+    def __init__(self, storage, window_ms=None):
+        self.storage = storage
+        self._table = ProductTable()
+        self._products = []
+        self._by_id = {}
+        self._signature = None
+        self._loaded = False
+        self._next_id = 1
+        # (op, product, fields) handed to the writer but not yet written, in
+        # order; ids are read from the product only when the batch is written
+        self._inflight = deque()
+        # Ids changed by other processes since the last refresh()
+        self._external = set()
+        self._lock = threading.RLock()
+
+        # Cache counters
+        self.hits = 0
+        self.misses = 0
+
+        self._set_indexes(self._create_indexes())
+        self.writer = GroupCommitWriter(self._commit, window_ms=window_ms)
+
+    def _create_indexes(self):
+        """Các chỉ mục rỗng, theo tên thuộc tính sẽ giữ chúng"""
+        return {"search_index": SearchIndex(), "catalog_index": CatalogIndex(),
+                "sort_index": SortIndex(), "facet_index": FacetIndex()}
+
+    def _set_indexes(self, indexes):
+        for name, index in indexes.items():
+            setattr(self, name, index)
+        self.indexes = list(indexes.values())
+
+    def _build(self):
+        """Đọc dữ liệu và dựng cache mới mà không đụng tới cache hiện tại"""
+        with metrics.span("catalog.load"):
+            loaded = self.storage.load_table()
+            products = self.storage.load_products() if loaded is None else loaded[1]
+        with metrics.span("catalog.index"):
+            # From the plain dicts if the storage gave dicts: indexing reads
+            # every field of every row
+            indexes = self._create_indexes()
+            for index in indexes.values():
+                index.rebuild(products)
+        with metrics.span("catalog.table"):
+            if loaded is None:
+                table = ProductTable()
+                products = table.extend(products)
+            else:
+                table = loaded[0]
+        return table, products, {p['id']: p for p in products}, indexes
+
+    def _install(self, signature, table, products, by_id, indexes):
+        self._table = table
+        self._products = products
+        self._by_id = by_id
+        self._set_indexes(indexes)
+        next_id = max(by_id, default=0) + 1
+        self._next_id = max(next_id, self._next_id)
+        self._signature = signature
+        self._loaded = True
+
+    def _is_current(self, signature):
+        # While our own writes are queued the stored data lags the cache, so
+        # a changed signature is expected and must not trigger a reload
+        return self._loaded and (bool(self._inflight) or signature == self._signature)
+
+    def _ensure_loaded(self):
+        """Đọc lại dữ liệu nếu cache không còn hợp lệ"""
+        signature = self.storage.signature()
+        if self._is_current(signature):
+            self.hits += 1
+            return
+
+        self.misses += 1
+        if self._loaded:
+            self._catch_up(signature)
+        else:
+            self._install(signature, *self._build())
+
+    def _catch_up(self, signature):
+        """Áp dụng vào cache những gì đã được ghi từ bên ngoài (giữ khóa)"""
+        changes = self.storage.read_changes(self._signature)
+        if changes is not None:
+            entries, signature = changes
+            self._apply_external(entries=entries)
+        else:
+            self._apply_external(products=self.storage.load_products())
+        self._signature = signature
+
+    def _apply_external(self, entries=None, products=None):
+        """Áp dụng thao tác nhật ký (entries) hoặc toàn bộ dữ liệu (products)
+
+        Chỉ các bản ghi khác với cache bị sửa, cả trong chỉ mục. Sản phẩm
+        mình vừa thêm mà chưa ghi được tách ra trước và đánh số lại nếu id
+        trùng với id máy khác đã ghi; các trường mình sửa mà chưa ghi được
+        áp lại lên trên, vì chúng sẽ được ghi sau.
+        """
+        pending = [item[1] for item in self._inflight if item[0] == 'insert']
+        pending_ids = set(map(id, pending))
+        # Ids we are about to delete or update: their stored copy is older
+        deleted = {item[1]['id'] for item in self._inflight
+                   if item[0] == 'delete' and id(item[1]) not in pending_ids}
+
+        detached = []
+        if pending:
+            for product in pending:
+                if self._by_id.get(product['id']) is product:
+                    del self._by_id[product['id']]
+                    for idx in self.indexes:
+                        idx.remove(product)
+                    detached.append(product)
+            self._products = [p for p in self._products if id(p) not in pending_ids]
+
+        if products is not None:
+            stored = {p['id'] for p in products}
+            entries = [{"op": "delete", "id": pid} for pid in self._by_id if pid not in stored]
+            entries.extend({"op": "insert", "product": p} for p in products
+                           if self._by_id.get(p['id']) != p)
+
+        changed = set()
+        highest = 0
+        for entry in ProductJournal.expand(entries):
+            op = entry.get('op')
+            if op == 'insert':
+                product = entry.get('product') or {}
+                product_id = product.get('id')
+                if product_id is None or product_id in deleted:
+                    continue
+                highest = max(highest, product_id)
+                current = self._by_id.get(product_id)
+                if current is None:
+                    product = self._table.append(product)
+                    self._by_id[product_id] = product
+                    self._products.append(product)
+                    for idx in self.indexes:
+                        idx.add(product)
+                else:
+                    # In place, so rows and queued updates keep their reference
+                    for idx in self.indexes:
+                        idx.remove(current)
+                    current.clear()
+                    current.update(product)
+                    for idx in self.indexes:
+                        idx.add(current)
+            elif op == 'update':
+                product_id = entry.get('id')
+                current = self._by_id.get(product_id)
+                if current is None:
+                    continue
+                for idx in self.indexes:
+                    idx.remove(current)
+                current.update(entry.get('fields') or {})
+                for idx in self.indexes:
+                    idx.add(current)
+            elif op == 'delete':
+                product_id = entry.get('id')
+                current = self._by_id.pop(product_id, None)
+                if current is None:
+                    continue
+                self._products.pop(self._position(current))
+                self._table.release(current)
+                for idx in self.indexes:
+                    idx.remove(current)
+            else:
+                continue
+            changed.add(product_id)
+
+        if changed:
+            # Our queued edits are written after these, so they win
+            for op, product, fields in self._inflight:
+                if op == 'update' and product['id'] in changed and \
+                        self._by_id.get(product['id']) is product:
+                    for idx in self.indexes:
+                        idx.remove(product)
+                    product.update(fields)
+                    for idx in self.indexes:
+                        idx.add(product)
+
+        self._next_id = max(self._next_id, highest + 1)
+        if pending:
+            if highest >= min(p['id'] for p in pending):
+                # Another station took these ids first; ours go after its
+                for product in pending:
+                    product['id'] = self._next_id
+                    self._next_id += 1
+            for product in detached:
+                self._by_id[product['id']] = product
+                self._products.append(product)
+                for idx in self.indexes:
+                    idx.add(product)
+        self._external |= changed
+        return changed
+
+    def refresh(self):
+        """Áp dụng thay đổi do tiến trình khác ghi, chỉ sửa các bản ghi bị đổi
+
+        Gọi được từ luồng nền (ví dụ ChangeWatcher). Trả về tập id đã đổi từ
+        lần gọi trước (cả id đã xóa), hoặc None nếu chưa áp dụng được vì
+        đang có thao tác của mình chờ ghi - khi đó gọi lại sau.
+        """
+        with self._lock:
+            if not self._loaded:
+                return set()
+            if self._inflight:
+                # The writer catches up before writing; report afterwards
+                return None
+            signature = self._signature
+        current = self.storage.signature()
+        products = None
+        if current != signature:
+            changes = self.storage.read_changes(signature)
+            if changes is None:
+                # Read outside the lock; only the diff is applied under it
+                products = self.storage.load_products()
+        with self._lock:
+            if self._signature != signature or self._inflight:
+                return None
+            if current != signature:
+                self.misses += 1
+                with metrics.span("catalog.refresh"):
+                    if changes is not None:
+                        entries, current = changes
+                        self._apply_external(entries=entries)
+                    else:
+                        self._apply_external(products=products)
+                self._signature = current
+            changed, self._external = self._external, set()
+            return changed
+
+    def is_fresh(self):
+        """True nếu cache còn hợp lệ, tức là đọc sẽ không phải tải lại"""
+        with self._lock:
+            return self._is_current(self.storage.signature())
+
+    def preload(self):
+        """Tải lại cache từ luồng nền, trả về danh sách sản phẩm
+
+        Việc đọc file và dựng chỉ mục chạy ngoài khóa, nên luồng giao diện
+        vẫn dùng được cache cũ cho tới lúc thay bằng cache mới.
+        """
+        signature = self.storage.signature()
+        with self._lock:
+            if self._is_current(signature):
+                self.hits += 1
+                return self._products
+            self.misses += 1
+
+        # A collection over the millions of objects being built holds the
+        # GIL for hundreds of ms, stalling the UI thread. Nothing built here
+        # is cyclic, so collect nothing while building
+        gc_enabled = gc.isenabled()
+        freeze = gc_enabled and not ProductRepository._startup_frozen
+        if freeze:
+            # Once per process, on the first load: collect the startup
+            # garbage now, while the heap is still small
+            ProductRepository._startup_frozen = True
+            gc.collect()
+        gc.disable()
+        try:
+            built = self._build()
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if freeze:
+            # Move the startup heap and the catalog just built out of later
+            # full collections, without collecting over it. Reference
+            # counting still frees the catalog once replaced
+            gc.freeze()
+        with self._lock:
+            if not self._is_current(self.storage.signature()):
+                # If the data changed while we were reading, the old
+                # signature makes the next access reload again
+                self._install(signature, *built)
+            return self._products
+
+    def invalidate(self):
+        """Buộc lần đọc kế tiếp phải tải lại dữ liệu"""
+        with self._lock:
+            self._loaded = False
+
+    def all(self):
+        """Trả về danh sách sản phẩm (không được sửa trực tiếp)"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._products
+
+    def count(self):
+        """Số lượng sản phẩm"""
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._products)
+
+    def get(self, product_id):
+        """Lấy sản phẩm theo id, trả về None nếu không tồn tại"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_id.get(product_id)
+
+    def by_id(self, product_id):
+        """Lấy sản phẩm theo id (như get)"""
+        return self.get(product_id)
+
+    def by_sku(self, sku):
+        """Lấy sản phẩm theo mã SKU, None nếu không có"""
+        with self._lock:
+            self._ensure_loaded()
+            product_id = self.catalog_index.id_for_sku(sku)
+            return None if product_id is None else self._by_id.get(product_id)
+
+    def by_category(self, category):
+        """Các sản phẩm thuộc một loại, theo thứ tự catalog"""
+        with self._lock:
+            self._ensure_loaded()
+            return [self._by_id[pid] for pid in self.catalog_index.category_ids(category)]
+
+    def price_between(self, low=None, high=None):
+        """Các sản phẩm có giá trong [low, high], giá tăng dần"""
+        with self._lock:
+            self._ensure_loaded()
+            return [self._by_id[pid] for pid in self.catalog_index.price.between(low, high)]
+
+    def low_stock(self, threshold):
+        """Các sản phẩm còn không quá threshold cái, ít nhất trước"""
+        with self._lock:
+            self._ensure_loaded()
+            return [self._by_id[pid] for pid in self.catalog_index.quantity.between(None, threshold)]
+
+    def categories(self):
+        """Số sản phẩm theo từng loại"""
+        with self._lock:
+            self._ensure_loaded()
+            return self.catalog_index.categories()
+
+    def search(self, query, within=None):
+        """Tìm sản phẩm theo từ khóa (không phân biệt dấu), giữ thứ tự catalog"""
+        with self._lock:
+            self._ensure_loaded()
+            ids = self.search_index.search(query, within)
+            if ids is None:
+                return self._products
+            return self._in_catalog_order(ids)
+
+    def _in_catalog_order(self, ids):
+        """Các sản phẩm có id trong ids, theo thứ tự catalog (giữ khóa)"""
+        # Ids are handed out in append order, so ascending ids are catalog order
+        return [self._by_id[pid] for pid in sorted(ids) if pid in self._by_id]
+
+    def _search_bits(self, query, within):
+        ids = self.search_index.search(query, within) if query else within
+        return None if ids is None else to_bits(ids)
+
+    def filter(self, selections, query=None, within=None):
+        """Sản phẩm thỏa bộ lọc facet (xem FacetIndex) và từ khóa, giữ thứ tự catalog
+
+        selections: {facet: các giá trị được chọn}; within như search().
+        """
+        with metrics.span("catalog.filter"), self._lock:
+            self._ensure_loaded()
+            if not any(selections.values()):
+                # Nothing to intersect: the plain search is cheaper
+                if not query and within is None:
+                    return self._products
+                ids = self.search_index.search(query, within) if query else within
+                if ids is None:
+                    return self._products
+                return self._in_catalog_order(ids)
+            bits = self.facet_index.filter(selections, self._search_bits(query, within))
+            # Already ascending: sorting it again is a linear pass
+            return self._in_catalog_order(members(bits))
+
+    def facet_counts(self, selections, query=None):
+        """{facet: {giá trị: số sản phẩm}} cho bộ lọc hiện tại (xem FacetIndex.counts)"""
+        with metrics.span("catalog.facet_counts"), self._lock:
+            self._ensure_loaded()
+            return self.facet_index.counts(selections, self._search_bits(query, None))
+
+    def sort(self, products, keys):
+        """Sắp xếp một danh sách sản phẩm (all() hoặc kết quả search()) theo nhiều cột
+
+        keys: [(trường, giảm dần), ...], khóa chính trước; trường là một
+        trong SortIndex.KEYS. Bằng nhau theo mọi khóa thì theo id, cùng
+        chiều với khóa cuối; keys rỗng là thứ tự catalog. Trả về danh sách mới.
+        """
+        with metrics.span("catalog.sort"), self._lock:
+            self._ensure_loaded()
+            catalog = self._products
+            index = self.sort_index
+            if products is not catalog and len(products) < len(catalog) * self.SORT_DIRECT_RATIO:
+                # A narrow search: sorting it directly beats filtering the whole
+                # catalog order; one stable pass per key, least significant first
+                rows = sorted(products, key=operator.itemgetter('id'),
+                              reverse=bool(keys) and keys[-1][1])
+                for field, descending in reversed(keys):
+                    rows.sort(key=partial(index.key, field), reverse=descending)
+                return rows
+            if not keys:
+                if products is catalog:
+                    return list(catalog)
+                return self._in_catalog_order({p['id'] for p in products})
+            field, descending = keys[-1]
+            ids = index.order(field, catalog)
+            if products is catalog:
+                ids = list(ids)
+            else:
+                wanted = {p['id'] for p in products}
+                ids = [pid for pid in ids if pid in wanted]
+            if descending:
+                ids.reverse()
+            # The more significant keys re-order by precomputed integer ranks;
+            # the sort is stable, so ties keep the order of the previous pass
+            for field, descending in reversed(keys[:-1]):
+                ids.sort(key=index.ranks(field, catalog).__getitem__, reverse=descending)
+            return [self._by_id[pid] for pid in ids]
+
+    def page(self, offset, limit):
+        """Một trang sản phẩm theo thứ tự catalog
+
+        Khi catalog chưa nằm trong bộ nhớ thì chỉ đọc trang đó từ tầng lưu
+        trữ (không tải cả catalog), nên những dòng đầu hiện ra ngay dù
+        catalog lớn tới đâu.
+        """
+        with self._lock:
+            if self._loaded:
+                self._ensure_loaded()
+                return self._products[offset:offset + limit]
+        # Not under the lock: a background load may be holding the storage
+        return self.storage.page_products(offset, limit)
+
+    def seek(self, field, after=None, limit=50, descending=False):
+        """Trang tiếp theo khi sắp theo field ('name', 'price', 'created_at', ...)
+
+        after: con trỏ (giá trị field, id) của sản phẩm cuối trang trước,
+        None là trang đầu. Thứ tự như khi sắp xếp bảng (SortIndex), nên mỗi
+        trang tốn hai lần bisect chứ không sắp xếp. Để đọc theo trang mà
+        không tải catalog, dùng storage.seek_products (thứ tự của tầng lưu trữ).
+        """
+        with metrics.span("catalog.seek"), self._lock:
+            self._ensure_loaded()
+            ids = self.sort_index.seek(field, self._products, after, limit, descending)
+            return [self._by_id[pid] for pid in ids]
+
+    def snapshot(self, fields):
+        """Bản sao các cột của catalog (xem ProductTable.snapshot), để tính ngoài khóa"""
+        with self._lock:
+            self._ensure_loaded()
+            return self._table.snapshot(fields)
+
+    def add(self, product, wait=True):
+        """Thêm một sản phẩm"""
+        return self.add_many([product], wait)
+
+    def add_many(self, products, wait=True):
+        """Thêm nhiều sản phẩm và ghi một lần"""
+        with self._lock:
+            self._ensure_loaded()
+            items = [self._insert(product) for product in products]
+            self._products.extend(item[1] for item in items)
+            future = self._submit(items)
+        return self._result(future, wait)
+
+    def upsert_many(self, products, wait=True):
+        """Thêm hoặc cập nhật theo SKU, ghi một lần
+
+        Sản phẩm có SKU đã tồn tại thì chỉ ghi các trường thay đổi; trả về
+        (số thêm, số cập nhật), hoặc None nếu không ghi được.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            items = []
+            added = []
+            updated = 0
+            for product in products:
+                sku = product.get('sku')
+                product_id = self.catalog_index.id_for_sku(sku) if sku else None
+                if product_id is None:
+                    item = self._insert(product)
+                    items.append(item)
+                    added.append(item[1])
+                    continue
+                current = self._by_id[product_id]
+                fields = {k: v for k, v in product.items() if k != 'id' and current.get(k) != v}
+                if not fields:
+                    continue
+                for idx in self.indexes:
+                    idx.remove(current)
+                current.update(fields)
+                for idx in self.indexes:
+                    idx.add(current)
+                items.append(('update', current, fields))
+                updated += 1
+            self._products.extend(added)
+            future = self._submit(items, (len(added), updated))
+        return self._result(future, wait, failed=None)
+
+    def _insert(self, product):
+        """Gán id (cả vào dict của người gọi), đưa vào cache và chỉ mục; trả về thao tác cần ghi"""
+        product['id'] = self._next_id
+        self._next_id += 1
+        product = self._table.append(product)
+        self._by_id[product['id']] = product
+        for index in self.indexes:
+            index.add(product)
+        return ('insert', product, None)
+
+    def _position(self, product):
+        # A pointer scan in C: list.index would compare the rows as mappings
+        return list(map(operator.is_, self._products, repeat(product))).index(True)
+
+    def update(self, product_id, fields, wait=True):
+        """Cập nhật sản phẩm theo id"""
+        with self._lock:
+            self._ensure_loaded()
+            product = self._by_id.get(product_id)
+            if product is None:
+                return self._result(self._done(False), wait)
+            fields = {k: v for k, v in fields.items() if k != 'id'}
+            for idx in self.indexes:
+                idx.remove(product)
+            product.update(fields)
+            for idx in self.indexes:
+                idx.add(product)
+            future = self._submit([('update', product, fields)])
+        return self._result(future, wait)
+
+    def delete(self, product_id, wait=True):
+        """Xóa sản phẩm theo id"""
+        with self._lock:
+            self._ensure_loaded()
+            product = self._by_id.pop(product_id, None)
+            if product is None:
+                return self._result(self._done(False), wait)
+            self._products.pop(self._position(product))
+            self._table.release(product)
+            for idx in self.indexes:
+                idx.remove(product)
+            future = self._submit([('delete', product, None)])
+        return self._result(future, wait)
+
+    def checkout(self, cart, created_by=None, wait=True):
+        """Bán một giỏ hàng [(sku, số lượng), ...]: trừ kho và ghi đơn hàng trong một thao tác
+
+        Cả giỏ được bán, hoặc không dòng nào. Tồn kho được kiểm tra lại trên
+        luồng ghi, dưới khóa giữa các tiến trình và sau khi đã đọc những gì
+        máy khác vừa bán, nên hai máy bán cùng lúc không bán quá số còn lại.
+        Trả về đơn hàng (dict), hoặc None nếu không ghi được; SKU lạ, số
+        lượng sai hay không đủ hàng thì ném CheckoutError. wait=False trả
+        về Future.
+        """
+        cart = parse_cart(cart)
+        with self._lock:
+            self._ensure_loaded()
+            # Early answer from the cache; the writer decides
+            problems = self._sellable(cart)[1]
+            if problems:
+                raise CheckoutError(problems)
+            order = new_order(created_by)
+            problems = []
+            future = self._submit([('checkout', order, (cart, problems))],
+                                  partial(self._checkout_result, order, problems))
+        return self._result(future, wait, failed=None)
+
+    def _sellable(self, cart):
+        """[(ProductRow, số lượng), ...] của giỏ hàng và danh sách lỗi (giữ khóa)"""
+        lines = []
+        problems = []
+        for sku, quantity in cart:
+            product = self._by_id.get(self.catalog_index.id_for_sku(sku))
+            if product is None:
+                problems.append(f"{sku}: không có sản phẩm này")
+            elif in_stock(product) < quantity:
+                problems.append(f"{sku}: còn {in_stock(product)}, cần {quantity}")
+            else:
+                lines.append((product, quantity))
+        return lines, problems
+
+    def _sell(self, item):
+        """Trên luồng ghi, giữ khóa: trừ kho trong cache và trả về thao tác cần ghi
+
+        None nếu giỏ hàng không còn bán được; lỗi nằm trong item.
+        """
+        _, order, (cart, problems) = item
+        # The cache is the stored catalog plus our queued edits; an edit of
+        # the count queued after this sale is written after it and wins anyway
+        lines, problems[:] = self._sellable(cart)
+        if problems:
+            metrics.count("catalog.checkouts_rejected")
+            return None
+        stock = []
+        for product, quantity in lines:
+            order['lines'].append(order_line(product, quantity))
+            for idx in self.indexes:
+                idx.remove(product)
+            product['quantity'] = in_stock(product) - quantity
+            for idx in self.indexes:
+                idx.add(product)
+            stock.append([product['id'], product['quantity']])
+        order['total'] = sum(line['amount'] for line in order['lines'])
+        metrics.count("catalog.checkouts")
+        return {"op": "checkout", "order": order, "stock": stock}
+
+    @staticmethod
+    def _checkout_result(order, problems):
+        if problems:
+            raise CheckoutError(problems)
+        return order
+
+    @staticmethod
+    def _done(value):
+        future = Future()
+        future.set_result(value)
+        return future
+
+    def _submit(self, items, value=True):
+        """Gửi thao tác cho luồng ghi (gọi khi đang giữ khóa), trả về Future
+
+        Gửi dưới khóa nên thứ tự ghi đúng bằng thứ tự sửa cache. value là
+        kết quả của Future, hoặc hàm tính nó sau khi ghi (xem GroupCommitWriter).
+        """
+        if not items:
+            return self._done(value)
+        self._inflight.extend(items)
+        return self.writer.submit(items, value)
+
+    @staticmethod
+    def _result(future, wait, failed=False):
+        # Never called holding the lock: the writer needs it to finish
+        if not wait:
+            return future
+        try:
+            return future.result()
+        except CheckoutError:
+            raise
+        except Exception:
+            # StorageError, but also "Writer is closed" or a product the
+            # backend cannot serialize: the callers only show `failed`
+            logger.exception("Catalog write failed")
+            return failed
+
+    @staticmethod
+    def _entry(item):
+        op, product, fields = item
+        if op == 'insert':
+            # A copy: it is serialized outside the lock
+            return {"op": "insert", "product": dict(product)}
+        if op == 'update':
+            return {"op": "update", "id": product['id'], "fields": fields}
+        return {"op": "delete", "id": product['id']}
+
+    def _commit(self, items):
+        """Chạy trên luồng ghi: ghi một nhóm thao tác xuống tầng lưu trữ
+
+        Giữ khóa giữa các tiến trình từ lúc đọc thay đổi của máy khác tới
+        lúc ghi xong, nên id mình cấp không trùng với id máy khác vừa ghi và
+        các lần bán được quyết định trên đúng số lượng đang có.
+        """
+        ok = False
+        metrics.count("catalog.commits")
+        metrics.count("catalog.entries_written", len(items))
+        try:
+            # Lock order: storage lock, then self._lock
+            with self.storage.write_lock():
+                with self._lock:
+                    if self._loaded and self.storage.signature() != self._signature:
+                        self._catch_up(self.storage.signature())
+                    elif not self._loaded and any(item[0] == 'checkout' for item in items):
+                        # Stock is never checked against a cache that failed a write
+                        self._ensure_loaded()
+                    entries = [self._sell(item) if item[0] == 'checkout' else self._entry(item)
+                               for item in items]
+                    entries = [entry for entry in entries if entry is not None]
+                with metrics.span("catalog.write"):
+                    self.storage.write_products(entries)
+                with self._lock:
+                    self.storage.maybe_compact(self._products)
+                    # Still under the storage lock: this is exactly our write
+                    self._signature = self.storage.signature()
+                    ok = True
+        finally:
+            with self._lock:
+                for _ in items:
+                    self._inflight.popleft()
+                if not ok:
+                    # The in-memory list no longer matches what is stored
+                    self._loaded = False
+
+    def flush(self):
+        """Chờ mọi thao tác đang chờ được ghi xong"""
+        self.writer.flush()
+
+    def close(self):
+        """Ghi nốt các thao tác đang chờ và dừng luồng ghi"""
+        self.writer.close()
+
+    def compact(self):
+        """Gộp dữ liệu đã ghi (ví dụ nhật ký JSON) vào snapshot"""
+        self.flush()
+        with self.storage.write_lock(), self._lock:
+            self._ensure_loaded()
+            try:
+                self.storage.compact(self._products)
+            except StorageError:
+                logger.exception("Catalog compaction failed")
+                return False
+            self._signature = self.storage.signature()
+            return True
+
+    def stats(self):
+        """Thống kê cache và tầng lưu trữ"""
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "size": len(self._products),
+                # Includes rows of deleted products until the next full load
+                "table_rows": len(self._table),
+            }
+            stats.update({
+                "uncommitted": len(self._inflight),
+                "commits": self.writer.commits,
+                "entries_written": self.writer.entries_written,
+                "largest_group": self.writer.largest_group,
+            })
+            stats.update(self.catalog_index.stats())
+            stats.update(self.sort_index.stats())
+            stats.update(self.facet_index.stats())
+            stats.update(self.storage.stats())
+            return stats
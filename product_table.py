@@ -0,0 +1,493 @@
+import sys
+from array import array
+from collections.abc import Mapping, MutableMapping
+
+# Marks a field the row does not have
+_MISSING = object()
+
+_INT_MIN = -2 ** 63
+_INT_MAX = 2 ** 63 - 1
+# Integers a double holds exactly
+_FLOAT_INT_MAX = 2 ** 53
+# Code array types, narrowest first, and how many codes each holds
+_CODE_TYPES = (('B', 2 ** 8), ('H', 2 ** 16), ('I', 2 ** 32))
+
+
+class _NumberColumn:
+    """Cột số: array('q') khi toàn số nguyên, chuyển cả cột sang array('d') khi gặp số thực
+
+    Số thực nguyên (100000.0) được giữ như số nguyên, giống product_import.
+    Giá trị không phải số (kể cả bool) trả về False để bảng giữ riêng.
+    """
+
+    __slots__ = ('values', 'floats')
+
+    def __init__(self):
+        self.values = array('q')
+        self.floats = False
+
+    def _encode(self, value):
+        kind = type(value)
+        if not self.floats:
+            if kind is int and _INT_MIN < value <= _INT_MAX:
+                return value
+            if kind is float and value.is_integer() and _INT_MIN < value <= _INT_MAX:
+                return int(value)
+            if kind is float and value == value:
+                self.values = array('d', (float('nan') if v == _INT_MIN else v
+                                          for v in self.values))
+                self.floats = True
+                return value
+            return None
+        if kind is float and value == value:
+            return value
+        if kind is int and -_FLOAT_INT_MAX <= value <= _FLOAT_INT_MAX:
+            return float(value)
+        return None
+
+    def _missing(self):
+        return float('nan') if self.floats else _INT_MIN
+
+    def append(self, value):
+        encoded = None if value is _MISSING else self._encode(value)
+        if encoded is None:
+            self.values.append(self._missing())
+            return value is _MISSING
+        self.values.append(encoded)
+        return True
+
+    def set(self, row, value):
+        encoded = None if value is _MISSING else self._encode(value)
+        if encoded is None:
+            self.values[row] = self._missing()
+            return value is _MISSING
+        self.values[row] = encoded
+        return True
+
+    def get(self, row):
+        value = self.values[row]
+        if not self.floats:
+            return _MISSING if value == _INT_MIN else value
+        if value != value:
+            return _MISSING
+        return int(value) if value.is_integer() else value
+
+    def take(self, rows):
+        values = list(map(self.values.__getitem__, rows))
+        if not self.floats:
+            if _INT_MIN in values:
+                values = [_MISSING if value == _INT_MIN else value for value in values]
+            return values
+        return [_MISSING if value != value else int(value) if value.is_integer() else value
+                for value in values]
+
+    def nbytes(self):
+        return sys.getsizeof(self.values)
+
+
+class _CodedColumn:
+    """Cột mã hóa từ điển: mỗi dòng giữ mã của giá trị, mỗi giá trị khác nhau lưu một lần
+
+    Mã nằm trong array('B'), nới ra 'H' rồi 'I' khi số giá trị khác nhau
+    vượt quá. Nhận chuỗi và None; giá trị khác trả về False.
+    """
+
+    __slots__ = ('codes', 'values', 'lookup')
+
+    def __init__(self):
+        self.codes = array('B')
+        # Code 0 is "missing"
+        self.values = [_MISSING]
+        self.lookup = {}
+
+    def _encode(self, value):
+        if value is not None and type(value) is not str:
+            return None
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            for typecode, limit in _CODE_TYPES:
+                if code < limit:
+                    break
+            if typecode != self.codes.typecode:
+                self.codes = array(typecode, self.codes)
+            self.values.append(value)
+            self.lookup[value] = code
+        return code
+
+    def append(self, value):
+        code = 0 if value is _MISSING else self._encode(value)
+        if code is None:
+            self.codes.append(0)
+            return False
+        self.codes.append(code)
+        return True
+
+    def set(self, row, value):
+        code = 0 if value is _MISSING else self._encode(value)
+        if code is None:
+            self.codes[row] = 0
+            return False
+        self.codes[row] = code
+        return True
+
+    def get(self, row):
+        return self.values[self.codes[row]]
+
+    def take(self, rows):
+        return list(map(self.values.__getitem__, map(self.codes.__getitem__, rows)))
+
+    def as_text(self):
+        """Cùng nội dung dưới dạng _TextColumn (bỏ các giá trị không còn dòng nào dùng)"""
+        column = _TextColumn()
+        values = self.values
+        column.values = [values[code] for code in self.codes]
+        return column
+
+    def nbytes(self):
+        return (sys.getsizeof(self.codes) + sys.getsizeof(self.values) + sys.getsizeof(self.lookup)
+                + sum(sys.getsizeof(value) for value in self.values[1:]))
+
+
+class _TextColumn:
+    """Cột giá trị gần như không trùng: danh sách, mỗi dòng một tham chiếu"""
+
+    __slots__ = ('values',)
+
+    def __init__(self):
+        self.values = []
+
+    def append(self, value):
+        self.values.append(value)
+        return True
+
+    def set(self, row, value):
+        self.values[row] = value
+        return True
+
+    def get(self, row):
+        return self.values[row]
+
+    def take(self, rows):
+        return list(map(self.values.__getitem__, rows))
+
+    def nbytes(self):
+        seen = set()
+        total = sys.getsizeof(self.values)
+        for value in self.values:
+            if value is not _MISSING and id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+        return total
+
+
+class ProductTable:
+    """Catalog lưu theo cột thay vì mỗi sản phẩm một dict
+
+    - id, giá, số lượng: array số (8 byte/sản phẩm mỗi cột)
+    - loại, thương hiệu, màu, người tạo, thời điểm tạo/sửa, nguồn: mã hóa
+      từ điển, mỗi giá trị khác nhau chỉ lưu một lần
+    - tên, mô tả, SKU: cũng mã hóa từ điển khi giá trị lặp lại nhiều (mô tả
+      theo mẫu, tên theo màu/size); khi số giá trị khác nhau vượt quá nửa
+      số dòng thì chuyển sang danh sách chuỗi
+    - trường khác, hoặc giá trị cột không chứa được (giá là chuỗi, ...):
+      giữ trong dict riêng của dòng đó
+
+    Mỗi sản phẩm được trả ra dưới dạng ProductRow, dùng như một dict. Dòng
+    của sản phẩm đã xóa không được dùng lại (ProductRow cũ vẫn đọc được giá
+    trị cũ); chỗ trống được thu hồi khi catalog được tải lại.
+    """
+
+    NUMBER_FIELDS = ('id', 'price', 'quantity')
+    CODED_FIELDS = ('category', 'brand', 'color', 'size', 'source',
+                    'created_by', 'created_at', 'updated_by', 'updated_at')
+    TEXT_FIELDS = ('sku', 'name', 'description')
+    # Text columns are checked for switching to a plain list this often (writes)
+    ADAPT_EVERY = 4096
+
+    def __init__(self):
+        self._columns = {}
+        for field in self.NUMBER_FIELDS:
+            self._columns[field] = _NumberColumn()
+        for field in self.CODED_FIELDS + self.TEXT_FIELDS:
+            self._columns[field] = _CodedColumn()
+        self._fields = ('id', 'sku', 'name', 'category', 'price', 'quantity', 'description',
+                        'brand', 'color', 'size', 'source',
+                        'created_at', 'created_by', 'updated_at', 'updated_by')
+        # row -> {field: value} for fields or values the columns cannot hold
+        self._extras = {}
+        # 1 per row still in the catalog, 0 once its product is deleted
+        self._live = bytearray()
+        self._rows = 0
+        self._writes = 0
+
+    @classmethod
+    def from_columns(cls, rows, columns, extras=None):
+        """Bảng rows dòng dựng thẳng từ các cột, không qua dict (ngược với snapshot())
+
+        columns: {trường: ("number", array 'q' hoặc 'd') hoặc ("coded",
+        array mã, danh sách giá trị)}, cùng quy ước như snapshot(): ô
+        trống là -2**63 / NaN, mã 0 là không có (phần tử đầu của danh sách
+        giá trị bị bỏ qua). extras: {dòng: {trường: giá trị}} cho những giá
+        trị cột không chứa được. Trả về (bảng, danh sách ProductRow).
+        """
+        table = cls()
+        for field, data in columns.items():
+            column = table._columns.get(field)
+            if isinstance(column, _NumberColumn) and data[0] == "number":
+                column.values = data[1]
+                column.floats = data[1].typecode == 'd'
+            elif isinstance(column, _CodedColumn) and data[0] == "coded":
+                column.codes = data[1]
+                column.values = [_MISSING] + list(data[2][1:])
+                column.lookup = {value: code for code, value in enumerate(column.values) if code}
+            else:
+                raise ValueError(f"Cột không hợp lệ: {field}")
+        for field, column in table._columns.items():
+            if field not in columns:
+                if isinstance(column, _NumberColumn):
+                    column.values = array('q', [_INT_MIN]) * rows
+                else:
+                    column.codes = array('B', bytes(rows))
+        table._extras = dict(extras or {})
+        table._live = bytearray(b'\x01') * rows
+        table._rows = rows
+        return table, [ProductRow(table, row) for row in range(rows)]
+
+    def __len__(self):
+        return self._rows
+
+    def append(self, product):
+        """Thêm một dòng từ dict, trả về ProductRow của nó"""
+        row = self._rows
+        extras = None
+        found = 0
+        for field, column in self._columns.items():
+            value = product.get(field, _MISSING)
+            if value is not _MISSING:
+                found += 1
+            if not column.append(value):
+                if extras is None:
+                    extras = {}
+                extras[field] = value
+        if len(product) > found:
+            for field, value in product.items():
+                if field not in self._columns:
+                    if extras is None:
+                        extras = {}
+                    extras[field] = value
+        if extras:
+            self._extras[row] = extras
+        self._live.append(1)
+        self._rows += 1
+        self._wrote()
+        return ProductRow(self, row)
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % self.ADAPT_EVERY:
+            return
+        for field in self.TEXT_FIELDS:
+            column = self._columns[field]
+            if isinstance(column, _CodedColumn) and \
+                    len(column.values) > max(self.ADAPT_EVERY, self._rows // 2):
+                # Mostly distinct values: the dictionary only adds overhead
+                self._columns[field] = column.as_text()
+
+    def extend(self, products):
+        """Thêm nhiều dòng, trả về danh sách ProductRow
+
+        Phần tử của products được thay bằng None ngay khi chuyển xong, nên
+        dict của lô đã chuyển được giải phóng trước khi hết lô.
+        """
+        rows = []
+        for i, product in enumerate(products):
+            rows.append(self.append(product))
+            products[i] = None
+        return rows
+
+    def release(self, product):
+        """Đánh dấu dòng của sản phẩm đã bị xóa khỏi catalog (row vẫn đọc được)"""
+        if isinstance(product, ProductRow) and product._table is self:
+            self._live[product._row] = 0
+
+    def snapshot(self, fields):
+        """Bản sao các cột để tính toán ngoài khóa (ví dụ báo cáo)
+
+        Trả về dict: "live" (bytes, 1 cho dòng còn trong catalog) và với
+        mỗi trường ("number", array), ("coded", array mã, danh sách giá
+        trị; mã 0 là không có) hoặc ("text", danh sách giá trị). Giá trị
+        thiếu trong cột số là -2**63 (array 'q') hoặc NaN (array 'd').
+        """
+        data = {"live": bytes(self._live)}
+        for field in fields:
+            column = self._columns[field]
+            if isinstance(column, _NumberColumn):
+                data[field] = ("number", column.values[:])
+            elif isinstance(column, _CodedColumn):
+                data[field] = ("coded", column.codes[:], list(column.values))
+            else:
+                data[field] = ("text", list(column.values))
+        return data
+
+    def value(self, row, field, default=_MISSING):
+        column = self._columns.get(field)
+        if column is not None:
+            value = column.get(row)
+            if value is not _MISSING:
+                return value
+        extras = self._extras.get(row)
+        if extras is not None and field in extras:
+            return extras[field]
+        return default
+
+    def take(self, rows, field, default=None):
+        """Giá trị của field ở các dòng rows, default nếu dòng không có
+
+        Đọc cả cột một lượt (trong C với cột chuỗi), nhanh hơn nhiều so
+        với gọi value() cho từng dòng khi cần nhiều dòng, ví dụ khi xuất file.
+        """
+        column = self._columns.get(field)
+        values = [_MISSING] * len(rows) if column is None else column.take(rows)
+        if _MISSING in values:
+            # Missing from the column: the value, if any, is in the row's extras
+            extras = self._extras
+            values = [value if value is not _MISSING
+                      else extras[row].get(field, default) if row in extras else default
+                      for row, value in zip(rows, values)]
+        return values
+
+    def set_value(self, row, field, value):
+        column = self._columns.get(field)
+        extras = self._extras.get(row)
+        if column is not None and column.set(row, value):
+            if extras is not None and field in extras:
+                del extras[field]
+                if not extras:
+                    del self._extras[row]
+            self._wrote()
+            return
+        if extras is None:
+            extras = self._extras[row] = {}
+        extras[field] = value
+
+    def delete_value(self, row, field):
+        """Xóa một trường của dòng; KeyError nếu dòng không có trường đó"""
+        extras = self._extras.get(row)
+        if extras is not None and field in extras:
+            del extras[field]
+            if not extras:
+                del self._extras[row]
+            column = self._columns.get(field)
+            if column is not None:
+                column.set(row, _MISSING)
+            return
+        column = self._columns.get(field)
+        if column is None or column.get(row) is _MISSING:
+            raise KeyError(field)
+        column.set(row, _MISSING)
+
+    def clear_row(self, row):
+        for column in self._columns.values():
+            column.set(row, _MISSING)
+        self._extras.pop(row, None)
+
+    def fields(self, row):
+        """Các trường dòng đang có, theo thứ tự cố định rồi tới trường riêng"""
+        columns = self._columns
+        for field in self._fields:
+            if columns[field].get(row) is not _MISSING:
+                yield field
+        extras = self._extras.get(row)
+        if extras:
+            yield from extras
+
+    def memory_usage(self):
+        """Số byte của từng cột (gồm cả chuỗi) và phần trường riêng"""
+        usage = {field: column.nbytes() for field, column in self._columns.items()}
+        extras = sys.getsizeof(self._extras)
+        for values in self._extras.values():
+            extras += sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values.values())
+        usage['extras'] = extras
+        return usage
+
+
+def columns_of(products, fields, default=None):
+    """Giá trị các trường của một lô sản phẩm, theo cột: [[field 1 của từng sản phẩm], ...]
+
+    Các ProductRow cùng một bảng được đọc qua ProductTable.take, mỗi
+    trường một lượt; sản phẩm khác (dict, ...) đọc bằng get.
+    """
+    table = products[0]._table if products and isinstance(products[0], ProductRow) else None
+    if table is not None and all(isinstance(product, ProductRow) and product._table is table
+                                 for product in products):
+        rows = [product._row for product in products]
+        return [table.take(rows, field, default) for field in fields]
+    return [[product.get(field, default) for product in products] for field in fields]
+
+
+class ProductRow(MutableMapping):
+    """Một sản phẩm trong ProductTable, dùng như dict (get, [], update, items, dict(row), ...)
+
+    Sửa qua row ghi thẳng vào các cột của bảng; dict(row) cho bản sao
+    dict thường (để ghi JSON hoặc gửi đi nơi khác).
+    """
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, field):
+        value = self._table.value(self._row, field)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def get(self, field, default=None):
+        # The common case inlined: a column holding the value
+        table = self._table
+        column = table._columns.get(field)
+        if column is not None:
+            value = column.get(self._row)
+            if value is not _MISSING:
+                return value
+        value = table.value(self._row, field)
+        return default if value is _MISSING else value
+
+    def __contains__(self, field):
+        return self._table.value(self._row, field) is not _MISSING
+
+    def __setitem__(self, field, value):
+        self._table.set_value(self._row, field, value)
+
+    def __delitem__(self, field):
+        self._table.delete_value(self._row, field)
+
+    def __iter__(self):
+        return self._table.fields(self._row)
+
+    def __len__(self):
+        return sum(1 for _ in self._table.fields(self._row))
+
+    def clear(self):
+        self._table.clear_row(self._row)
+
+    def __eq__(self, other):
+        if isinstance(other, ProductRow) and other._table is self._table and other._row == self._row:
+            return True
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        # Different products have different ids; settle that before copying
+        if self.get('id') != other.get('id'):
+            return False
+        return dict(self) == dict(other)
+
+    __hash__ = None
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return f"ProductRow({dict(self)!r})"
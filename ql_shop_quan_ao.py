@@ -1,14 +1,45 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import os
 import hashlib
-import requests
+import logging
+import time
 from datetime import datetime
+import queue
 import threading
+from bulk_loader import BulkLoader
+from catalog_export import EXPORT_COLUMNS, ExportError, detect_format, export_products, parse_columns
+from catalog_export import format_report as format_export_report
+from change_watcher import ChangeWatcher
+from facet_index import BANDS, FACETS, FACET_LABELS, value_label
+from instrumentation import configure_logging, metrics, timed
+from product_import import format_report, import_products
+from product_repository import ProductRepository
+from user_store import UserStore
+from live_search import LiveSearch
+from virtual_list import VirtualTreeview
+from stats_panel import StatsPanel
+from checkout_panel import CheckoutPanel
+from storage import StorageError, create_storage
+
+logger = logging.getLogger(__name__)
 
 class ClothingShopManager:
+    # Rows handed to the product table per batch while loading
+    LOAD_BATCH = 5000
+    # How often the UI picks up edits made by other stations
+    EXTERNAL_POLL_MS = 250
+    # Let the login form paint before the prefetch thread competes for the GIL
+    PREFETCH_DELAY_MS = 100
+    # Product table headings that sort the table, and the field each sorts by
+    SORT_COLUMNS = {'Tên sản phẩm': 'name', 'Loại': 'category', 'Giá': 'price',
+                    'Số lượng': 'quantity', 'Ngày tạo': 'created_at'}
+    # Parallel page fetches of "Lấy dữ liệu API" unless SHOP_API_PARALLELISM says otherwise
+    DEFAULT_API_PARALLELISM = 8
+    
     def __init__(self):
+        # SHOP_LOG_LEVEL / SHOP_LOG_FILE; SHOP_METRICS=1 turns timing on from the start
+        configure_logging()
         self.root = tk.Tk()
         self.root.title("Quản Lý Shop Quần Áo")
         self.root.geometry("1200x700")
@@ -17,11 +48,73 @@ class ClothingShopManager:
         # File paths
         self.products_file = "products.json"
         self.users_file = "users.json"
+        self.db_file = "shop.db"
+        
+        # Supplier catalog API (paginated JSON) used by "Lấy dữ liệu API"
+        self.api_url = os.environ.get("SHOP_API_URL", "")
+        self.api_parallelism = self.DEFAULT_API_PARALLELISM
+        parallelism = os.environ.get("SHOP_API_PARALLELISM")
+        if parallelism:
+            try:
+                self.api_parallelism = int(parallelism)
+            except ValueError:
+                self.api_parallelism = 0
+            if self.api_parallelism < 1:
+                # Only sync uses it: a bad value must not stop the app
+                logger.warning("Ignoring SHOP_API_PARALLELISM=%r, using %d",
+                               parallelism, self.DEFAULT_API_PARALLELISM)
+                self.api_parallelism = self.DEFAULT_API_PARALLELISM
+        self.sync_cache_file = "sync_cache.json"
+        
+        # Storage backend: "json" (default), "binary" or "sqlite"
+        self.storage_backend = os.environ.get("SHOP_STORAGE", "json")
+        try:
+            self.storage = create_storage(self.storage_backend, self.products_file,
+                                          self.users_file, self.db_file)
+        except StorageError as e:
+            logger.error("Error opening storage: %s", e)
+            messagebox.showerror("Lỗi", f"Không thể mở dữ liệu, dùng file JSON: {str(e)}")
+            self.storage = create_storage("json", self.products_file, self.users_file)
+        
+        # In-memory catalog and user index, reloaded only when the storage changes
+        self.product_repo = ProductRepository(self.storage)
+        self.user_store = UserStore(self.storage)
         
         # Current user
         self.current_user = None
         self.is_admin = False
         
+        # Background load/import in progress, if any
+        self.loader = None
+        
+        # Hidden admin statistics window and inventory reports window, if open
+        self.stats_panel = None
+        self.reports_panel = None
+        # Point-of-sale window, if open
+        self.checkout_panel = None
+        
+        # Reads accounts and the catalog while the login form is shown
+        self.prefetcher = None
+        
+        # Product table sort: [(field, descending), ...], primary key first;
+        # empty is catalog order
+        self.sort_keys = []
+        
+        # While the first load runs, the table shows pages read straight from
+        # storage: offset of the page shown, None once the catalog is in memory
+        self.storage_page = None
+        
+        # Faceted filters: facet -> selected values (any of them within a
+        # facet, every facet with a selection must match)
+        self.facet_selection = {facet: set() for facet in FACETS}
+        # Checkbutton variables of each facet's menu (Tk keeps only their names)
+        self.facet_vars = {}
+        
+        # Edits by other stations sharing the data files: the watcher thread
+        # applies them to the catalog and queues the changed ids for the UI
+        self.watcher = None
+        self.external_changes = queue.Queue()
+        
         # Initialize data files
         self.init_data_files()
         
@@ -31,68 +124,31 @@ class ClothingShopManager:
     def init_data_files(self):
         """Khởi tạo các file dữ liệu nếu chưa tồn tại"""
         try:
-            # Initialize products file
-            if not os.path.exists(self.products_file):
-                print("Creating products.json file")
-                with open(self.products_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-            
-            # Initialize users file with default admin
-            if not os.path.exists(self.users_file):
-                print("Creating users.json file")
-                default_users = [
-                    {
-                        "username": "admin",
-                        "password": self.hash_password("admin123"),
-                        "role": "admin",
-                        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    },
-                    {
-                        "username": "user",
-                        "password": self.hash_password("user123"),
-                        "role": "user",
-                        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                ]
-                with open(self.users_file, 'w', encoding='utf-8') as f:
-                    json.dump(default_users, f, ensure_ascii=False, indent=2)
-                print(f"Created default users: admin/admin123, user/user123")
+            # Default admin and user accounts, created only if there are no users yet
+            default_users = [
+                {
+                    "username": "admin",
+                    "password": self.hash_password("admin123"),
+                    "role": "admin",
+                    "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                },
+                {
+                    "username": "user",
+                    "password": self.hash_password("user123"),
+                    "role": "user",
+                    "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                }
+            ]
+            self.storage.init_users(default_users)
                 
         except Exception as e:
-            print(f"Error initializing data files: {str(e)}")
+            logger.exception("Error initializing data files")
             messagebox.showerror("Lỗi", f"Không thể khởi tạo file dữ liệu: {str(e)}")
     
     def hash_password(self, password):
         """Mã hóa mật khẩu"""
         return hashlib.sha256(password.encode()).hexdigest()
     
-    def load_json_data(self, filename):
-        """Đọc dữ liệu từ file JSON"""
-        try:
-            if not os.path.exists(filename):
-                print(f"File {filename} không tồn tại, tạo file mới")
-                return []
-            
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"Loaded data from {filename}: {len(data)} items")
-                return data
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error in {filename}: {str(e)}")
-            return []
-        except Exception as e:
-            print(f"Error loading {filename}: {str(e)}")
-            return []
-    
-    def save_json_data(self, filename, data):
-        """Lưu dữ liệu vào file JSON"""
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
-        except:
-            return False
-    
     def create_login_window(self):
         """Tạo cửa sổ đăng nhập"""
         # Clear main window
@@ -144,38 +200,54 @@ class ClothingShopManager:
         
         # Focus on username entry
         self.username_entry.focus_set()
+        
+        self.root.after(self.PREFETCH_DELAY_MS, self.start_prefetch)
     
+    def start_prefetch(self):
+        """Đọc trước tài khoản rồi catalog ở luồng nền trong lúc chờ đăng nhập"""
+        if self.prefetcher is not None and self.prefetcher.is_alive():
+            return
+        
+        def work():
+            try:
+                # Accounts first: the login button needs them soonest
+                self.user_store.preload()
+                with metrics.span("prefetch"):
+                    self.product_repo.preload()
+            except Exception:
+                logger.exception("Error prefetching data")
+        
+        self.prefetcher = threading.Thread(target=work, name="prefetch")
+        self.prefetcher.daemon = True
+        self.prefetcher.start()
+    
+    @timed("login")
     def login(self):
         """Xử lý đăng nhập"""
         try:
             username = self.username_entry.get().strip()
             password = self.password_entry.get().strip()
             
-            print(f"Attempting login with username: {username}")  # Debug
-            
             if not username or not password:
                 messagebox.showerror("Lỗi", "Vui lòng nhập đầy đủ thông tin!")
                 return
             
-            users = self.load_json_data(self.users_file)
-            print(f"Loaded {len(users)} users from file")  # Debug
-            
-            hashed_password = self.hash_password(password)
-            print(f"Hashed password: {hashed_password}")  # Debug
+            user = self.user_store.authenticate(username, self.hash_password(password))
             
-            for user in users:
-                print(f"Checking user: {user['username']}, stored hash: {user['password']}")  # Debug
-                if user['username'] == username and user['password'] == hashed_password:
-                    self.current_user = username
-                    self.is_admin = (user['role'] == 'admin')
-                    print(f"Login successful for {username}, admin: {self.is_admin}")  # Debug
-                    self.create_main_window()
-                    return
+            if user is not None:
+                self.current_user = username
+                self.is_admin = (user['role'] == 'admin')
+                logger.info("User %s logged in (admin: %s)", username, self.is_admin)
+                metrics.count("login.success")
+                self.create_main_window()
+                return
             
+            logger.warning("Failed login for user %s", username)
+            metrics.count("login.failed")
             messagebox.showerror("Lỗi", "Tên đăng nhập hoặc mật khẩu không đúng!")
             
         except Exception as e:
-            print(f"Login error: {str(e)}")  # Debug
+            logger.exception("Login error")
             messagebox.showerror("Lỗi", f"Lỗi đăng nhập: {str(e)}")
     
     def show_register_dialog(self):
@@ -227,14 +299,6 @@ class ClothingShopManager:
                 messagebox.showerror("Lỗi", "Mật khẩu phải có ít nhất 6 ký tự!")
                 return
             
-            users = self.load_json_data(self.users_file)
-            
-            # Check if username exists
-            for user in users:
-                if user['username'] == username:
-                    messagebox.showerror("Lỗi", "Tên đăng nhập đã tồn tại!")
-                    return
-            
             # Add new user
             new_user = {
                 "username": username,
@@ -243,11 +307,17 @@ class ClothingShopManager:
                 "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             
-            users.append(new_user)
+            try:
+                added = self.user_store.register(new_user)
+            except StorageError:
+                logger.exception("Register error")
+                added = None
             
-            if self.save_json_data(self.users_file, users):
+            if added:
                 messagebox.showinfo("Thành công", "Đăng ký thành công!")
                 dialog.destroy()
+            elif added is False:
+                messagebox.showerror("Lỗi", "Tên đăng nhập đã tồn tại!")
             else:
                 messagebox.showerror("Lỗi", "Không thể lưu thông tin đăng ký!")
         
@@ -302,11 +372,48 @@ class ClothingShopManager:
         
         # Load initial data
         self.load_products()
+        self.start_watching()
         
         # Add logout button
         logout_btn = tk.Button(header_frame, text="Đăng xuất", command=self.logout,
                               bg='#e74c3c', fg='white', font=('Arial', 10), pady=5)
         logout_btn.pack(side='right', padx=(0, 20), pady=15)
+        
+        # Hidden statistics window; Shift makes Tk report the key as 'S'
+        if self.is_admin:
+            self.root.bind('<Control-S>', lambda e: self.show_stats_panel())
+        else:
+            self.root.unbind('<Control-S>')
+    
+    def show_stats_panel(self):
+        """Mở cửa sổ thống kê hiệu năng (chỉ quản trị viên)"""
+        if not self.is_admin:
+            return
+        if self.stats_panel is not None and self.stats_panel.window.winfo_exists():
+            self.stats_panel.window.lift()
+            return
+        self.stats_panel = StatsPanel(self.root, lambda: {"repository": self.product_repo.stats()})
+    
+    def show_reports_panel(self):
+        """Mở cửa sổ báo cáo tồn kho (chỉ quản trị viên)"""
+        if not self.is_admin:
+            return
+        if self.reports_panel is not None and self.reports_panel.window.winfo_exists():
+            self.reports_panel.window.lift()
+            self.reports_panel.refresh()
+            return
+        # NumPy is only imported once reports are opened
+        from reports_panel import ReportsPanel
+        self.reports_panel = ReportsPanel(self.root, self.product_repo)
+    
+    def show_checkout_panel(self):
+        """Mở cửa sổ bán hàng"""
+        if self.checkout_panel is not None and self.checkout_panel.window.winfo_exists():
+            self.checkout_panel.window.lift()
+            return
+        self.checkout_panel = CheckoutPanel(
+            self.root, self.product_repo, self.current_user,
+            on_sold=lambda order: self.refresh_product_rows())
     
     def create_control_panel(self, parent):
         """Tạo panel điều khiển"""
@@ -355,9 +462,15 @@ class ClothingShopManager:
                      bg='#e74c3c', fg='white', font=('Arial', 10), width=15).pack(pady=5)
             tk.Button(btn_frame, text="Lấy dữ liệu API", command=self.fetch_api_data,
                      bg='#9b59b6', fg='white', font=('Arial', 10), width=15).pack(pady=5)
-            #tk.Button(btn_frame, text="Đọc dữ liệu", command=self.load_custom_json_data,
-                     #bg='#1abc9c', fg='white', font=('Arial', 10), width=15).pack(pady=5)
-        
+            tk.Button(btn_frame, text="Nhập dữ liệu", command=self.load_custom_json_data,
+                     bg='#1abc9c', fg='white', font=('Arial', 10), width=15).pack(pady=5)
+            tk.Button(btn_frame, text="Xuất dữ liệu", command=self.export_view,
+                     bg='#16a085', fg='white', font=('Arial', 10), width=15).pack(pady=5)
+            tk.Button(btn_frame, text="Báo cáo", command=self.show_reports_panel,
+                     bg='#34495e', fg='white', font=('Arial', 10), width=15).pack(pady=5)
+        
+        tk.Button(btn_frame, text="Bán hàng", command=self.show_checkout_panel,
+                 bg='#27ae60', fg='white', font=('Arial', 10), width=15).pack(pady=5)
         tk.Button(btn_frame, text="Làm mới", command=self.load_products,
                  bg='#3498db', fg='white', font=('Arial', 10), width=15).pack(pady=5)
         
@@ -367,7 +480,10 @@ class ClothingShopManager:
         
         self.search_entry = tk.Entry(search_frame, font=('Arial', 10), width=25)
         self.search_entry.pack(padx=10, pady=10)
-        self.search_entry.bind('<KeyRelease>', self.search_products)
+        self.live_search = LiveSearch(self.root, self.search_entry,
+                                      self.search_catalog, self.render_search_results)
+        self.search_entry.bind('<KeyRelease>', self.live_search.on_key)
+        self.search_entry.bind('<Return>', self.search_products)
     
     def create_product_list(self, parent):
         """Tạo danh sách sản phẩm"""
@@ -378,7 +494,49 @@ class ClothingShopManager:
         tree_frame = tk.Frame(parent, bg='white')
         tree_frame.pack(fill='both', expand=True, padx=20, pady=(0, 20))
         
-        columns = ('ID', 'Tên sản phẩm', 'Loại', 'Giá', 'Số lượng', 'Mô tả')
+        # Progress of a background load, shown above the table while it runs
+        self.load_frame = tk.Frame(parent, bg='white')
+        self.load_label = tk.Label(self.load_frame, text="", font=('Arial', 10), bg='white')
+        self.load_label.pack(side='left')
+        tk.Button(self.load_frame, text="Hủy", command=self.cancel_loading,
+                 bg='#e74c3c', fg='white', font=('Arial', 9), width=8).pack(side='right')
+        self.load_progress = ttk.Progressbar(self.load_frame, mode='determinate', length=250)
+        self.load_progress.pack(side='right', padx=10)
+        self.tree_frame = tree_frame
+        
+        # Faceted filters above the table; each menu shows how many products
+        # every value would leave, given the search and the other filters
+        filter_frame = tk.Frame(parent, bg='white')
+        filter_frame.pack(fill='x', padx=20, pady=(0, 5), before=tree_frame)
+        tk.Label(filter_frame, text="Lọc:", font=('Arial', 10), bg='white').pack(side='left')
+        self.facet_buttons = {}
+        self.facet_menus = {}
+        for facet in FACETS:
+            button = tk.Menubutton(filter_frame, text=FACET_LABELS[facet], relief='raised',
+                                   font=('Arial', 9), bg='white')
+            menu = tk.Menu(button, tearoff=0,
+                           postcommand=lambda facet=facet: self.fill_facet_menu(facet))
+            button.config(menu=menu)
+            button.pack(side='left', padx=3)
+            self.facet_buttons[facet] = button
+            self.facet_menus[facet] = menu
+        tk.Button(filter_frame, text="Bỏ lọc", command=self.clear_facets,
+                 font=('Arial', 9)).pack(side='left', padx=10)
+        self.filter_label = tk.Label(filter_frame, text="", font=('Arial', 9), bg='white')
+        self.filter_label.pack(side='right')
+        self.update_facet_buttons()
+        
+        # Previous/next page below the table
+        pager_frame = tk.Frame(parent, bg='white')
+        pager_frame.pack(side='bottom', fill='x', padx=20, pady=(0, 10), before=tree_frame)
+        tk.Button(pager_frame, text="◀ Trang trước", command=lambda: self.show_page(-1),
+                 font=('Arial', 9), width=12).pack(side='left')
+        tk.Button(pager_frame, text="Trang sau ▶", command=lambda: self.show_page(1),
+                 font=('Arial', 9), width=12).pack(side='right')
+        self.page_label = tk.Label(pager_frame, text="", font=('Arial', 9), bg='white')
+        self.page_label.pack()
+        
+        columns = ('ID', 'Tên sản phẩm', 'Loại', 'Giá', 'Số lượng', 'Ngày tạo', 'Mô tả')
         self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=15)
         
         # Column headings
@@ -394,69 +552,226 @@ class ClothingShopManager:
                 self.tree.column(col, width=100)
             elif col == 'Số lượng':
                 self.tree.column(col, width=100)
+            elif col == 'Ngày tạo':
+                self.tree.column(col, width=130)
             else:
                 self.tree.column(col, width=150)
         
         # Scrollbars
-        v_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.tree.yview)
+        v_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical')
         h_scrollbar = ttk.Scrollbar(tree_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
         
         # Pack
         self.tree.pack(side='left', fill='both', expand=True)
         v_scrollbar.pack(side='right', fill='y')
         h_scrollbar.pack(side='bottom', fill='x')
         
-        # Bind selection
-        self.tree.bind('<<TreeviewSelect>>', self.on_select_product)
+        # Virtual list: only the visible rows exist in the Treeview, and each
+        # row's iid is the product id so refreshes only touch changed rows
+        self.product_view = VirtualTreeview(self.tree, v_scrollbar, self.format_product_row,
+                                            on_select=self.on_select_product,
+                                            key=lambda product: product.get('id'),
+                                            on_render=self.update_page_label)
+        
+        # Click a heading to sort, Shift+click to add it as a secondary key
+        self.tree.bind('<ButtonRelease-1>', self.on_heading_click, add='+')
+        self.update_sort_headings()
+    
+    def selected_product_id(self):
+        """Id của sản phẩm đang chọn, None nếu chưa chọn"""
+        product = self.product_view.selected_item()
+        if product is None:
+            return None
+        return product.get('id')
+    
+    def format_product_row(self, position, product):
+        """Giá trị các cột của một dòng sản phẩm"""
+        description = product.get('description', '')
+        return (
+            product.get('id', position + 1),
+            product.get('name', ''),
+            product.get('category', ''),
+            f"{product.get('price', 0):,} VNĐ",
+            product.get('quantity', 0),
+            product.get('created_at', ''),
+            description[:50] + '...' if len(description) > 50 else description
+        )
     
+    @timed("load_products")
     def load_products(self):
-        """Tải danh sách sản phẩm"""
-        # Clear current items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        products = self.load_json_data(self.products_file)
-        
-        for i, product in enumerate(products, 1):
-            self.tree.insert('', 'end', values=(
-                i,
-                product.get('name', ''),
-                product.get('category', ''),
-                f"{product.get('price', 0):,} VNĐ",
-                product.get('quantity', 0),
-                product.get('description', '')[:50] + '...' if len(product.get('description', '')) > 50 else product.get('description', '')
-            ))
-    
-    def on_select_product(self, event):
+        """Tải danh sách sản phẩm
+        
+        Khi cache còn hợp lệ thì hiển thị ngay; khi phải đọc lại file thì
+        đọc ở luồng nền và đưa dần từng lô lên bảng.
+        """
+        if self.product_repo.is_fresh():
+            products = self.product_repo.filter(self.facet_selection,
+                                                self.search_entry.get().strip())
+            # Previous search results may be stale after a reload or an edit
+            self.live_search.reset()
+            self.product_view.set_rows(self.sort_products(products), keep_position=True)
+            self.update_filter_label()
+            return
+        if self.loader is not None and self.loader.running():
+            if self.loader.cancelled():
+                # A cancelled job (at logout, say) is still winding down on
+                # its thread: load once it has exited
+                self.root.after(BulkLoader.POLL_MS, self.reload_when_idle)
+            return
+        
+        query = self.search_entry.get().strip()
+        rows = []
+        started = time.perf_counter()
+        
+        prefetcher = self.prefetcher
+        sort_keys = self.sort_keys
+        selection = {facet: set(values) for facet, values in self.facet_selection.items()}
+        
+        if not self.product_view.rows and not query and not any(selection.values()) \
+                and not sort_keys:
+            # First load: show the first page read on its own (it does not
+            # grow with the catalog) while the whole catalog loads
+            self.storage_page = 0
+            self.product_view.set_rows(self.product_repo.page(0, self.product_view.visible))
+        
+        def work(emit, cancelled):
+            # A prefetch still reading the catalog finishes the job for us
+            if prefetcher is not None:
+                prefetcher.join()
+            # Parsing the file and building the indexes happen here
+            products = self.product_repo.preload()
+            if query or any(selection.values()):
+                products = self.product_repo.filter(selection, query)
+            if sort_keys:
+                products = self.product_repo.sort(products, sort_keys)
+            for start in range(0, len(products), self.LOAD_BATCH):
+                if cancelled():
+                    return None
+                emit((products[start:start + self.LOAD_BATCH], len(products)))
+            return len(products)
+        
+        def on_batch(item):
+            batch, total = item
+            if self.storage_page:
+                # The user has paged on; stay there until the load finishes
+                rows.extend(batch)
+            else:
+                self.storage_page = None
+                if not rows:
+                    self.product_view.set_rows(rows)
+                rows.extend(batch)
+                self.product_view.refresh()
+            self.show_load_progress(f"Đang hiển thị {len(rows):,}/{total:,} sản phẩm",
+                                    len(rows), total)
+        
+        def on_done(result, error, cancelled):
+            if not self.load_frame.winfo_exists():
+                return
+            page, self.storage_page = self.storage_page, None
+            if page and error is None:
+                # Back to the loaded rows, at the page the user was reading
+                self.product_view.set_rows(rows)
+                self.product_view.scroll_to(page)
+            self.hide_load_progress()
+            self.live_search.reset()
+            self.update_filter_label()
+            if metrics.enabled:
+                # Until the last batch is on screen, not just the call above
+                metrics.observe("load_products.background", (time.perf_counter() - started) * 1000)
+            if error is not None:
+                messagebox.showerror("Lỗi", f"Không thể tải dữ liệu: {str(error)}")
+            elif result == 0:
+                self.product_view.set_rows(rows)
+            elif result is not None and (self.search_entry.get().strip() != query
+                                         or self.facet_selection != selection):
+                # The query or the filters were changed while loading
+                self.live_search.run_now()
+            elif result is not None and self.sort_keys != sort_keys:
+                # A heading was clicked while loading
+                self.product_view.set_rows(self.product_repo.sort(rows, self.sort_keys),
+                                           keep_position=True)
+        
+        self.show_load_progress("Đang đọc dữ liệu...")
+        self.loader = BulkLoader(self.root, work, on_batch, on_done).start()
+    
+    def show_page(self, step):
+        """Trang trước (step -1) hoặc trang sau (step 1) của bảng"""
+        size = self.product_view.visible
+        if self.storage_page is None:
+            # Every row is in memory: paging is scrolling the virtual list
+            self.product_view.scroll_to(self.product_view.offset + step * size)
+            return
+        offset = max(0, self.storage_page + step * size)
+        products = self.product_repo.page(offset, size)
+        if products and offset != self.storage_page:
+            self.storage_page = offset
+            self.product_view.set_rows(products)
+    
+    def update_page_label(self):
+        """Vị trí trang hiện tại dưới bảng"""
+        view = self.product_view
+        size = max(1, view.visible)
+        if self.storage_page is not None:
+            self.page_label.config(text=f"Trang {self.storage_page // size + 1:,} "
+                                        f"(đang tải toàn bộ danh sách...)")
+        elif view.rows:
+            pages = (len(view.rows) - 1) // size + 1
+            page = min(pages, -(-view.offset // size) + 1)
+            self.page_label.config(text=f"Trang {page:,}/{pages:,}  "
+                                        f"(dòng {view.offset + 1:,}-"
+                                        f"{min(len(view.rows), view.offset + size):,} "
+                                        f"/ {len(view.rows):,})")
+        else:
+            self.page_label.config(text="")
+    
+    def show_load_progress(self, text, value=None, total=None):
+        """Hiện thanh tiến trình; value None là chưa biết tổng (chạy qua lại)"""
+        if not self.load_frame.winfo_ismapped():
+            self.load_frame.pack(fill='x', padx=20, pady=(0, 5), before=self.tree_frame)
+        self.load_label.config(text=text)
+        if value is None:
+            if str(self.load_progress.cget('mode')) != 'indeterminate':
+                self.load_progress.config(mode='indeterminate')
+                self.load_progress.start(15)
+        else:
+            if str(self.load_progress.cget('mode')) != 'determinate':
+                self.load_progress.stop()
+                self.load_progress.config(mode='determinate')
+            self.load_progress.config(maximum=max(total, 1), value=value)
+    
+    def hide_load_progress(self):
+        self.load_progress.stop()
+        self.load_frame.pack_forget()
+    
+    def reload_when_idle(self):
+        """Tải lại danh sách nếu cửa sổ chính vẫn còn"""
+        if self.load_frame.winfo_exists():
+            self.load_products()
+    
+    def cancel_loading(self):
+        """Hủy việc tải/nhập dữ liệu đang chạy nền"""
+        if self.loader is not None:
+            self.loader.cancel()
+    
+    @timed("on_select_product")
+    def on_select_product(self, product):
         """Xử lý khi chọn sản phẩm"""
-        selection = self.tree.selection()
-        if selection:
-            item = self.tree.item(selection[0])
-            values = item['values']
+        if product is not None:
+            # Fill form
+            self.name_entry.delete(0, tk.END)
+            self.name_entry.insert(0, product.get('name', ''))
             
-            if values:
-                # Load product data
-                products = self.load_json_data(self.products_file)
-                product_index = int(values[0]) - 1
-                
-                if 0 <= product_index < len(products):
-                    product = products[product_index]
-                    
-                    # Fill form
-                    self.name_entry.delete(0, tk.END)
-                    self.name_entry.insert(0, product.get('name', ''))
-                    
-                    self.category_var.set(product.get('category', ''))
-                    
-                    self.price_entry.delete(0, tk.END)
-                    self.price_entry.insert(0, str(product.get('price', '')))
-                    
-                    self.quantity_entry.delete(0, tk.END)
-                    self.quantity_entry.insert(0, str(product.get('quantity', '')))
-                    
-                    self.description_text.delete(1.0, tk.END)
-                    self.description_text.insert(1.0, product.get('description', ''))
+            self.category_var.set(product.get('category', ''))
+            
+            self.price_entry.delete(0, tk.END)
+            self.price_entry.insert(0, str(product.get('price', '')))
+            
+            self.quantity_entry.delete(0, tk.END)
+            self.quantity_entry.insert(0, str(product.get('quantity', '')))
+            
+            self.description_text.delete(1.0, tk.END)
+            self.description_text.insert(1.0, product.get('description', ''))
     
     def add_product(self):
         """Thêm sản phẩm mới"""
@@ -485,8 +800,6 @@ class ClothingShopManager:
             messagebox.showerror("Lỗi", "Giá và số lượng phải là số dương!")
             return
         
-        products = self.load_json_data(self.products_file)
-        
         new_product = {
             "name": name,
             "category": category,
@@ -497,9 +810,7 @@ class ClothingShopManager:
             "created_by": self.current_user
         }
         
-        products.append(new_product)
-        
-        if self.save_json_data(self.products_file, products):
+        if self.product_repo.add(new_product):
             messagebox.showinfo("Thành công", "Thêm sản phẩm thành công!")
             self.clear_form()
             self.load_products()
@@ -512,15 +823,11 @@ class ClothingShopManager:
             messagebox.showerror("Lỗi", "Bạn không có quyền thực hiện chức năng này!")
             return
         
-        selection = self.tree.selection()
-        if not selection:
+        product_id = self.selected_product_id()
+        if product_id is None:
             messagebox.showerror("Lỗi", "Vui lòng chọn sản phẩm cần cập nhật!")
             return
         
-        item = self.tree.item(selection[0])
-        values = item['values']
-        product_index = int(values[0]) - 1
-        
         name = self.name_entry.get().strip()
         category = self.category_var.get().strip()
         price_str = self.price_entry.get().strip()
@@ -542,10 +849,11 @@ class ClothingShopManager:
             messagebox.showerror("Lỗi", "Giá và số lượng phải là số dương!")
             return
         
-        products = self.load_json_data(self.products_file)
-        
-        if 0 <= product_index < len(products):
-            products[product_index].update({
+        if self.product_repo.get(product_id) is None:
+            messagebox.showerror("Lỗi", "Sản phẩm không còn tồn tại!")
+            self.load_products()
+        else:
+            updated = self.product_repo.update(product_id, {
                 "name": name,
                 "category": category,
                 "price": price,
@@ -555,7 +863,7 @@ class ClothingShopManager:
                 "updated_by": self.current_user
             })
             
-            if self.save_json_data(self.products_file, products):
+            if updated:
                 messagebox.showinfo("Thành công", "Cập nhật sản phẩm thành công!")
                 self.load_products()
             else:
@@ -567,24 +875,19 @@ class ClothingShopManager:
             messagebox.showerror("Lỗi", "Bạn không có quyền thực hiện chức năng này!")
             return
         
-        selection = self.tree.selection()
-        if not selection:
+        product_id = self.selected_product_id()
+        if product_id is None:
             messagebox.showerror("Lỗi", "Vui lòng chọn sản phẩm cần xóa!")
             return
         
         if not messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa sản phẩm này?"):
             return
         
-        item = self.tree.item(selection[0])
-        values = item['values']
-        product_index = int(values[0]) - 1
-        
-        products = self.load_json_data(self.products_file)
-        
-        if 0 <= product_index < len(products):
-            products.pop(product_index)
-            
-            if self.save_json_data(self.products_file, products):
+        if self.product_repo.get(product_id) is None:
+            messagebox.showerror("Lỗi", "Sản phẩm không còn tồn tại!")
+            self.load_products()
+        else:
+            if self.product_repo.delete(product_id):
                 messagebox.showinfo("Thành công", "Xóa sản phẩm thành công!")
                 self.clear_form()
                 self.load_products()
@@ -592,158 +895,355 @@ class ClothingShopManager:
                 messagebox.showerror("Lỗi", "Không thể xóa sản phẩm!")
                 
     def load_custom_json_data(self):
-        """Load dữ liệu từ file JSON tùy chỉnh và hiển thị lên giao diện"""
-        filename = 'products_load.json'  
+        """Nhập sản phẩm từ file JSON/NDJSON vào catalog (đọc theo luồng)"""
+        if not self.is_admin:
+            messagebox.showerror("Lỗi", "Bạn không có quyền thực hiện chức năng này!")
+            return
         
-        if not os.path.exists(filename):
-            messagebox.showerror("Lỗi", f"Không tìm thấy file {filename}")
+        if self.loader is not None and self.loader.running():
+            messagebox.showinfo("Thông báo", "Đang tải dữ liệu, vui lòng chờ hoặc hủy trước!")
             return
         
-        try:
-            with open(filename, 'r', encoding='utf-8-sig') as f:
-                data = json.load(f)
-            
-            # Xóa dữ liệu cũ trong Treeview
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Thêm dữ liệu mới
-            for i, product in enumerate(data, 1):
-                self.tree.insert('', 'end', values=(
-                    i,
-                    product.get('name', ''),
-                    product.get('category', ''),
-                    f"{product.get('price', 0):,} VNĐ",
-                    product.get('quantity', 0),
-                    product.get('description', '')[:50] + '...' if len(product.get('description', '')) > 50 else product.get('description', '')
-                ))
-            
-            messagebox.showinfo("Thành công", "Đã load dữ liệu từ file JSON!")
+        filename = filedialog.askopenfilename(
+            title="Chọn file sản phẩm",
+            initialfile='products_load.json',
+            filetypes=[("JSON / NDJSON", "*.json *.ndjson *.jsonl"), ("Tất cả", "*.*")])
+        if not filename:
+            return
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        def work(emit, cancelled):
+            # Parsing and validation run here; the catalog is updated one
+            # chunk at a time so memory stays flat however big the file is
+            return import_products(filename, self.product_repo,
+                                   progress=lambda report: emit(dict(report)),
+                                   cancelled=cancelled,
+                                   defaults={"created_by": self.current_user,
+                                             "created_at": created_at})
+        
+        def on_progress(report):
+            self.show_load_progress(f"Đã nhập {report['records']:,} bản ghi "
+                                    f"({report['rejected']:,} bị loại)",
+                                    report['bytes_read'], report['total_bytes'])
+        
+        def on_done(report, error, cancelled):
+            if not self.load_frame.winfo_exists():
+                return
+            self.hide_load_progress()
+            if error is not None:
+                messagebox.showerror("Lỗi", f"Không thể nhập dữ liệu: {str(error)}")
+            elif report is not None:
+                summary = format_report(report)
+                if report["error"]:
+                    messagebox.showerror("Lỗi", summary)
+                else:
+                    messagebox.showinfo("Nhập dữ liệu", summary)
+            elif cancelled:
+                messagebox.showinfo("Nhập dữ liệu", "Đã hủy (các lô đã nhập vẫn được lưu)")
+            self.load_products()
         
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể đọc dữ liệu: {str(e)}")
+        self.show_load_progress("Đang nhập dữ liệu...")
+        self.loader = BulkLoader(self.root, work, on_progress, on_done).start()
 
+    def export_view(self):
+        """Xuất danh sách đang hiển thị (kết quả tìm kiếm, lọc, sắp xếp) ra CSV/NDJSON"""
+        if not self.is_admin:
+            messagebox.showerror("Lỗi", "Bạn không có quyền thực hiện chức năng này!")
+            return
+        
+        if self.loader is not None and self.loader.running():
+            messagebox.showinfo("Thông báo", "Đang tải dữ liệu, vui lòng chờ hoặc hủy trước!")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Xuất dữ liệu",
+            initialfile='products.csv',
+            defaultextension='.csv',
+            filetypes=[("CSV", "*.csv"), ("CSV nén gzip", "*.csv.gz"),
+                       ("NDJSON", "*.ndjson"), ("NDJSON nén gzip", "*.ndjson.gz")])
+        if not filename:
+            return
+        try:
+            detect_format(filename)
+        except ExportError as e:
+            messagebox.showerror("Lỗi", str(e))
+            return
+        columns = simpledialog.askstring("Xuất dữ liệu", "Các cột (cách nhau bởi dấu phẩy):",
+                                         initialvalue=", ".join(EXPORT_COLUMNS),
+                                         parent=self.root)
+        if columns is None:
+            return
+        # Snapshot of the rows shown now (pointers only): with no search the
+        # view holds the repository's own list, which add/delete and the
+        # storage watcher change in place while the worker reads it
+        products = list(self.product_view.rows)
+        
+        def work(emit, cancelled):
+            return export_products(products, filename, parse_columns(columns),
+                                   total=len(products),
+                                   progress=lambda report: emit(dict(report)),
+                                   cancelled=cancelled)
+        
+        def on_progress(report):
+            self.show_load_progress(f"Đã xuất {report['rows']:,}/{report['total']:,} sản phẩm",
+                                    report['rows'], report['total'])
+        
+        def on_done(report, error, cancelled):
+            if not self.load_frame.winfo_exists():
+                return
+            self.hide_load_progress()
+            if error is not None:
+                messagebox.showerror("Lỗi", f"Không thể xuất dữ liệu: {str(error)}")
+            elif report is not None:
+                summary = format_export_report(report)
+                if report["error"]:
+                    messagebox.showerror("Lỗi", summary)
+                else:
+                    messagebox.showinfo("Xuất dữ liệu", summary)
+            elif cancelled:
+                messagebox.showinfo("Xuất dữ liệu", "Đã hủy (không tạo file)")
+        
+        self.show_load_progress("Đang xuất dữ liệu...")
+        self.loader = BulkLoader(self.root, work, on_progress, on_done).start()
     
-
     def fetch_api_data(self):
-        """Lấy dữ liệu từ API giả lập - tự phát sinh sản phẩm"""
+        """Đồng bộ sản phẩm từ API của nhà cung cấp (gộp theo SKU)"""
         if not self.is_admin:
             messagebox.showerror("Lỗi", "Bạn không có quyền thực hiện chức năng này!")
             return
         
-        def fetch_data():
+        if not self.api_url:
+            messagebox.showerror("Lỗi", "Chưa cấu hình địa chỉ API!\n"
+                                        "Đặt biến môi trường SHOP_API_URL rồi chạy lại ứng dụng.")
+            return
+        
+        if self.loader is not None and self.loader.running():
+            messagebox.showinfo("Thông báo", "Đang tải dữ liệu, vui lòng chờ hoặc hủy trước!")
+            return
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        def work(emit, cancelled):
+            # requests is only imported once a sync is actually run
+            from catalog_sync import CatalogSync
+            sync = CatalogSync(self.api_url, self.product_repo,
+                               parallelism=self.api_parallelism,
+                               cache_file=self.sync_cache_file)
             try:
-                # Giả lập thời gian xử lý API
-                import time
-                time.sleep(2)  # Giả lập thời gian chờ API
-                
-                # Dữ liệu mẫu để tạo sản phẩm
-                product_names = [
-                    "Áo thun nam basic", "Áo sơ mi nữ công sở", "Quần jean nam slim fit",
-                    "Váy midi hoa nhí", "Áo khoác bomber", "Quần short thể thao",
-                    "Đầm maxi bohemian", "Áo polo nam", "Chân váy chữ A",
-                    "Áo hoodie unisex", "Quần tây nữ", "Áo croptop nữ",
-                    "Quần jogger nam", "Váy suông tay dài", "Áo blazer nữ"
-                ]
-                
-                categories = ['Áo', 'Quần', 'Váy', 'Phụ kiện', 'Đồ thể thao']
-                
-                colors = ['Đen', 'Trắng', 'Xanh', 'Đỏ', 'Vàng', 'Hồng', 'Xám', 'Nâu']
-                
-                brands = ['Nike', 'Adidas', 'Zara', 'H&M', 'Uniqlo', 'Local Brand', 'Fashion House']
-                
-                descriptions = [
-                    "Chất liệu cotton cao cấp, thoáng mát",
-                    "Thiết kế hiện đại, phù hợp nhiều dáng người",
-                    "Form dáng chuẩn, dễ phối đồ",
-                    "Màu sắc trẻ trung, năng động",
-                    "Chất lượng tốt, giá cả hợp lý",
-                    "Xu hướng thời trang mới nhất",
-                    "Phong cách Hàn Quốc",
-                    "Thiết kế tối giản, thanh lịch"
-                ]
-                
-                import random
-                
-                products = self.load_json_data(self.products_file)
-                
-                # Tạo 8 sản phẩm ngẫu nhiên
-                api_products = []
-                for i in range(8):
-                    base_name = random.choice(product_names)
-                    color = random.choice(colors)
-                    brand = random.choice(brands)
-                    
-                    new_product = {
-                        "name": f"{base_name} {color} - {brand}",
-                        "category": random.choice(categories),
-                        "price": random.randint(89000, 899000),  # Giá từ 89k-899k
-                        "quantity": random.randint(5, 50),  # Số lượng 5-50
-                        "description": f"{random.choice(descriptions)}. Size: S, M, L, XL",
-                        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "created_by": self.current_user,
-                        "source": "API_Generated",
-                        "brand": brand,
-                        "color": color,
-                        "sku": f"API-{random.randint(10000, 99999)}"
-                    }
-                    
-                    # Điều chỉnh category dựa trên tên sản phẩm
-                    if "áo" in base_name.lower():
-                        new_product["category"] = "Áo"
-                    elif "quần" in base_name.lower():
-                        new_product["category"] = "Quần"
-                    elif "váy" in base_name.lower() or "đầm" in base_name.lower():
-                        new_product["category"] = "Váy"
-                    elif "short" in base_name.lower() or "jogger" in base_name.lower():
-                        new_product["category"] = "Đồ thể thao"
-                    
-                    api_products.append(new_product)
-                    products.append(new_product)
-                
-                if self.save_json_data(self.products_file, products):
-                    self.root.after(0, lambda: messagebox.showinfo("Thành công", 
-                                                                  f"Đã thêm {len(api_products)} sản phẩm từ API giả lập!\n"
-                                                                  f"Tổng cộng: {len(products)} sản phẩm"))
-                    self.root.after(0, self.load_products)
+                return sync.run(progress=lambda report: emit(dict(report)),
+                                cancelled=cancelled,
+                                defaults={"source": "API",
+                                          "created_by": self.current_user,
+                                          "created_at": created_at})
+            finally:
+                sync.close()
+        
+        def on_progress(report):
+            total = report['total_pages']
+            self.show_load_progress(f"Đã tải {report['pages']:,} trang, "
+                                    f"{report['records']:,} sản phẩm",
+                                    report['pages'] if total else None, total)
+        
+        def on_done(report, error, cancelled):
+            if not self.load_frame.winfo_exists():
+                return
+            self.hide_load_progress()
+            if error is not None:
+                messagebox.showerror("Lỗi", f"Lỗi đồng bộ dữ liệu: {str(error)}")
+            elif report is not None:
+                from catalog_sync import format_report as format_sync_report
+                summary = format_sync_report(report)
+                if report["failed"] and not report["pages"]:
+                    messagebox.showerror("Lỗi", summary)
                 else:
-                    self.root.after(0, lambda: messagebox.showerror("Lỗi", "Không thể lưu dữ liệu!"))
-            
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Lỗi", f"Lỗi xử lý dữ liệu: {str(e)}"))
-        messagebox.showinfo("Thông báo", "Đang kết nối và lấy dữ liệu từ API...")
-        thread = threading.Thread(target=fetch_data)
-        thread.daemon = True
-        thread.start()
+                    messagebox.showinfo("Đồng bộ API", summary)
+            elif cancelled:
+                messagebox.showinfo("Đồng bộ API", "Đã hủy (các trang đã tải vẫn được lưu)")
+            self.load_products()
+        
+        self.show_load_progress("Đang kết nối API...")
+        self.loader = BulkLoader(self.root, work, on_progress, on_done).start()
+    
+    def start_watching(self):
+        """Theo dõi thay đổi do máy khác ghi vào dữ liệu dùng chung"""
+        if self.watcher is not None:
+            return
+        
+        def on_change():
+            # Runs on the watcher thread; only the changed records are applied
+            changed = self.product_repo.refresh()
+            if changed is None:
+                return False
+            if changed:
+                self.external_changes.put(changed)
+            return True
+        
+        self.watcher = ChangeWatcher(self.storage.watch_paths(), on_change).start()
+        self.root.after(self.EXTERNAL_POLL_MS, self.poll_external_changes)
+    
+    def poll_external_changes(self):
+        """Cập nhật bảng khi máy khác vừa sửa sản phẩm"""
+        changed = set()
+        while True:
+            try:
+                changed |= self.external_changes.get_nowait()
+            except queue.Empty:
+                break
+        if changed and self.refresh_product_rows():
+            logger.info("Applied %d product changes from other stations", len(changed))
+        self.root.after(self.EXTERNAL_POLL_MS, self.poll_external_changes)
+    
+    def refresh_product_rows(self):
+        """Vẽ lại bảng từ catalog trong bộ nhớ, giữ vị trí cuộn; False nếu chưa vẽ được"""
+        if self.current_user is None or not self.tree.winfo_exists() \
+                or (self.loader is not None and self.loader.running()):
+            return False
+        query = self.search_entry.get().strip()
+        self.live_search.reset()
+        products = self.product_repo.filter(self.facet_selection, query)
+        # Only rows whose values changed are touched in the Treeview
+        self.product_view.set_rows(self.sort_products(products), keep_position=True)
+        return True
+    
+    @timed("search_products")
+    def search_catalog(self, query, within=None):
+        """Tìm kiếm cho LiveSearch; khi đang tải nền thì giữ nguyên bảng"""
+        if self.loader is not None and self.loader.running():
+            # Searching now would load the catalog a second time, on the UI
+            # thread; the load re-runs the search when it finishes
+            return self.product_view.rows
+        return self.product_repo.filter(self.facet_selection, query, within)
+    
     def search_products(self, event=None):
-        """Tìm kiếm sản phẩm"""
-        search_term = self.search_entry.get().lower().strip()
-        
-        # Clear current items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        products = self.load_json_data(self.products_file)
-        
-        filtered_products = []
-        if search_term:
-            for product in products:
-                if (search_term in product.get('name', '').lower() or
-                    search_term in product.get('category', '').lower() or
-                    search_term in product.get('description', '').lower()):
-                    filtered_products.append(product)
+        """Tìm kiếm sản phẩm ngay (không chờ debounce)"""
+        self.live_search.run_now()
+    
+    def render_search_results(self, products, cancelled, done):
+        """Hiển thị kết quả tìm kiếm"""
+        if cancelled():
+            return
+        # The virtual list only fills the visible window, so this is cheap
+        # however many products matched
+        self.product_view.set_rows(self.sort_products(products))
+        self.update_filter_label()
+        done()
+    
+    def fill_facet_menu(self, facet):
+        """Điền menu của một facet ngay trước khi mở, với số sản phẩm của từng giá trị"""
+        menu = self.facet_menus[facet]
+        menu.delete(0, 'end')
+        if self.loader is not None and self.loader.running():
+            menu.add_command(label="Đang tải dữ liệu...", state='disabled')
+            return
+        counts = self.product_repo.facet_counts(self.facet_selection,
+                                                self.search_entry.get().strip())[facet]
+        selected = self.facet_selection[facet]
+        values = set(counts) | selected
+        if facet in BANDS:
+            values = sorted(values, key=lambda value: (value is None, value or 0))
         else:
-            filtered_products = products
-        
-        for i, product in enumerate(filtered_products, 1):
-            self.tree.insert('', 'end', values=(
-                i,
-                product.get('name', ''),
-                product.get('category', ''),
-                f"{product.get('price', 0):,} VNĐ",
-                product.get('quantity', 0),
-                product.get('description', '')[:50] + '...' if len(product.get('description', '')) > 50 else product.get('description', '')
-            ))
+            values = sorted(values, key=lambda value: (-counts.get(value, 0),
+                                                       value_label(facet, value)))
+        self.facet_vars[facet] = []
+        for value in values:
+            var = tk.BooleanVar(value=value in selected)
+            self.facet_vars[facet].append(var)
+            menu.add_checkbutton(label=f"{value_label(facet, value)} ({counts.get(value, 0):,})",
+                                 variable=var,
+                                 command=lambda value=value: self.toggle_facet(facet, value))
+        if not values:
+            menu.add_command(label="Không có sản phẩm", state='disabled')
+    
+    def toggle_facet(self, facet, value):
+        """Chọn/bỏ chọn một giá trị của facet và lọc lại bảng"""
+        selected = self.facet_selection[facet]
+        if value in selected:
+            selected.discard(value)
+        else:
+            selected.add(value)
+        self.apply_facets()
+    
+    def clear_facets(self):
+        """Bỏ mọi bộ lọc facet"""
+        if not any(self.facet_selection.values()):
+            return
+        for selected in self.facet_selection.values():
+            selected.clear()
+        self.apply_facets()
+    
+    def apply_facets(self):
+        self.update_facet_buttons()
+        # Results of the last search no longer bound the new ones
+        self.live_search.reset()
+        self.live_search.run_now()
+    
+    def update_facet_buttons(self):
+        """Tên facet kèm số giá trị đang chọn"""
+        for facet, button in self.facet_buttons.items():
+            count = len(self.facet_selection[facet])
+            button.config(text=f"{FACET_LABELS[facet]} ({count})" if count
+                          else FACET_LABELS[facet])
+    
+    def update_filter_label(self):
+        """Số sản phẩm còn lại khi đang lọc"""
+        if any(self.facet_selection.values()):
+            self.filter_label.config(text=f"{len(self.product_view.rows):,} sản phẩm")
+        else:
+            self.filter_label.config(text="")
+    
+    def sort_products(self, products):
+        """Sắp xếp theo các cột đã chọn trên tiêu đề bảng (chưa chọn thì giữ nguyên)"""
+        if not self.sort_keys:
+            return products
+        return self.product_repo.sort(products, self.sort_keys)
+    
+    def on_heading_click(self, event):
+        """Bấm tiêu đề cột để sắp xếp theo cột đó, bấm lại để đổi chiều
+        
+        Shift+bấm thêm cột làm khóa phụ (hoặc đổi chiều nếu đã có); bấm cột
+        ID để trở về thứ tự catalog.
+        """
+        if self.tree.identify_region(event.x, event.y) != 'heading':
+            return
+        columns = self.tree['columns']
+        try:
+            heading = columns[int(self.tree.identify_column(event.x)[1:]) - 1]
+        except (ValueError, IndexError):
+            return
+        field = self.SORT_COLUMNS.get(heading)
+        if field is None and heading != 'ID':
+            return
+        keys = self.sort_keys
+        if field is None:
+            keys = []
+        elif event.state & 0x0001:
+            # Shift held
+            if field in dict(keys):
+                keys = [(f, not d if f == field else d) for f, d in keys]
+            else:
+                keys = keys + [(field, False)]
+        elif keys and keys[0][0] == field:
+            keys = [(field, not keys[0][1])] + keys[1:]
+        else:
+            keys = [(field, False)]
+        self.sort_keys = keys
+        self.update_sort_headings()
+        if self.loader is not None and self.loader.running():
+            # The load sorts its rows again when it finishes
+            return
+        self.product_view.set_rows(self.product_repo.sort(self.product_view.rows, keys))
+    
+    def update_sort_headings(self):
+        """Hiện chiều sắp xếp (▲/▼, và thứ tự khóa nếu nhiều cột) trên tiêu đề"""
+        positions = {field: (i, descending)
+                     for i, (field, descending) in enumerate(self.sort_keys, 1)}
+        for heading, field in self.SORT_COLUMNS.items():
+            text = heading
+            if field in positions:
+                i, descending = positions[field]
+                text += ' ▼' if descending else ' ▲'
+                if len(positions) > 1:
+                    text += str(i)
+            self.tree.heading(heading, text=text)
     
     def clear_form(self):
         """Xóa form nhập liệu"""
@@ -756,150 +1256,22 @@ class ClothingShopManager:
     def logout(self):
         """Đăng xuất"""
         if messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn đăng xuất?"):
+            self.cancel_loading()
             self.current_user = None
             self.is_admin = False
             self.create_login_window()
     
     def run(self):
         """Chạy ứng dụng"""
-        self.root.mainloop()
-
-# File setup.py để đóng gói ứng dụng
-def create_setup_file():
-    setup_content = '''
-from cx_Freeze import setup, Executable
-import sys
-
-# Thêm các file cần thiết
-build_exe_options = {
-    "packages": ["tkinter", "json", "os", "hashlib", "requests", "datetime", "threading"],
-    "excludes": ["unittest"],
-    "include_files": [],
-}
-
-# Thiết lập cho Windows
-base = None
-if sys.platform == "win32":
-    base = "Win32GUI"
-
-setup(
-    name="ClothingShopManager",
-    version="1.0",
-    description="Ứng dụng Quản lý Shop Quần Áo",
-    options={"build_exe": build_exe_options},
-    executables=[
-        Executable(
-            "main.py",
-            base=base,
-            target_name="QuanLyShopQuanAo.exe",
-            icon=None
-        )
-    ],
-)
-'''
-    
-    with open('setup.py', 'w', encoding='utf-8') as f:
-        f.write(setup_content.strip())
-
-# File requirements.txt
-def create_requirements_file():
-    requirements = '''
-requests>=2.25.1
-cx-Freeze>=6.8
-'''
-    
-    with open('requirements.txt', 'w', encoding='utf-8') as f:
-        f.write(requirements.strip())
-
-# File README.md
-def create_readme_file():
-    readme_content = '''
-# Ứng dụng Quản lý Shop Quần Áo
-
-## Mô tả
-Ứng dụng quản lý shop quần áo được phát triển bằng Python và Tkinter, hỗ trợ các chức năng CRUD hoàn chỉnh.
-
-## Tính năng
--  Đăng nhập/Đăng ký với phân quyền
--  Quản lý sản phẩm (CRUD)
--  Tìm kiếm sản phẩm
--  Lấy dữ liệu từ API
--  Lưu trữ dữ liệu bằng JSON
--  Giao diện thân thiện với người dùng
-
-## Cài đặt
-
-### Yêu cầu hệ thống
-- Python 3.7+
-- Kết nối internet (cho chức năng API)
-
-### Cài đặt dependencies
-```bash
-pip install -r requirements.txt
-```
-
-### Chạy ứng dụng
-```bash
-python main.py
-```
-
-## Tài khoản mặc định
-- **Admin**: username: `admin`, password: `admin123`
-- **User**: username: `user`, password: `user123`
-
-## Đóng gói ứng dụng
-
-### Tạo file thực thi
-```bash
-python setup.py build
-```
-
-Sau khi build thành công, file thực thi sẽ nằm trong thư mục `build/`
-
-## Cấu trúc dự án
-```
-├── main.py              # File chính
-├── setup.py            # Script đóng gói
-├── requirements.txt    # Dependencies
-├── products.json       # Dữ liệu sản phẩm
-├── users.json          # Dữ liệu người dùng
-└── README.md          # Hướng dẫn
-```
-
-## Chức năng chi tiết
-
-### Đăng nhập/Đăng ký
-- Hỗ trợ tạo tài khoản mới
-- Mã hóa mật khẩu SHA-256
-- Phân quyền Admin/User
-
-### Quản lý sản phẩm (Admin)
-- Thêm sản phẩm mới
-- Cập nhật thông tin sản phẩm
-- Xóa sản phẩm
-- Lấy dữ liệu từ API
-
-### Tìm kiếm
-- Tìm kiếm theo tên, loại, mô tả
-- Tìm kiếm real-time
-
-### API Integration
-- Lấy dữ liệu mẫu từ API
-- Xử lý bất đồng bộ với threading
-
-## Hỗ trợ
-Nếu gặp vấn đề, vui lòng tạo issue hoặc liên hệ developer.
-'''
-    
-    with open('README.md', 'w', encoding='utf-8') as f:
-        f.write(readme_content.strip())
+        try:
+            self.root.mainloop()
+        finally:
+            if self.watcher is not None:
+                self.watcher.stop()
+            # Pending catalog writes must reach disk before the process exits
+            self.product_repo.close()
 
 if __name__ == "__main__":
-    # Tạo các file hỗ trợ
-    create_setup_file()
-    create_requirements_file() 
-    create_readme_file()
-    
-    # Chạy ứng dụng
+    # Same as main.py
     app = ClothingShopManager()
-    app.run()
\ No newline at end of file
+    app.run()
@@ -0,0 +1,174 @@
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from inventory_reports import (InventoryReport, ReportError, LOW_STOCK, OVERSTOCK,
+                               format_money)
+
+
+class ReportsPanel:
+    """Cửa sổ báo cáo tồn kho cho quản trị viên
+
+    Tổng quan và tổng theo loại, theo thương hiệu, phân bố giá, danh sách
+    sắp hết hàng và tồn nhiều; tất cả tính lại từ catalog khi bấm "Làm mới".
+    """
+
+    GROUP_COLUMNS = ('Tên', 'Số sản phẩm', 'Số lượng', 'Giá trị tồn (VNĐ)', 'Tỉ lệ')
+    LIST_COLUMNS = ('ID', 'Tên sản phẩm', 'Loại', 'Giá', 'Số lượng', 'Giá trị tồn (VNĐ)')
+
+    def __init__(self, root, repository):
+        self.repository = repository
+        self.report = None
+        self.window = tk.Toplevel(root)
+        self.window.title("Báo cáo tồn kho")
+        self.window.geometry("900x560")
+
+        top = tk.Frame(self.window)
+        top.pack(fill='x', padx=10, pady=10)
+        tk.Button(top, text="Làm mới", command=self.refresh, width=10).pack(side='left')
+        self.status_label = tk.Label(top, text="")
+        self.status_label.pack(side='left', padx=10)
+
+        notebook = ttk.Notebook(self.window)
+        notebook.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+
+        overview = tk.Frame(notebook)
+        notebook.add(overview, text="Tổng quan")
+        self.totals_label = tk.Label(overview, text="", justify='left', anchor='w',
+                                     font=('Arial', 11))
+        self.totals_label.pack(fill='x', padx=10, pady=10)
+        self.category_tree = self._tree(overview, self.GROUP_COLUMNS)
+
+        brands = tk.Frame(notebook)
+        notebook.add(brands, text="Theo thương hiệu")
+        self.brand_tree = self._tree(brands, self.GROUP_COLUMNS)
+
+        prices = tk.Frame(notebook)
+        notebook.add(prices, text="Phân bố giá")
+        self.price_tree = self._tree(prices, ('Khoảng giá (VNĐ)', 'Số sản phẩm',
+                                              'Giá trị tồn (VNĐ)'))
+
+        low = tk.Frame(notebook)
+        notebook.add(low, text="Sắp hết hàng")
+        self.low_threshold = tk.IntVar(value=LOW_STOCK)
+        self.low_label = self._threshold_bar(low, "Còn không quá", self.low_threshold,
+                                             self.show_low_stock)
+        self.low_tree = self._tree(low, self.LIST_COLUMNS)
+
+        over = tk.Frame(notebook)
+        notebook.add(over, text="Tồn nhiều")
+        self.over_threshold = tk.IntVar(value=OVERSTOCK)
+        self.over_label = self._threshold_bar(over, "Tồn từ", self.over_threshold,
+                                              self.show_overstock)
+        self.over_tree = self._tree(over, self.LIST_COLUMNS)
+
+        self.refresh()
+
+    @staticmethod
+    def _tree(parent, columns):
+        frame = tk.Frame(parent)
+        frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=12)
+        for col in columns:
+            tree.heading(col, text=col)
+            text = col in ('Tên', 'Tên sản phẩm', 'Loại', 'Khoảng giá (VNĐ)')
+            tree.column(col, width=200 if text else 110, anchor='w' if text else 'e')
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        return tree
+
+    @staticmethod
+    def _threshold_bar(parent, text, variable, command):
+        bar = tk.Frame(parent)
+        bar.pack(fill='x', padx=10, pady=10)
+        tk.Label(bar, text=text).pack(side='left')
+        tk.Spinbox(bar, from_=0, to=1000000, textvariable=variable, width=8,
+                   command=command).pack(side='left', padx=5)
+        tk.Label(bar, text="cái").pack(side='left')
+        tk.Button(bar, text="Xem", command=command, width=8).pack(side='left', padx=10)
+        label = tk.Label(bar, text="")
+        label.pack(side='left')
+        return label
+
+    def refresh(self):
+        started = time.perf_counter()
+        try:
+            self.report = InventoryReport.of(self.repository)
+        except ReportError as e:
+            messagebox.showerror("Lỗi", str(e), parent=self.window)
+            self.window.destroy()
+            return
+        totals = self.report.totals()
+        self.totals_label.config(text=(
+            f"Số sản phẩm: {totals['products']:,}    Tổng số lượng: {totals['units']:,}\n"
+            f"Giá trị tồn kho: {format_money(totals['value'])} VNĐ\n"
+            f"Hết hàng: {totals['out_of_stock']:,}    "
+            f"Còn không quá {LOW_STOCK} cái: {totals['low_stock']:,}    "
+            f"Chưa có giá: {totals['without_price']:,}"))
+        self._fill_groups(self.category_tree, self.report.by_group('category'))
+        self._fill_groups(self.brand_tree, self.report.by_group('brand'))
+        self._fill(self.price_tree, [(self._price_range(bucket), f"{bucket['products']:,}",
+                                      format_money(bucket['value']))
+                                     for bucket in self.report.price_buckets()])
+        self.show_low_stock()
+        self.show_overstock()
+        self.status_label.config(
+            text=f"Tính trong {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def show_low_stock(self):
+        threshold = self._threshold(self.low_threshold, LOW_STOCK)
+        ids, total = self.report.low_stock(threshold)
+        self._fill_products(self.low_tree, ids)
+        self.low_label.config(text=f"{total:,} sản phẩm" + (
+            f" (hiện {len(ids):,} sản phẩm ít nhất)" if total > len(ids) else ""))
+
+    def show_overstock(self):
+        threshold = self._threshold(self.over_threshold, OVERSTOCK)
+        ids, total = self.report.overstock(threshold)
+        self._fill_products(self.over_tree, ids)
+        self.over_label.config(text=f"{total:,} sản phẩm" + (
+            f" (hiện {len(ids):,} sản phẩm tồn giá trị lớn nhất)" if total > len(ids) else ""))
+
+    @staticmethod
+    def _threshold(variable, default):
+        try:
+            return max(0, int(variable.get()))
+        except (tk.TclError, ValueError):
+            variable.set(default)
+            return default
+
+    @staticmethod
+    def _price_range(bucket):
+        if bucket['low'] is None:
+            return f"Dưới {format_money(bucket['high'])}"
+        if bucket['high'] is None:
+            return f"Từ {format_money(bucket['low'])}"
+        return f"{format_money(bucket['low'])} - {format_money(bucket['high'])}"
+
+    @staticmethod
+    def _fill(tree, rows):
+        tree.delete(*tree.get_children())
+        for values in rows:
+            tree.insert('', 'end', values=values)
+
+    def _fill_groups(self, tree, groups):
+        self._fill(tree, [(group['name'], f"{group['products']:,}", f"{group['units']:,}",
+                           format_money(group['value']), f"{group['share']:.1%}")
+                          for group in groups])
+
+    def _fill_products(self, tree, ids):
+        rows = []
+        for product_id in ids:
+            product = self.repository.get(product_id)
+            if product is None:
+                continue
+            price = product.get('price', 0)
+            quantity = product.get('quantity', 0)
+            stock_value = price * quantity if isinstance(price, (int, float)) \
+                and isinstance(quantity, (int, float)) else 0
+            rows.append((product_id, product.get('name', ''), product.get('category', ''),
+                         f"{price:,}" if isinstance(price, (int, float)) else price,
+                         quantity, format_money(stock_value)))
+        self._fill(tree, rows)
@@ -0,0 +1,107 @@
+"""Dữ liệu mẫu (dùng cho máy chủ giả lập và benchmark)
+
+Tạo file dữ liệu: python sample_data.py products <số lượng> <file> [seed]
+                  python sample_data.py users <số lượng> <file> [seed]
+"""
+import hashlib
+import random
+from datetime import datetime
+
+PRODUCT_NAMES = [
+    "Áo thun nam basic", "Áo sơ mi nữ công sở", "Quần jean nam slim fit",
+    "Váy midi hoa nhí", "Áo khoác bomber", "Quần short thể thao",
+    "Đầm maxi bohemian", "Áo polo nam", "Chân váy chữ A",
+    "Áo hoodie unisex", "Quần tây nữ", "Áo croptop nữ",
+    "Quần jogger nam", "Váy suông tay dài", "Áo blazer nữ"
+]
+
+CATEGORIES = ['Áo', 'Quần', 'Váy', 'Phụ kiện', 'Đồ thể thao']
+
+COLORS = ['Đen', 'Trắng', 'Xanh', 'Đỏ', 'Vàng', 'Hồng', 'Xám', 'Nâu']
+
+BRANDS = ['Nike', 'Adidas', 'Zara', 'H&M', 'Uniqlo', 'Local Brand', 'Fashion House']
+
+DESCRIPTIONS = [
+    "Chất liệu cotton cao cấp, thoáng mát",
+    "Thiết kế hiện đại, phù hợp nhiều dáng người",
+    "Form dáng chuẩn, dễ phối đồ",
+    "Màu sắc trẻ trung, năng động",
+    "Chất lượng tốt, giá cả hợp lý",
+    "Xu hướng thời trang mới nhất",
+    "Phong cách Hàn Quốc",
+    "Thiết kế tối giản, thanh lịch"
+]
+
+
+def category_for(name):
+    """Loại sản phẩm suy ra từ tên"""
+    name = name.lower()
+    if "áo" in name:
+        return "Áo"
+    if "quần" in name:
+        return "Quần"
+    if "váy" in name or "đầm" in name:
+        return "Váy"
+    if "short" in name or "jogger" in name:
+        return "Đồ thể thao"
+    return None
+
+
+def make_product(sku, rng=random, created_by="admin"):
+    """Một sản phẩm ngẫu nhiên với mã SKU cho trước"""
+    base_name = rng.choice(PRODUCT_NAMES)
+    color = rng.choice(COLORS)
+    brand = rng.choice(BRANDS)
+    return {
+        "sku": sku,
+        "name": f"{base_name} {color} - {brand}",
+        "category": category_for(base_name) or rng.choice(CATEGORIES),
+        "price": rng.randint(89000, 899000),
+        "quantity": rng.randint(5, 50),
+        "description": f"{rng.choice(DESCRIPTIONS)}. Size: S, M, L, XL",
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "created_by": created_by,
+        "brand": brand,
+        "color": color,
+    }
+
+
+def make_products(count, seed=None, prefix="SUP"):
+    """count sản phẩm có SKU prefix-0000001, prefix-0000002, ..."""
+    rng = random.Random(seed)
+    return [make_product(f"{prefix}-{i:07d}", rng) for i in range(1, count + 1)]
+
+
+def make_users(count, seed=None, password="user123", prefix="member"):
+    """count tài khoản thường prefix0000001, ... cùng một mật khẩu"""
+    rng = random.Random(seed)
+    password_hash = hashlib.sha256(password.encode()).hexdigest()
+    users = []
+    for i in range(1, count + 1):
+        users.append({
+            "username": f"{prefix}{i:07d}",
+            "password": password_hash,
+            "role": "user",
+            "created_at": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 09:00:00",
+        })
+    return users
+
+
+if __name__ == "__main__":
+    import sys
+
+    from product_journal import write_json_atomic
+
+    if len(sys.argv) < 4 or sys.argv[1] not in ("products", "users"):
+        print("Usage: python sample_data.py products|users <count> <file> [seed]")
+        sys.exit(1)
+    count = int(sys.argv[2])
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    if sys.argv[1] == "products":
+        data = make_products(count, seed)
+        for product_id, product in enumerate(data, 1):
+            product['id'] = product_id
+    else:
+        data = make_users(count, seed)
+    write_json_atomic(sys.argv[3], data, fsync=False)
+    print(f"Wrote {count} {sys.argv[1]} to {sys.argv[3]}")
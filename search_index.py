@@ -0,0 +1,203 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+_TOKEN_RE = re.compile(r'\w+')
+# Combining diacritical mark blocks; after NFD these carry every Vietnamese
+# tone and vowel mark
+_COMBINING_RE = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+
+
+def fold_text(text):
+    """Chuẩn hóa chuỗi để tìm kiếm: NFC, bỏ dấu tiếng Việt, chữ thường
+
+    "Áo sơ mi Đỏ" -> "ao so mi do"
+    """
+    if not text:
+        return ''
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    # đ/Đ are base letters, not letters with a combining mark
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    # NFD alone also decomposes precomposed input, so no NFC pass is needed
+    return _COMBINING_RE.sub('', unicodedata.normalize('NFD', text)).lower()
+
+
+def tokenize(text):
+    """Tách chuỗi đã chuẩn hóa thành các từ"""
+    return _TOKEN_RE.findall(fold_text(text))
+
+
+@lru_cache(maxsize=65536)
+def _field_tokens(value):
+    # Categories, brands, colours and descriptions repeat across thousands
+    # of products; fold each distinct value once
+    return frozenset(tokenize(value))
+
+
+class SearchIndex:
+    """Chỉ mục ngược cho tìm kiếm sản phẩm
+
+    - từ -> tập id sản phẩm chứa từ đó
+    - n-gram (1 đến 3 ký tự) -> tập từ chứa n-gram đó, dùng cho tìm chuỗi con
+
+    Mỗi từ khóa trong câu tìm kiếm phải là chuỗi con của một từ trong
+    tên/loại/mô tả/thương hiệu/màu của sản phẩm.
+    """
+
+    FIELDS = ('name', 'category', 'description', 'brand', 'color')
+    GRAM = 3
+    # Number of query terms whose matching id sets are kept up to date
+    TERM_CACHE_SIZE = 256
+
+    def __init__(self):
+        self._postings = {}
+        self._grams = {}
+        self._doc_tokens = {}
+        self._term_cache = {}
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def _grams_of(self, token):
+        grams = set()
+        for n in range(1, self.GRAM + 1):
+            for i in range(len(token) - n + 1):
+                grams.add(token[i:i + n])
+        return grams
+
+    def _product_tokens(self, product):
+        tokens = set()
+        for field in self.FIELDS:
+            value = product.get(field)
+            if value:
+                tokens.update(_field_tokens(value if isinstance(value, str) else str(value)))
+        return tokens
+
+    def rebuild(self, products):
+        """Xây lại toàn bộ chỉ mục"""
+        # Same result as add() per product, but n-grams are generated once
+        # per distinct token at the end instead of being checked per product
+        postings = {}
+        doc_tokens = {}
+        for product in products:
+            product_id = product['id']
+            tokens = self._product_tokens(product)
+            doc_tokens[product_id] = tokens
+            for token in tokens:
+                ids = postings.get(token)
+                if ids is None:
+                    postings[token] = {product_id}
+                else:
+                    ids.add(product_id)
+        grams = {}
+        for token in postings:
+            for gram in self._grams_of(token):
+                words = grams.get(gram)
+                if words is None:
+                    grams[gram] = {token}
+                else:
+                    words.add(token)
+        self._postings = postings
+        self._grams = grams
+        self._doc_tokens = doc_tokens
+        self._term_cache = {}
+
+    def add(self, product):
+        """Thêm một sản phẩm vào chỉ mục"""
+        product_id = product['id']
+        if product_id in self._doc_tokens:
+            self.remove(product)
+        tokens = self._product_tokens(product)
+        self._doc_tokens[product_id] = tokens
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                for gram in self._grams_of(token):
+                    self._grams.setdefault(gram, set()).add(token)
+            ids.add(product_id)
+        for term, ids in self._term_cache.items():
+            if any(term in token for token in tokens):
+                ids.add(product_id)
+
+    def remove(self, product):
+        """Xóa một sản phẩm khỏi chỉ mục"""
+        tokens = self._doc_tokens.pop(product['id'], None)
+        if tokens is None:
+            return
+        for ids in self._term_cache.values():
+            ids.discard(product['id'])
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(product['id'])
+            if not ids:
+                del self._postings[token]
+                for gram in self._grams_of(token):
+                    words = self._grams.get(gram)
+                    if words is not None:
+                        words.discard(token)
+                        if not words:
+                            del self._grams[gram]
+
+    def _matching_tokens(self, term):
+        """Các từ trong chỉ mục có chứa term"""
+        if len(term) <= self.GRAM:
+            tokens = self._grams.get(term, set())
+        else:
+            grams = [term[i:i + self.GRAM] for i in range(len(term) - self.GRAM + 1)]
+            candidates = sorted((self._grams.get(g, set()) for g in grams), key=len)
+            tokens = set(candidates[0])
+            for words in candidates[1:]:
+                tokens &= words
+                if not tokens:
+                    break
+            tokens = {t for t in tokens if term in t}
+        return tokens
+
+    def _term_ids(self, term):
+        """Tập id sản phẩm có một từ chứa term (được cache và cập nhật dần)"""
+        ids = self._term_cache.get(term)
+        if ids is not None:
+            return ids
+
+        ids = set()
+        for token in self._matching_tokens(term):
+            ids |= self._postings[token]
+        if len(self._term_cache) >= self.TERM_CACHE_SIZE:
+            self._term_cache.clear()
+        self._term_cache[term] = ids
+        return ids
+
+    def search(self, query, within=None):
+        """Trả về tập id khớp với query, hoặc None nếu query rỗng
+
+        within: giới hạn kết quả trong một tập id có sẵn (ví dụ kết quả
+        của lần tìm trước khi người dùng gõ thêm ký tự).
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return None
+
+        # Intersect smallest first; set & iterates over the smaller operand
+        id_sets = sorted((self._term_ids(term) for term in terms), key=len)
+        if within is not None:
+            id_sets.insert(0, within)
+        result = set(id_sets[0])
+        for ids in id_sets[1:]:
+            if not result:
+                break
+            result &= ids
+        return result
+
+    def stats(self):
+        """Thống kê chỉ mục"""
+        return {
+            "documents": len(self._doc_tokens),
+            "tokens": len(self._postings),
+            "grams": len(self._grams),
+            "cached_terms": len(self._term_cache),
+        }
@@ -4,6 +4,8 @@ import sys
 # Thêm các file cần thiết
 build_exe_options = {
     "packages": ["tkinter", "json", "os", "hashlib", "requests", "datetime", "threading"],
+    # Imported on first use only, so name it explicitly
+    "includes": ["catalog_sync"],
     "excludes": ["unittest"],
     "include_files": [],
 }
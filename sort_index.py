@@ -0,0 +1,144 @@
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+from catalog_index import as_number
+from search_index import fold_text
+
+
+def _number_key(value):
+    if as_number(value) is not None:
+        return (0, value)
+    if value is None:
+        return (2, '')
+    return (1, str(value))
+
+
+@lru_cache(maxsize=65536)
+def _folded_key(value):
+    # Categories and many names repeat across thousands of products
+    return (0, fold_text(value), value)
+
+
+def _text_key(value):
+    if value is None:
+        return (1, '', '')
+    return _folded_key(value if isinstance(value, str) else str(value))
+
+
+def _plain_key(value):
+    # "YYYY-mm-dd HH:MM:SS" strings sort chronologically as they are
+    if value is None:
+        return (1, '')
+    return (0, value if isinstance(value, str) else str(value))
+
+
+class _Order:
+    __slots__ = ('entries', 'ids', 'ranks')
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.ids = [entry[-1] for entry in entries]
+        self.ranks = None
+
+
+class SortIndex:
+    """Thứ tự sắp xếp của catalog theo từng cột, dùng để sắp xếp bảng sản phẩm
+
+    Mỗi cột có một mảng (khóa..., id) đã sắp xếp, dựng lần đầu cột đó được
+    dùng rồi giữ cập nhật qua add/remove như các chỉ mục khác (một lần
+    bisect cộng một lần dịch mảng), nên sắp xếp lại sau khi sửa không phải
+    sắp xếp lại từ đầu. Khóa tính từ giá trị gốc: giá, số lượng so sánh như
+    số, tên và loại không phân biệt dấu/hoa thường; thiếu giá trị xếp cuối.
+    """
+
+    KEYS = {
+        'name': _text_key,
+        'category': _text_key,
+        'price': _number_key,
+        'quantity': _number_key,
+        'created_at': _plain_key,
+    }
+
+    def __init__(self):
+        self._orders = {}
+
+    def rebuild(self, products):
+        # Orders are built from the repository's rows on first use, not at load
+        self._orders = {}
+
+    def add(self, product):
+        for field, order in self._orders.items():
+            entry = self.KEYS[field](product.get(field)) + (product['id'],)
+            i = bisect_right(order.entries, entry)
+            order.entries.insert(i, entry)
+            order.ids.insert(i, product['id'])
+            order.ranks = None
+
+    def remove(self, product):
+        for field, order in self._orders.items():
+            entry = self.KEYS[field](product.get(field)) + (product['id'],)
+            i = bisect_left(order.entries, entry)
+            if i < len(order.entries) and order.entries[i] == entry:
+                del order.entries[i]
+                del order.ids[i]
+                order.ranks = None
+
+    def key(self, field, product):
+        """Khóa sắp xếp của một sản phẩm theo một cột"""
+        return self.KEYS[field](product.get(field))
+
+    def _order(self, field, products):
+        order = self._orders.get(field)
+        if order is None:
+            key = self.KEYS[field]
+            # Flat (key..., id) tuples: the sort compares them noticeably faster
+            # than nested (key, id) pairs
+            entries = [key(product.get(field)) + (product['id'],) for product in products]
+            entries.sort()
+            order = self._orders[field] = _Order(entries)
+        return order
+
+    def order(self, field, products):
+        """Id của cả catalog theo cột field tăng dần (bằng nhau thì theo id)
+
+        products là toàn bộ catalog, chỉ dùng khi cột chưa được dựng.
+        Danh sách trả về thuộc chỉ mục, không được sửa.
+        """
+        return self._order(field, products).ids
+
+    def seek(self, field, products, after, limit, descending=False):
+        """Tối đa limit id tiếp theo sau con trỏ after = (giá trị, id) theo cột field
+
+        Hai lần bisect trên mảng đã sắp xếp; after None là từ đầu.
+        Giảm dần là thứ tự tăng dần đảo ngược (như khi sắp xếp bảng).
+        """
+        order = self._order(field, products)
+        entry = None if after is None else self.KEYS[field](after[0]) + (after[1],)
+        if descending:
+            end = len(order.entries) if entry is None else bisect_left(order.entries, entry)
+            return order.ids[max(0, end - limit):end][::-1]
+        start = 0 if entry is None else bisect_right(order.entries, entry)
+        return order.ids[start:start + limit]
+
+    def ranks(self, field, products):
+        """id -> hạng theo cột field; sản phẩm bằng nhau cùng hạng
+
+        Tính lại từ mảng đã sắp xếp sau mỗi lần catalog đổi (O(n), không sắp xếp).
+        """
+        order = self._order(field, products)
+        if order.ranks is None:
+            ranks = {}
+            rank = -1
+            previous = None
+            for entry in order.entries:
+                key = entry[:-1]
+                if key != previous:
+                    rank += 1
+                    previous = key
+                ranks[entry[-1]] = rank
+            order.ranks = ranks
+        return order.ranks
+
+    def stats(self):
+        """Thống kê chỉ mục"""
+        return {"sorted_columns": len(self._orders)}
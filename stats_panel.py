@@ -0,0 +1,97 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from instrumentation import metrics
+
+
+class StatsPanel:
+    """Cửa sổ thống kê ẩn cho quản trị viên (mở bằng Ctrl+Shift+S)
+
+    Hiện độ trễ từng loại thao tác (số lần, trung bình, p50/p95/p99, max),
+    các bộ đếm và thống kê cache/tầng lưu trữ; cho phép bật/tắt đo, đặt lại
+    và lưu toàn bộ số đo ra file JSON.
+    """
+
+    REFRESH_MS = 1000
+    COLUMNS = ('Thao tác', 'Số lần', 'TB (ms)', 'p50', 'p95', 'p99', 'Max (ms)')
+
+    def __init__(self, root, extra_stats=None):
+        """extra_stats() -> dict thống kê thêm (cache, tầng lưu trữ) để hiện và lưu"""
+        self.extra_stats = extra_stats or dict
+        self.window = tk.Toplevel(root)
+        self.window.title("Thống kê hiệu năng")
+        self.window.geometry("760x480")
+
+        top = tk.Frame(self.window)
+        top.pack(fill='x', padx=10, pady=10)
+        self.toggle_btn = tk.Button(top, command=self.toggle, width=10)
+        self.toggle_btn.pack(side='left')
+        tk.Button(top, text="Làm mới", command=self.refresh, width=10).pack(side='left', padx=5)
+        tk.Button(top, text="Đặt lại", command=self.reset, width=10).pack(side='left')
+        tk.Button(top, text="Lưu ra file...", command=self.dump, width=12).pack(side='right')
+        self.since_label = tk.Label(top, text="")
+        self.since_label.pack(side='left', padx=10)
+
+        self.tree = ttk.Treeview(self.window, columns=self.COLUMNS, show='headings', height=12)
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=220 if col == 'Thao tác' else 80,
+                             anchor='w' if col == 'Thao tác' else 'e')
+        self.tree.pack(fill='both', expand=True, padx=10)
+
+        self.details = tk.Text(self.window, height=8, font=('Courier', 9))
+        self.details.pack(fill='x', padx=10, pady=10)
+
+        self.refresh()
+        self._schedule()
+
+    def _schedule(self):
+        if self.window.winfo_exists():
+            self.window.after(self.REFRESH_MS, self._tick)
+
+    def _tick(self):
+        if self.window.winfo_exists():
+            self.refresh()
+            self._schedule()
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        self.toggle_btn.config(text="Tắt đo" if metrics.enabled else "Bật đo")
+        self.since_label.config(text=f"Từ {snapshot['since']}"
+                                + ("" if metrics.enabled else " (đang tắt)"))
+        self.tree.delete(*self.tree.get_children())
+        for name, s in snapshot['spans'].items():
+            self.tree.insert('', 'end', values=(
+                name, s['count'], f"{s['mean_ms']:.2f}", s['p50_ms'], s['p95_ms'],
+                s['p99_ms'], f"{s['max_ms']:.1f}"))
+        lines = [f"{name}: {value:,}" for name, value in snapshot['counters'].items()]
+        for section, values in self.extra_stats().items():
+            if isinstance(values, dict):
+                lines.append(f"{section}: " + ", ".join(
+                    f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                    for k, v in values.items()))
+            else:
+                lines.append(f"{section}: {values}")
+        self.details.delete(1.0, tk.END)
+        self.details.insert(1.0, "\n".join(lines))
+
+    def toggle(self):
+        metrics.enable(not metrics.enabled)
+        self.refresh()
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def dump(self):
+        filename = filedialog.asksaveasfilename(
+            parent=self.window, title="Lưu số đo", defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if not filename:
+            return
+        try:
+            metrics.dump(filename, extra=self.extra_stats())
+        except OSError as e:
+            messagebox.showerror("Lỗi", f"Không thể lưu file: {str(e)}", parent=self.window)
+            return
+        messagebox.showinfo("Thành công", f"Đã lưu số đo vào {filename}", parent=self.window)
@@ -0,0 +1,1095 @@
+import contextlib
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from binary_snapshot import BinarySnapshot, SnapshotError, write_snapshot
+from file_lock import FileLock
+from instrumentation import timed
+from product_import import iter_records
+from product_journal import ProductJournal, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# Fields with a keyset cursor (seek_products); SQLite has an index on each
+SEEK_FIELDS = ('name', 'price', 'created_at')
+
+
+class StorageError(Exception):
+    """Lỗi đọc/ghi của tầng lưu trữ"""
+
+
+class StorageBackend:
+    """Giao diện lưu trữ sản phẩm và người dùng
+
+    Sản phẩm được ghi theo từng thao tác dạng nhật ký:
+    {"op": "insert", "product": {...}}, {"op": "update", "id": .., "fields": {...}},
+    {"op": "delete", "id": ..} hoặc một lần bán hàng
+    {"op": "checkout", "order": {...}, "stock": [[id, số lượng còn lại], ...]},
+    ghi đơn hàng cùng với số lượng mới trong một thao tác.
+    """
+
+    name = "base"
+    # True if find_user is an indexed lookup, so callers need not cache users
+    indexed_users = False
+
+    def init_users(self, default_users):
+        """Tạo tài khoản mặc định nếu chưa có người dùng nào"""
+        raise NotImplementedError
+
+    def signature(self):
+        """Giá trị thay đổi mỗi khi dữ liệu sản phẩm bị sửa từ bên ngoài"""
+        raise NotImplementedError
+
+    def load_products(self):
+        """Đọc toàn bộ sản phẩm (mỗi sản phẩm có id)"""
+        raise NotImplementedError
+
+    def load_table(self):
+        """Toàn bộ sản phẩm đã nạp sẵn vào ProductTable: (bảng, danh sách ProductRow)
+
+        None nếu tầng lưu trữ không có cách nào nhanh hơn load_products.
+        """
+        return None
+
+    def write_products(self, entries):
+        """Ghi một lô thao tác thêm/sửa/xóa sản phẩm"""
+        raise NotImplementedError
+
+    def load_orders(self):
+        """Các đơn hàng đã bán, cũ trước"""
+        raise NotImplementedError
+
+    def write_lock(self):
+        """Khóa giữa các tiến trình (máy bán hàng) dùng chung dữ liệu
+
+        Giữ khóa từ lúc đọc thay đổi của máy khác tới khi ghi xong thì id
+        mới cấp không trùng với id máy khác vừa ghi. Mặc định không khóa.
+        """
+        return contextlib.nullcontext()
+
+    def read_changes(self, signature):
+        """Các thao tác được ghi kể từ lúc dữ liệu có chữ ký signature
+
+        Trả về (entries, chữ ký mới), hoặc None nếu không đọc riêng được
+        phần thay đổi - khi đó phải đọc lại toàn bộ để so sánh.
+        """
+        return None
+
+    def watch_paths(self):
+        """Các file cần theo dõi để biết dữ liệu sản phẩm bị sửa từ bên ngoài"""
+        return []
+
+    def maybe_compact(self, products):
+        """Gộp dữ liệu đã ghi nếu cần; products là danh sách hiện tại trong bộ nhớ"""
+
+    def compact(self, products=None):
+        """Gộp ngay dữ liệu đã ghi (mặc định không cần làm gì)"""
+
+    def page_products(self, offset, limit):
+        """Các sản phẩm thứ offset tới offset + limit - 1 theo thứ tự catalog
+
+        Mặc định đọc toàn bộ rồi cắt; các tầng lưu trữ cụ thể chỉ đọc phần cần.
+        """
+        return self.load_products()[offset:offset + limit]
+
+    def seek_products(self, field, after=None, limit=50, descending=False):
+        """Tối đa limit sản phẩm tiếp theo khi sắp theo field (một trong SEEK_FIELDS), rồi theo id
+
+        after: con trỏ (giá trị field, id) của sản phẩm cuối trang trước,
+        None là từ đầu. Mặc định đọc toàn bộ và chỉ giữ limit dòng cần.
+        """
+        key = _seek_key(field)
+        products = self.load_products()
+        if after is not None:
+            cursor = (key(after[0]), after[1])
+            if descending:
+                products = (p for p in products if (key(p.get(field)), p['id']) < cursor)
+            else:
+                products = (p for p in products if (key(p.get(field)), p['id']) > cursor)
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return pick(limit, products, key=lambda p: (key(p.get(field)), p['id']))
+
+    def get_product(self, product_id):
+        """Lấy một sản phẩm theo id"""
+        raise NotImplementedError
+
+    def find_products(self, name=None, category=None, min_price=None, max_price=None, limit=None):
+        """Tìm sản phẩm theo tên (tiền tố), loại và khoảng giá"""
+        raise NotImplementedError
+
+    def load_users(self):
+        """Đọc toàn bộ người dùng"""
+        raise NotImplementedError
+
+    def find_user(self, username):
+        """Tìm người dùng theo tên đăng nhập"""
+        raise NotImplementedError
+
+    def add_user(self, user):
+        """Thêm người dùng, trả về False nếu tên đăng nhập đã tồn tại"""
+        raise NotImplementedError
+
+    def append_user(self, user):
+        """Thêm người dùng mà người gọi đã kiểm tra trùng tên đăng nhập"""
+        return self.add_user(user)
+
+    def users_signature(self):
+        """Giá trị thay đổi mỗi khi dữ liệu người dùng bị sửa"""
+        raise NotImplementedError
+
+    def users_write_lock(self):
+        """Khóa giữa các tiến trình quanh việc kiểm tra trùng tên rồi ghi tài khoản
+
+        Mặc định không khóa (tầng lưu trữ tự kiểm tra trong add_user).
+        """
+        return contextlib.nullcontext()
+
+    def maybe_compact_users(self, users):
+        """Gộp dữ liệu người dùng đã ghi nếu cần; users là danh sách hiện tại"""
+
+    def stats(self):
+        """Thống kê của tầng lưu trữ"""
+        return {"backend": self.name}
+
+    def close(self):
+        """Đóng tài nguyên"""
+
+
+def _seek_key(field):
+    """Khóa so sánh của seek_products, giống thứ tự của cột SQLite tương ứng"""
+    if field not in SEEK_FIELDS:
+        raise StorageError(f"Không sắp xếp theo trường: {field}")
+    if field == 'price':
+        # REAL NOT NULL DEFAULT 0
+        return lambda value: value if isinstance(value, (int, float)) else 0
+    # TEXT: NULL before every string
+    return lambda value: (value is not None, '' if value is None else str(value))
+
+
+def _match_product(product, name, category, min_price, max_price):
+    if name is not None and not product.get('name', '').startswith(name):
+        return False
+    if category is not None and product.get('category') != category:
+        return False
+    price = product.get('price', 0)
+    if min_price is not None and price < min_price:
+        return False
+    if max_price is not None and price > max_price:
+        return False
+    return True
+
+
+class JsonStorage(StorageBackend):
+    """Lưu trữ bằng file JSON: snapshot + nhật ký chỉ ghi nối cho sản phẩm"""
+
+    name = "json"
+
+    # Fold the journal back into the snapshot once it grows past this size
+    DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+    # Reads are lock-free and retried while another station rewrites the files
+    LOAD_RETRIES = 5
+
+    def __init__(self, products_file, users_file, journal_file=None,
+                 compact_threshold=None, fsync=True, orders_file=None):
+        self.products_file = products_file
+        self.users_file = users_file
+        self.journal = ProductJournal(journal_file or f"{products_file}.journal", fsync=fsync)
+        # Orders stay in the journal with their stock changes until
+        # compaction moves them here; one order per line
+        self.orders_log = ProductJournal(
+            orders_file or os.path.join(os.path.dirname(products_file), "orders.jsonl"),
+            fsync=fsync)
+        # Registrations are appended here instead of rewriting users.json
+        self.users_journal = ProductJournal(f"{users_file}.journal", fsync=fsync)
+        self.compact_threshold = (compact_threshold if compact_threshold is not None
+                                  else self.DEFAULT_COMPACT_THRESHOLD)
+        self.fsync = fsync
+        self.compactions = 0
+        self._lock = threading.RLock()
+        # Shared with other processes using the same files (several stations
+        # on one network folder); always taken before self._lock
+        self.lock = FileLock(f"{products_file}.lock")
+        self.users_lock = FileLock(f"{users_file}.lock")
+
+    @timed("load_json_data")
+    def load_json_data(self, filename):
+        """Đọc dữ liệu từ file JSON"""
+        try:
+            if not os.path.exists(filename):
+                logger.info("%s does not exist yet", filename)
+                return []
+
+            with open(filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                logger.debug("Loaded %d items from %s", len(data), filename)
+                return data
+        except json.JSONDecodeError as e:
+            logger.error("JSON decode error in %s: %s", filename, e)
+            return []
+        except Exception as e:
+            logger.error("Error loading %s: %s", filename, e)
+            return []
+
+    @timed("save_json_data")
+    def save_json_data(self, filename, data):
+        """Lưu dữ liệu vào file JSON"""
+        try:
+            write_json_atomic(filename, data, fsync=self.fsync)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("Error saving %s: %s", filename, e)
+            return False
+
+    def init_users(self, default_users):
+        if not os.path.exists(self.products_file):
+            logger.info("Creating %s", self.products_file)
+            if not self.save_json_data(self.products_file, []):
+                raise StorageError(f"Không thể tạo {self.products_file}")
+
+        if not os.path.exists(self.users_file):
+            logger.info("Creating %s", self.users_file)
+            if not self.save_json_data(self.users_file, default_users):
+                raise StorageError(f"Không thể tạo {self.users_file}")
+            logger.info("Created default users: admin, user")
+
+    @staticmethod
+    def _stat(filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def signature(self):
+        """(mtime, kích thước) của snapshot và nhật ký"""
+        return (self._stat(self.products_file), self._stat(self.journal.filename))
+
+    def load_products(self):
+        """Đọc snapshot rồi phát lại nhật ký lên trên
+
+        Không khóa: nếu máy khác nén dữ liệu giữa lúc đọc snapshot và nhật
+        ký (chữ ký đổi) thì đọc lại, tối đa LOAD_RETRIES lần.
+        """
+        # Taking self.lock here could deadlock: callers may hold their own
+        # locks, which the writer takes while holding this one
+        for _ in range(self.LOAD_RETRIES):
+            signature = self.signature()
+            products = self._read_products()
+            if self.signature() == signature:
+                break
+        return products
+
+    def _read_products(self):
+        with self._lock:
+            return ProductJournal.replay(self._read_snapshot(), self.journal.read())
+
+    def _read_snapshot(self):
+        """Các sản phẩm trong snapshot (chưa có nhật ký)"""
+        products = []
+        if os.path.exists(self.products_file):
+            try:
+                # Parsed record by record rather than with one json.load
+                # call, which would hold the GIL for the whole file and
+                # freeze the UI while a worker thread loads the catalog
+                with open(self.products_file, 'rb') as f:
+                    products = [record for _, record, error, _ in iter_records(f)
+                                if error is None and isinstance(record, dict)]
+            except (OSError, ValueError) as e:
+                logger.error("Error loading %s: %s", self.products_file, e)
+                products = []
+
+        # Older snapshots have no ids; number them in file order so the
+        # journal can address them
+        next_id = max((p['id'] for p in products if 'id' in p), default=0) + 1
+        for product in products:
+            if 'id' not in product:
+                product['id'] = next_id
+                next_id += 1
+
+        return products
+
+    def write_products(self, entries):
+        """Ghi nối các thao tác vào nhật ký"""
+        try:
+            with self.lock, self._lock:
+                self.journal.append(entries)
+        except (OSError, TypeError, ValueError) as e:
+            raise StorageError(f"Error writing journal {self.journal.filename}: {str(e)}")
+
+    def write_lock(self):
+        return self.lock
+
+    def read_changes(self, signature):
+        """Đọc phần nhật ký ghi thêm sau signature; None nếu snapshot đã đổi"""
+        if not signature or signature[0] != self._stat(self.products_file):
+            return None
+        offset = signature[1][1] if signature[1] else 0
+        result = self.journal.read_from(offset)
+        if result is None:
+            return None
+        entries, end, st = result
+        if st is not None and end == st.st_size:
+            journal = (st.st_mtime_ns, st.st_size)
+        else:
+            # Stopped short of the end: the next signature check differs
+            # and reads on from here
+            journal = (None, end) if end else None
+        return entries, (signature[0], journal)
+
+    def watch_paths(self):
+        return [self.products_file, self.journal.filename]
+
+    def maybe_compact(self, products):
+        if self.journal.size() > self.compact_threshold:
+            self.compact(products)
+
+    def compact(self, products=None):
+        """Gộp nhật ký vào một snapshot mới (ghi file tạm rồi đổi tên)"""
+        with self.lock, self._lock:
+            if products is None:
+                products = self.load_products()
+            try:
+                self._write_snapshot(products)
+            except (OSError, TypeError, ValueError) as e:
+                raise StorageError(f"Error compacting {self.products_file}: {str(e)}")
+            self._archive_orders()
+            # Replaying the old journal over the new snapshot is harmless,
+            # so a crash before this truncate loses nothing
+            self.journal.truncate()
+            self.compactions += 1
+
+    def _write_snapshot(self, products):
+        write_json_atomic(self.products_file, products, fsync=self.fsync)
+
+    def _archive_orders(self):
+        """Chép các đơn hàng trong nhật ký sang orders_log trước khi xóa nhật ký"""
+        orders = [entry['order'] for entry in self.journal.read()
+                  if entry.get('op') == 'checkout' and entry.get('order')]
+        try:
+            self.orders_log.append(orders)
+        except (OSError, TypeError, ValueError) as e:
+            raise StorageError(f"Error writing orders {self.orders_log.filename}: {str(e)}")
+
+    def load_orders(self):
+        """orders_log rồi các đơn hàng còn trong nhật ký"""
+        with self._lock:
+            logged = self.orders_log.read()
+            entries = self.journal.read()
+        orders = {}
+        # A crash between archiving and truncating the journal leaves an
+        # order in both; the id keeps one copy
+        for order in logged:
+            orders.setdefault(order.get('id'), order)
+        for entry in entries:
+            if entry.get('op') == 'checkout' and entry.get('order'):
+                orders.setdefault(entry['order'].get('id'), entry['order'])
+        return list(orders.values())
+
+    def page_products(self, offset, limit):
+        """Chỉ đọc snapshot tới trang cần (trừ khi trang nằm sau snapshot)"""
+        for _ in range(self.LOAD_RETRIES):
+            signature = self.signature()
+            products = self._read_page(offset, offset + limit)
+            if self.signature() == signature:
+                break
+        if products is None:
+            # Some records have no id yet: numbering them needs the whole file
+            return super().page_products(offset, limit)
+        return products
+
+    def _read_page(self, start, stop):
+        # Complete lines only, and without self._lock, which a full load
+        # holds for as long as it reads the snapshot
+        result = self.journal.read_from(0)
+        entries = result[0] if result is not None else []
+        if not os.path.exists(self.products_file):
+            return ProductJournal.replay([], entries)[start:stop]
+        missing_id = []
+
+        def records(f):
+            for _, record, error, _ in iter_records(f):
+                if error is None and isinstance(record, dict):
+                    if 'id' not in record:
+                        missing_id.append(record)
+                        return
+                    yield record
+
+        try:
+            with open(self.products_file, 'rb') as f:
+                products = ProductJournal.replay_slice(records(f), entries, start, stop)
+        except (OSError, ValueError) as e:
+            logger.error("Error loading %s: %s", self.products_file, e)
+            return []
+        return None if missing_id else products
+
+    def get_product(self, product_id):
+        for product in self.load_products():
+            if product['id'] == product_id:
+                return product
+        return None
+
+    def find_products(self, name=None, category=None, min_price=None, max_price=None, limit=None):
+        result = []
+        for product in self.load_products():
+            if _match_product(product, name, category, min_price, max_price):
+                result.append(product)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def load_users(self):
+        """Đọc users.json rồi thêm các tài khoản trong nhật ký đăng ký"""
+        with self._lock:
+            users = self.load_json_data(self.users_file)
+            entries = self.users_journal.read()
+            if entries:
+                seen = {u['username'] for u in users}
+                for entry in entries:
+                    user = entry.get('user') if entry.get('op') == 'insert' else None
+                    # Two processes may register the same name at once; the
+                    # first line in the journal wins
+                    if user and user['username'] not in seen:
+                        seen.add(user['username'])
+                        users.append(user)
+            return users
+
+    def find_user(self, username):
+        for user in self.load_users():
+            if user['username'] == username:
+                return user
+        return None
+
+    def add_user(self, user):
+        with self.users_lock, self._lock:
+            if self.find_user(user['username']) is not None:
+                return False
+            return self.append_user(user)
+
+    def append_user(self, user):
+        """Ghi nối tài khoản mới vào nhật ký đăng ký"""
+        with self.users_lock, self._lock:
+            try:
+                self.users_journal.append([{"op": "insert", "user": user}])
+            except (OSError, TypeError, ValueError) as e:
+                raise StorageError(f"Error writing journal {self.users_journal.filename}: {str(e)}")
+            return True
+
+    def users_signature(self):
+        """(mtime, kích thước) của users.json và nhật ký đăng ký"""
+        return (self._stat(self.users_file), self._stat(self.users_journal.filename))
+
+    def users_write_lock(self):
+        return self.users_lock
+
+    def maybe_compact_users(self, users):
+        if self.users_journal.size() > self.compact_threshold:
+            self.compact_users(users)
+
+    def compact_users(self, users=None):
+        """Gộp nhật ký đăng ký vào users.json"""
+        with self.users_lock, self._lock:
+            users = self.load_users() if users is None else list(users)
+            if not self.save_json_data(self.users_file, users):
+                raise StorageError(f"Không thể lưu {self.users_file}")
+            self.users_journal.truncate()
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "journal_bytes": self.journal.size(),
+            "users_journal_bytes": self.users_journal.size(),
+            "orders_bytes": self.orders_log.size(),
+            "compactions": self.compactions,
+            "lock_waits": self.lock.waits,
+        }
+
+    def close(self):
+        self.lock.close()
+        self.users_lock.close()
+
+
+class BinaryStorage(JsonStorage):
+    """Như JsonStorage, nhưng snapshot sản phẩm là file nhị phân (binary_snapshot)
+
+    Nhật ký, khóa giữa các máy và tài khoản (users.json) giữ nguyên; chỉ
+    snapshot đổi định dạng. Snapshot được đọc qua mmap: đọc một trang chỉ
+    chạm tới các dòng của trang đó, đọc cả catalog là chép từng cột.
+    """
+
+    name = "binary"
+
+    def init_users(self, default_users):
+        if not os.path.exists(self.products_file):
+            logger.info("Creating %s", self.products_file)
+            try:
+                write_snapshot(self.products_file, [], fsync=self.fsync)
+            except OSError as e:
+                raise StorageError(f"Không thể tạo {self.products_file}: {str(e)}")
+        super().init_users(default_users)
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.products_file):
+            return []
+        try:
+            with BinarySnapshot(self.products_file) as snapshot:
+                return snapshot.products()
+        except (OSError, SnapshotError) as e:
+            logger.error("Error loading %s: %s", self.products_file, e)
+            return []
+
+    def _write_snapshot(self, products):
+        write_snapshot(self.products_file, products, fsync=self.fsync)
+
+    def load_table(self):
+        """Các cột của snapshot chép thẳng vào ProductTable, rồi phát lại nhật ký lên các dòng"""
+        for _ in range(self.LOAD_RETRIES):
+            signature = self.signature()
+            loaded = self._read_table()
+            if self.signature() == signature:
+                break
+        return loaded
+
+    def _read_table(self):
+        with self._lock:
+            entries = self.journal.read()
+            try:
+                with BinarySnapshot(self.products_file) as snapshot:
+                    table, rows = snapshot.table()
+            except (OSError, SnapshotError) as e:
+                # No snapshot yet (or a broken one): the dict path handles both
+                logger.info("Reading %s as products: %s", self.products_file, e)
+                return None
+        if not entries:
+            return table, rows
+        products = ProductJournal.replay(rows, entries)
+        kept = set(map(id, products))
+        for row in rows:
+            if id(row) not in kept:
+                # Deleted, or replaced by a re-insert of its id
+                table.release(row)
+        # Inserted products are still the journal's dicts
+        return table, [table.append(p) if isinstance(p, dict) else p for p in products]
+
+    def _read_page(self, start, stop):
+        result = self.journal.read_from(0)
+        entries = result[0] if result is not None else []
+        if not os.path.exists(self.products_file):
+            return ProductJournal.replay([], entries)[start:stop]
+        try:
+            with BinarySnapshot(self.products_file) as snapshot:
+                if not entries:
+                    # Right after a compaction rows are catalog positions
+                    return snapshot.products(start, stop)
+                return ProductJournal.replay_slice(snapshot.iter_products(), entries,
+                                                   start, stop)
+        except (OSError, SnapshotError) as e:
+            logger.error("Error loading %s: %s", self.products_file, e)
+            return []
+
+    def stats(self):
+        stats = super().stats()
+        stats["snapshot_bytes"] = os.path.getsize(self.products_file) \
+            if os.path.exists(self.products_file) else 0
+        return stats
+
+
+class SQLiteStorage(StorageBackend):
+    """Lưu trữ bằng SQLite (chế độ WAL, có chỉ mục)"""
+
+    name = "sqlite"
+    indexed_users = True
+
+    # Columns stored natively; any other product field goes into `extra`
+    PRODUCT_COLUMNS = ('id', 'name', 'category', 'price', 'quantity', 'description',
+                       'created_at', 'created_by', 'sku')
+    USER_COLUMNS = ('username', 'password', 'role', 'created_at')
+    # Written entries kept in `changes` for other stations to catch up on;
+    # a larger batch is logged as one "reload everything" marker instead
+    CHANGES_KEPT = 10000
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL DEFAULT '',
+            category TEXT NOT NULL DEFAULT '',
+            price REAL NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            description TEXT NOT NULL DEFAULT '',
+            created_at TEXT,
+            created_by TEXT,
+            sku TEXT,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
+        CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+        CREATE INDEX IF NOT EXISTS idx_products_price ON products(price);
+        CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
+        CREATE INDEX IF NOT EXISTS idx_products_created_at ON products(created_at);
+        CREATE TABLE IF NOT EXISTS orders (
+            id TEXT PRIMARY KEY,
+            created_at TEXT,
+            created_by TEXT,
+            total REAL NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at);
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry TEXT
+        );
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user',
+            created_at TEXT,
+            extra TEXT
+        );
+    """
+
+    # Fixed SQL text so sqlite3's per-connection statement cache reuses
+    # the prepared statements
+    SQL_UPSERT_PRODUCT = (
+        "INSERT OR REPLACE INTO products "
+        "(id, name, category, price, quantity, description, created_at, created_by, sku, extra) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    SQL_DELETE_PRODUCT = "DELETE FROM products WHERE id = ?"
+    SQL_SET_QUANTITY = "UPDATE products SET quantity = ? WHERE id = ?"
+    SQL_INSERT_ORDER = (
+        "INSERT OR IGNORE INTO orders (id, created_at, created_by, total, data) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+    SQL_GET_PRODUCT = "SELECT * FROM products WHERE id = ?"
+    SQL_ALL_PRODUCTS = "SELECT * FROM products ORDER BY id"
+    SQL_PAGE_PRODUCTS = "SELECT * FROM products ORDER BY id LIMIT ? OFFSET ?"
+    SQL_INSERT_USER = (
+        "INSERT INTO users (username, password, role, created_at, extra) VALUES (?, ?, ?, ?, ?)"
+    )
+    SQL_GET_USER = "SELECT * FROM users WHERE username = ?"
+    SQL_LOG_CHANGE = "INSERT INTO changes (entry) VALUES (?)"
+    SQL_LAST_CHANGE = "SELECT seq FROM sqlite_sequence WHERE name = 'changes'"
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        # SQLite locks its own writes; this one spans reading other
+        # stations' changes and writing ours, so new ids do not collide
+        self.lock = FileLock(f"{db_file}.lock")
+        try:
+            # The API fetch runs in a worker thread; access is serialized by _lock
+            self._conn = sqlite3.connect(db_file, check_same_thread=False, cached_statements=256)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+        except sqlite3.Error as e:
+            raise StorageError(f"Không thể mở cơ sở dữ liệu {db_file}: {str(e)}")
+
+    def _product_row(self, product):
+        extra = {k: v for k, v in product.items() if k not in self.PRODUCT_COLUMNS}
+        return (
+            product['id'],
+            product.get('name', ''),
+            product.get('category', ''),
+            product.get('price', 0),
+            product.get('quantity', 0),
+            product.get('description', ''),
+            product.get('created_at'),
+            product.get('created_by'),
+            product.get('sku'),
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+
+    def _row_product(self, row):
+        product = {}
+        for column in self.PRODUCT_COLUMNS:
+            value = row[column]
+            if value is not None or column in ('created_at', 'created_by'):
+                product[column] = value
+        # Whole-number prices come back from REAL as floats
+        if isinstance(product.get('price'), float) and product['price'].is_integer():
+            product['price'] = int(product['price'])
+        if row['extra']:
+            product.update(json.loads(row['extra']))
+        return product
+
+    @staticmethod
+    def _order_row(order):
+        return (order['id'], order.get('created_at'), order.get('created_by'),
+                order.get('total', 0), json.dumps(order, ensure_ascii=False))
+
+    def _row_user(self, row):
+        user = {column: row[column] for column in self.USER_COLUMNS}
+        if row['extra']:
+            user.update(json.loads(row['extra']))
+        return user
+
+    def _user_row(self, user):
+        extra = {k: v for k, v in user.items() if k not in self.USER_COLUMNS}
+        return (
+            user['username'],
+            user['password'],
+            user.get('role', 'user'),
+            user.get('created_at'),
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+
+    def init_users(self, default_users):
+        with self._lock:
+            try:
+                count = self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+                if count == 0:
+                    with self._conn:
+                        self._conn.executemany(self.SQL_INSERT_USER,
+                                               [self._user_row(u) for u in default_users])
+                    logger.info("Created default users: admin, user")
+            except sqlite3.Error as e:
+                raise StorageError(str(e))
+
+    def signature(self):
+        """(PRAGMA data_version, số thứ tự thay đổi cuối cùng)
+
+        data_version đổi khi kết nối khác ghi vào cơ sở dữ liệu; số thứ tự
+        là chỗ read_changes đọc tiếp.
+        """
+        with self._lock:
+            try:
+                version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                return (version, self._last_change())
+            except sqlite3.Error:
+                return None
+
+    def _last_change(self):
+        row = self._conn.execute(self.SQL_LAST_CHANGE).fetchone()
+        return row[0] if row is not None else 0
+
+    def read_changes(self, signature):
+        """Các thao tác trong bảng changes sau signature; None nếu phải đọc lại toàn bộ"""
+        if not signature:
+            return None
+        with self._lock:
+            try:
+                version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                rows = self._conn.execute("SELECT seq, entry FROM changes WHERE seq > ? "
+                                          "ORDER BY seq", (signature[1],)).fetchall()
+            except sqlite3.Error as e:
+                logger.error("Error reading changes from %s: %s", self.db_file, e)
+                return None
+        if not rows:
+            return [], (version, signature[1])
+        # Pruned past our position, or a batch too large to log
+        if rows[0]['seq'] != signature[1] + 1 or any(row['entry'] is None for row in rows):
+            return None
+        return [json.loads(row['entry']) for row in rows], (version, rows[-1]['seq'])
+
+    def _log_changes(self, entries):
+        if len(entries) > self.CHANGES_KEPT:
+            self._conn.execute(self.SQL_LOG_CHANGE, (None,))
+        else:
+            self._conn.executemany(self.SQL_LOG_CHANGE,
+                                   [(json.dumps(entry, ensure_ascii=False),) for entry in entries])
+        self._conn.execute("DELETE FROM changes WHERE seq <= ?",
+                           (self._last_change() - self.CHANGES_KEPT,))
+
+    def load_products(self):
+        with self._lock:
+            try:
+                rows = self._conn.execute(self.SQL_ALL_PRODUCTS).fetchall()
+            except sqlite3.Error as e:
+                logger.error("Error loading products from %s: %s", self.db_file, e)
+                return []
+            return [self._row_product(row) for row in rows]
+
+    def write_products(self, entries):
+        """Ghi cả lô thao tác trong một transaction"""
+        with self._lock:
+            try:
+                with self._conn:
+                    for entry in entries:
+                        op = entry.get('op')
+                        if op == 'insert':
+                            self._conn.execute(self.SQL_UPSERT_PRODUCT,
+                                               self._product_row(entry['product']))
+                        elif op == 'update':
+                            self._update_product(entry['id'], entry.get('fields') or {})
+                        elif op == 'delete':
+                            self._conn.execute(self.SQL_DELETE_PRODUCT, (entry['id'],))
+                        elif op == 'checkout':
+                            self._conn.executemany(self.SQL_SET_QUANTITY,
+                                                   [(quantity, product_id) for product_id, quantity
+                                                    in entry.get('stock') or ()])
+                            self._conn.execute(self.SQL_INSERT_ORDER,
+                                               self._order_row(entry['order']))
+                    if entries:
+                        self._log_changes(entries)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                raise StorageError(f"Error writing products to {self.db_file}: {str(e)}")
+
+    def _update_product(self, product_id, fields):
+        """Cập nhật một dòng; chỉ đọc lại dòng khi có trường nằm ngoài các cột"""
+        columns = [k for k in fields if k in self.PRODUCT_COLUMNS and k != 'id']
+        values = [fields[k] for k in columns]
+        extra_fields = {k: v for k, v in fields.items() if k not in self.PRODUCT_COLUMNS}
+        if extra_fields:
+            row = self._conn.execute("SELECT extra FROM products WHERE id = ?",
+                                     (product_id,)).fetchone()
+            if row is None:
+                return
+            extra = json.loads(row['extra']) if row['extra'] else {}
+            extra.update(extra_fields)
+            columns.append('extra')
+            values.append(json.dumps(extra, ensure_ascii=False))
+        if not columns:
+            return
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        self._conn.execute(f"UPDATE products SET {assignments} WHERE id = ?",
+                           values + [product_id])
+
+    def load_orders(self):
+        with self._lock:
+            try:
+                rows = self._conn.execute("SELECT data FROM orders ORDER BY rowid").fetchall()
+            except sqlite3.Error as e:
+                logger.error("Error loading orders from %s: %s", self.db_file, e)
+                return []
+            return [json.loads(row['data']) for row in rows]
+
+    def page_products(self, offset, limit):
+        with self._lock:
+            try:
+                rows = self._conn.execute(self.SQL_PAGE_PRODUCTS, (limit, offset)).fetchall()
+            except sqlite3.Error as e:
+                logger.error("Error loading products from %s: %s", self.db_file, e)
+                return []
+            return [self._row_product(row) for row in rows]
+
+    def seek_products(self, field, after=None, limit=50, descending=False):
+        """Một lần quét chỉ mục của cột field, bắt đầu ngay sau con trỏ"""
+        _seek_key(field)
+        params = []
+        where = ""
+        if after is not None:
+            value, last_id = after
+            if field == 'price' and not isinstance(value, (int, float)):
+                value = 0
+            op = '<' if descending else '>'
+            if value is None:
+                # NULLs sort first: only the rest of the NULLs, then every value
+                # when ascending; when descending, NULLs are the last rows
+                where = f"WHERE ({field} IS NULL AND id {op} ?)"
+                if not descending:
+                    where += f" OR {field} IS NOT NULL"
+                params.append(last_id)
+            else:
+                where = f"WHERE ({field} {op} ? OR ({field} = ? AND id {op} ?))"
+                if descending:
+                    where += f" OR {field} IS NULL"
+                params.extend([value, value, last_id])
+        direction = "DESC" if descending else "ASC"
+        # field is checked against SEEK_FIELDS above
+        sql = f"SELECT * FROM products {where} ORDER BY {field} {direction}, id {direction} LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                logger.error("Error loading products from %s: %s", self.db_file, e)
+                return []
+            return [self._row_product(row) for row in rows]
+
+    def get_product(self, product_id):
+        with self._lock:
+            row = self._conn.execute(self.SQL_GET_PRODUCT, (product_id,)).fetchone()
+            return self._row_product(row) if row is not None else None
+
+    def find_products(self, name=None, category=None, min_price=None, max_price=None, limit=None):
+        conditions = []
+        params = []
+        if name is not None:
+            # Range scan on idx_products_name instead of LIKE
+            conditions.append("name >= ? AND name < ?")
+            params.extend([name, name + '\uffff'])
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if min_price is not None:
+            conditions.append("price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append("price <= ?")
+            params.append(max_price)
+        sql = "SELECT * FROM products"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            return [self._row_product(row) for row in rows]
+
+    def load_users(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM users").fetchall()
+            return [self._row_user(row) for row in rows]
+
+    def find_user(self, username):
+        with self._lock:
+            row = self._conn.execute(self.SQL_GET_USER, (username,)).fetchone()
+            return self._row_user(row) if row is not None else None
+
+    def add_user(self, user):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(self.SQL_INSERT_USER, self._user_row(user))
+            except sqlite3.IntegrityError:
+                return False
+            except sqlite3.Error as e:
+                raise StorageError(str(e))
+            return True
+
+    def users_signature(self):
+        return self.signature()
+
+    def write_lock(self):
+        return self.lock
+
+    def watch_paths(self):
+        return [self.db_file, f"{self.db_file}-wal"]
+
+    def stats(self):
+        with self._lock:
+            products = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        return {"backend": self.name, "db_file": self.db_file, "rows": products,
+                "lock_waits": self.lock.waits}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        self.lock.close()
+
+
+def migrate_json_to_sqlite(products_file, users_file, db_file):
+    """Chuyển dữ liệu từ products.json/users.json sang SQLite (chỉ chạy một lần)"""
+    source = JsonStorage(products_file, users_file)
+    target = SQLiteStorage(db_file)
+    try:
+        with target._lock:
+            existing = target._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM products) + (SELECT COUNT(*) FROM users)"
+            ).fetchone()[0]
+        if existing:
+            logger.info("%s already has data, skipping migration", db_file)
+            return 0, 0
+
+        products = source.load_products()
+        users = source.load_users()
+        orders = source.load_orders()
+        with target._lock:
+            try:
+                with target._conn:
+                    target._conn.executemany(target.SQL_UPSERT_PRODUCT,
+                                             [target._product_row(p) for p in products])
+                    target._conn.executemany(target.SQL_INSERT_ORDER,
+                                             [target._order_row(o) for o in orders])
+                    target._conn.executemany("INSERT OR IGNORE INTO users "
+                                             "(username, password, role, created_at, extra) "
+                                             "VALUES (?, ?, ?, ?, ?)",
+                                             [target._user_row(u) for u in users])
+            except sqlite3.Error as e:
+                raise StorageError(f"Migration failed: {str(e)}")
+        logger.info("Migrated %d products and %d users to %s", len(products), len(users), db_file)
+        return len(products), len(users)
+    finally:
+        target.close()
+
+
+def migrate_json_to_binary(products_file, users_file, snapshot_file):
+    """Chuyển catalog JSON (snapshot + nhật ký) sang snapshot nhị phân (chỉ chạy một lần)
+
+    Tài khoản vẫn ở users.json và đơn hàng ở orders.jsonl (dùng chung);
+    products.json được giữ nguyên.
+    """
+    source = JsonStorage(products_file, users_file)
+    try:
+        with source.lock:
+            products = source.load_products()
+            # Orders still in the JSON journal would not be seen any more
+            source._archive_orders()
+    finally:
+        source.close()
+    try:
+        write_snapshot(snapshot_file, products)
+    except OSError as e:
+        raise StorageError(f"Migration failed: {str(e)}")
+    logger.info("Migrated %d products to %s", len(products), snapshot_file)
+    return len(products)
+
+
+def create_storage(backend, products_file="products.json", users_file="users.json",
+                   db_file="shop.db", snapshot_file=None):
+    """Tạo tầng lưu trữ theo tên ("json", "binary" hoặc "sqlite")
+
+    snapshot_file: snapshot nhị phân của "binary", mặc định products.snap
+    cạnh products_file.
+    """
+    if backend == "sqlite":
+        if not os.path.exists(db_file):
+            migrate_json_to_sqlite(products_file, users_file, db_file)
+        return SQLiteStorage(db_file)
+    if backend == "binary":
+        snapshot_file = snapshot_file or os.path.splitext(products_file)[0] + ".snap"
+        if not os.path.exists(snapshot_file) and os.path.exists(products_file):
+            migrate_json_to_binary(products_file, users_file, snapshot_file)
+        return BinaryStorage(snapshot_file, users_file)
+    if backend == "json":
+        return JsonStorage(products_file, users_file)
+    raise StorageError(f"Không hỗ trợ kiểu lưu trữ: {backend}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        db = sys.argv[2] if len(sys.argv) > 2 else "shop.db"
+        migrate_json_to_sqlite("products.json", "users.json", db)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "orders":
+        # Every order as NDJSON, oldest first
+        storage = create_storage(os.environ.get("SHOP_STORAGE", "json"))
+        try:
+            for order in storage.load_orders():
+                print(json.dumps(order, ensure_ascii=False))
+        finally:
+            storage.close()
+    elif len(sys.argv) >= 2 and sys.argv[1] in ("page", "seek"):
+        # One page as NDJSON, reading only that page (SHOP_STORAGE picks the backend)
+        storage = create_storage(os.environ.get("SHOP_STORAGE", "json"))
+        try:
+            if sys.argv[1] == "page":
+                offset = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+                limit = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+                products = storage.page_products(offset, limit)
+            else:
+                field = sys.argv[2] if len(sys.argv) > 2 else "name"
+                after = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+                limit = int(sys.argv[4]) if len(sys.argv) > 4 else 50
+                products = storage.seek_products(field, after, limit)
+            for product in products:
+                print(json.dumps(product, ensure_ascii=False))
+            if sys.argv[1] == "seek" and products:
+                # The cursor of the next page goes to stderr, out of the data
+                print(json.dumps([products[-1].get(field), products[-1]['id']],
+                                 ensure_ascii=False), file=sys.stderr)
+        finally:
+            storage.close()
+    else:
+        print("Usage: python storage.py migrate [shop.db]\n"
+              "       python storage.py page [offset] [limit]\n"
+              "       python storage.py seek name|price|created_at ['[value, id]'] [limit]\n"
+              "       python storage.py orders")
@@ -0,0 +1,95 @@
+import hmac
+import threading
+
+
+class UserStore:
+    """Tài khoản người dùng, tra cứu theo tên đăng nhập trong O(1)
+
+    Với tầng lưu trữ không có chỉ mục (JSON), toàn bộ tài khoản được giữ
+    trong một dict username -> tài khoản và chỉ đọc lại khi file thay đổi;
+    đăng ký mới chỉ ghi nối một dòng. SQLite đã có khóa chính trên
+    username nên tra cứu được chuyển thẳng xuống cơ sở dữ liệu.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._by_name = {}
+        self._signature = None
+        self._loaded = False
+        self._lock = threading.RLock()
+
+        # Cache counters
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self):
+        """Đọc lại tài khoản nếu cache không còn hợp lệ"""
+        signature = self.storage.users_signature()
+        if self._loaded and signature == self._signature:
+            self.hits += 1
+            return
+
+        self.misses += 1
+        self._by_name = {u['username']: u for u in self.storage.load_users()}
+        self._signature = signature
+        self._loaded = True
+
+    def preload(self):
+        """Đọc trước tài khoản (ví dụ từ luồng nền khi đang hiện màn hình đăng nhập)"""
+        if self.storage.indexed_users:
+            return
+        with self._lock:
+            self._ensure_loaded()
+
+    def invalidate(self):
+        """Buộc lần đọc kế tiếp phải tải lại dữ liệu"""
+        with self._lock:
+            self._loaded = False
+
+    def get(self, username):
+        """Lấy tài khoản theo tên đăng nhập, None nếu không có"""
+        if self.storage.indexed_users:
+            return self.storage.find_user(username)
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_name.get(username)
+
+    def authenticate(self, username, password_hash):
+        """Trả về tài khoản nếu mật khẩu (đã băm) đúng, ngược lại None
+
+        So sánh trong thời gian hằng để không lộ độ dài đoạn trùng khớp;
+        tên không tồn tại vẫn tốn đúng một phép so sánh như mật khẩu sai.
+        """
+        user = self.get(username)
+        stored = user.get('password', '') if user is not None else password_hash + '!'
+        if hmac.compare_digest(str(stored).encode(), str(password_hash).encode()) and user is not None:
+            return user
+        return None
+
+    def register(self, user):
+        """Thêm tài khoản, trả về False nếu tên đăng nhập đã tồn tại
+
+        Lỗi ghi được báo bằng StorageError.
+        """
+        if self.storage.indexed_users:
+            return self.storage.add_user(user)
+        with self.storage.users_write_lock(), self._lock:
+            # Another station may have taken the name since we last read:
+            # catch up on the journal under the file lock before checking
+            self._ensure_loaded()
+            if user['username'] in self._by_name:
+                return False
+            self.storage.append_user(user)
+            self._by_name[user['username']] = user
+            self.storage.maybe_compact_users(self._by_name.values())
+            self._signature = self.storage.users_signature()
+            return True
+
+    def stats(self):
+        """Thống kê cache tài khoản"""
+        with self._lock:
+            return {
+                "users_cached": len(self._by_name),
+                "user_hits": self.hits,
+                "user_misses": self.misses,
+            }
@@ -0,0 +1,223 @@
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """Bảng ảo cho ttk.Treeview: chỉ tạo các dòng đang nhìn thấy
+
+    Treeview chỉ chứa các dòng đang nhìn thấy cộng vài dòng đệm, nên chi
+    phí hiển thị phụ thuộc chiều cao bảng chứ không phụ thuộc số sản phẩm.
+    Mỗi dòng có iid là khóa ổn định của phần tử (id sản phẩm); khi cuộn
+    hoặc làm mới, chỉ các dòng thêm/bớt/đổi giá trị mới bị chạm tới.
+    """
+
+    BUFFER_ROWS = 5
+    DEFAULT_ROW_HEIGHT = 20
+    HEADING_HEIGHT = 25
+
+    def __init__(self, tree, scrollbar, format_row, on_select=None, key=None, on_render=None):
+        """
+        format_row(position, item) -> tuple giá trị các cột (position tính từ 0)
+        on_select(item) được gọi khi người dùng chọn một dòng
+        key(item) -> khóa ổn định của phần tử; None thì dùng vị trí
+        on_render() được gọi sau mỗi lần vẽ lại (cuộn, đổi danh sách)
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.format_row = format_row
+        self.on_select = on_select
+        self.key = key
+        self.on_render = on_render
+
+        self.rows = []
+        self.offset = 0
+        self.visible = int(tree.cget('height')) or 15
+        # iids currently in the Treeview, in display order, and their values
+        self._order = []
+        self._rendered = {}
+        self._selected = None
+        self._selected_key = None
+
+        # Treeview operations done by the last render
+        self.last_render = {"inserted": 0, "updated": 0, "deleted": 0, "moved": 0}
+
+        self.row_height = self.DEFAULT_ROW_HEIGHT
+        try:
+            height = ttk.Style(tree).lookup('Treeview', 'rowheight')
+            if height:
+                self.row_height = int(height)
+        except (ValueError, TypeError):
+            pass
+
+        tree.configure(yscrollcommand='')
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.bind('<<TreeviewSelect>>', self._on_tree_select)
+        tree.bind('<Configure>', self._on_configure)
+        tree.bind('<MouseWheel>', self._on_mousewheel)
+        tree.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        tree.bind('<Button-5>', lambda e: self._scroll_by(3))
+        tree.bind('<Up>', lambda e: self._move_selection(-1))
+        tree.bind('<Down>', lambda e: self._move_selection(1))
+        tree.bind('<Prior>', lambda e: self._scroll_by(-self.visible))
+        tree.bind('<Next>', lambda e: self._scroll_by(self.visible))
+
+    def set_rows(self, rows, keep_position=False):
+        """Đổi danh sách hiển thị (chỉ lưu tham chiếu, không tạo dòng)"""
+        self.rows = rows
+        if not keep_position:
+            self.offset = 0
+            self._selected = None
+            self._selected_key = None
+        self._render()
+
+    def refresh(self):
+        """Vẽ lại cửa sổ hiện tại (sau khi dữ liệu thay đổi tại chỗ)"""
+        self._render()
+
+    def scroll_to(self, offset):
+        """Cuộn để dòng thứ offset (tính từ 0) nằm đầu bảng"""
+        self._scroll_to(offset)
+
+    def selected_item(self):
+        """Phần tử đang được chọn, hoặc None"""
+        return self._selected
+
+    def _max_offset(self):
+        return max(0, len(self.rows) - self.visible)
+
+    def _iid(self, position, item):
+        key = self.key(item) if self.key is not None else None
+        return f"pos{position}" if key is None else str(key)
+
+    def _render(self):
+        """Đưa Treeview về đúng cửa sổ hiện tại bằng một diff tối thiểu"""
+        self.offset = min(max(0, self.offset), self._max_offset())
+        window = self.rows[self.offset:self.offset + self.visible + self.BUFFER_ROWS]
+        iids = [self._iid(self.offset + i, item) for i, item in enumerate(window)]
+        wanted = set(iids)
+        counts = {"inserted": 0, "updated": 0, "deleted": 0, "moved": 0}
+
+        stale = [iid for iid in self._order if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._rendered[iid]
+            counts["deleted"] = len(stale)
+        order = [iid for iid in self._order if iid in wanted]
+
+        selected_iid = None
+        for index, (iid, item) in enumerate(zip(iids, window)):
+            values = self.format_row(self.offset + index, item)
+            old_values = self._rendered.get(iid)
+            if old_values is None:
+                self.tree.insert('', index, iid=iid, values=values)
+                order.insert(index, iid)
+                counts["inserted"] += 1
+            else:
+                if old_values != values:
+                    self.tree.item(iid, values=values)
+                    counts["updated"] += 1
+                if order[index] != iid:
+                    self.tree.move(iid, '', index)
+                    order.remove(iid)
+                    order.insert(index, iid)
+                    counts["moved"] += 1
+            self._rendered[iid] = values
+            if self._selected_key is not None and iid == self._selected_key:
+                # After a reload the product may be a new object with the same id
+                self._selected = item
+                selected_iid = iid
+
+        self._order = order
+        self.last_render = counts
+
+        if selected_iid is not None:
+            if self.tree.selection() != (selected_iid,):
+                self.tree.selection_set(selected_iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+        if self.on_render is not None:
+            self.on_render()
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible) / total)
+
+    def _scroll_to(self, offset):
+        offset = min(max(0, int(offset)), self._max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+        return 'break'
+
+    def _scroll_by(self, rows):
+        return self._scroll_to(self.offset + rows)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self._scroll_to(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible
+            self._scroll_by(amount)
+
+    def _on_mousewheel(self, event):
+        delta = event.delta
+        # Windows reports multiples of 120 per notch, macOS small steps
+        if abs(delta) >= 120:
+            delta //= 120
+        return self._scroll_by(-3 * delta)
+
+    def _on_configure(self, event):
+        visible = max(1, (event.height - self.HEADING_HEIGHT) // self.row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
+
+    def _position_of_iid(self, iid):
+        try:
+            return self.offset + self._order.index(iid)
+        except ValueError:
+            return None
+
+    def _select(self, position):
+        self._selected = self.rows[position]
+        self._selected_key = self._iid(position, self._selected)
+
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        if selection[0] == self._selected_key:
+            # Our own selection_set while re-rendering the window
+            return
+        position = self._position_of_iid(selection[0])
+        if position is None or position >= len(self.rows):
+            return
+        self._select(position)
+        if self.on_select is not None:
+            self.on_select(self._selected)
+
+    def _move_selection(self, step):
+        """Di chuyển dòng chọn bằng phím mũi tên, cuộn khi ra khỏi cửa sổ"""
+        if not self.rows:
+            return 'break'
+        position = None
+        if self._selected_key is not None:
+            position = self._position_of_iid(self._selected_key)
+        position = 0 if position is None else min(max(0, position + step), len(self.rows) - 1)
+
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.visible:
+            self.offset = position - self.visible + 1
+        self._select(position)
+        self._render()
+        if self.on_select is not None:
+            self.on_select(self._selected)
+        return 'break'
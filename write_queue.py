@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _Batch:
+    __slots__ = ('entries', 'value', 'future')
+
+    def __init__(self, entries, value, future):
+        self.entries = entries
+        self.value = value
+        self.future = future
+
+
+class GroupCommitWriter:
+    """Một luồng ghi duy nhất, gom các thao tác đến gần nhau thành một lần ghi
+
+    submit(entries) đưa thao tác vào hàng đợi và trả về Future. Luồng ghi
+    lấy thao tác đầu tiên cùng mọi thao tác đã xếp hàng trong lúc lần ghi
+    trước đang chạy, chờ thêm tối đa window_ms nếu có (tối đa max_entries),
+    rồi gọi write_fn(toàn bộ thao tác) một lần - một lần ghi nối và một lần
+    fsync cho cả nhóm. Mọi Future trong nhóm cùng thành công hoặc cùng nhận
+    ngoại lệ của write_fn.
+
+    value có thể là một hàm: khi đó Future nhận kết quả (hoặc ngoại lệ)
+    của hàm đó, gọi sau khi ghi xong - cho thao tác mà write_fn có thể từ
+    chối riêng lẻ.
+    """
+
+    # The previous write is already the window: waiting longer only adds
+    # latency unless fsync is much slower than the callers
+    WINDOW_MS = 0
+    MAX_ENTRIES = 5000
+
+    def __init__(self, write_fn, window_ms=None, max_entries=None, name="catalog-writer"):
+        self.write_fn = write_fn
+        self.window_ms = self.WINDOW_MS if window_ms is None else window_ms
+        self.max_entries = self.MAX_ENTRIES if max_entries is None else max_entries
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+        self._thread.start()
+
+        # Commit counters
+        self.commits = 0
+        self.entries_written = 0
+        self.largest_group = 0
+
+    def submit(self, entries, value=True):
+        """Đưa thao tác vào hàng đợi; Future trả về value (hoặc value()) khi đã ghi bền vững"""
+        future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("Writer is closed"))
+            return future
+        self._queue.put(_Batch(entries, value, future))
+        return future
+
+    def flush(self):
+        """Chờ mọi thao tác đã gửi được ghi xong"""
+        self.submit([]).result()
+
+    def close(self):
+        """Ghi nốt hàng đợi rồi dừng luồng ghi"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _gather(self, first):
+        group = [first]
+        count = len(first.entries)
+        deadline = time.perf_counter() + self.window_ms / 1000
+        while count < self.max_entries:
+            timeout = deadline - time.perf_counter()
+            try:
+                batch = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                # close(): write what we have, then stop
+                self._queue.put(None)
+                break
+            group.append(batch)
+            count += len(batch.entries)
+        return group
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            group = self._gather(first)
+            entries = [entry for batch in group for entry in batch.entries]
+            try:
+                if entries:
+                    self.write_fn(entries)
+            except Exception as e:
+                for batch in group:
+                    batch.future.set_exception(e)
+                continue
+            self.commits += 1
+            self.entries_written += len(entries)
+            self.largest_group = max(self.largest_group, len(group))
+            for batch in group:
+                if not callable(batch.value):
+                    batch.future.set_result(batch.value)
+                    continue
+                try:
+                    batch.future.set_result(batch.value())
+                except Exception as e:
+                    batch.future.set_exception(e)